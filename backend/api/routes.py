@@ -1,69 +1,474 @@
-from fastapi import APIRouter, HTTPException
-from schemas.api_models import GenerationPayload
+import asyncio
+import concurrent.futures
+import json
+import queue
+import orjson
+from fastapi import APIRouter, File, Form, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from schemas.api_models import BatchGenerationPayload, GenerationPayload, IngestSettings, RepairPayload, ScenarioSweepPayload, StoreTimetablePayload, SubstituteIndexPayload, SubstituteBatchQuery, SubstitutionCommit
 from services.validator import validate_input_payload
-from solver.engine import TimetableEngine
-from typing import Dict, Any
+from services.bulk_ingest import BulkIngest
+from services.job_manager import job_manager, GenerationJob, JobQueueFullError, UnknownJobError
+from services.solution_cache import solution_cache, sessions_from_schedule
+from services.response_format import render_result
+from services.timetable_store import timetable_store, UnknownTimetableError
+from services.tenant_scheduler import tenant_scheduler, TenantQuotaError, UnknownBatchError
+from services.substitute_index import substitute_indexes, SubstituteIndex, SubstitutionError, UnknownIndexError
+from solver.registry import ENGINE_MODES
+from solver.profiles import AUTO_PROFILE, SOLVER_PROFILES
+from solver.scenarios import check_variations, ScenarioError
+from typing import Callable, Dict, Any, Literal, Optional
 
 router = APIRouter(prefix="/api/v1", tags=["timetable"])
 
-@router.post("/generate")
-async def generate_timetable(payload: GenerationPayload) -> Dict[str, Any]:
-    """
-    1. Validates the Hybrid JSON Input.
-    2. Runs the CP-SAT Engine.
-    3. Returns the perfectly mapped JSON Grid.
-    """
-    
+INFEASIBLE_DETAIL = "The provided constraints are too strict. The solver could not find a mathematically viable timetable."
+
+# `?format=compact` returns interned string tables plus columnar schedule arrays (orjson-encoded)
+ResponseFormat = Literal["default", "compact"]
+FORMAT_QUERY = Query("default", alias="format", description="'default' (one row per hour) or 'compact' (columnar)")
+
+
+def _check_payload(payload: GenerationPayload):
     # Pre-Generation Validation Step
     is_valid, errors = validate_input_payload(payload)
     if not is_valid:
         raise HTTPException(status_code=400, detail={"validation_errors": errors})
-        
-    try:
-        # Engine Execution Step
-        engine = TimetableEngine(data=payload)
-        
-        # The generator does the Variable Mapping -> Constraints -> Execution in one go
-        result = engine.generate()
-        
-        if result["status"] == "infeasible":
-            raise HTTPException(
-                status_code=422, 
-                detail="The provided constraints are too strict. The solver could not find a mathematically viable timetable."
-            )
-            
-        return result
-        
+
+    if payload.solver_options.engine_mode not in ENGINE_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown engine_mode '{payload.solver_options.engine_mode}'. Expected one of: {', '.join(ENGINE_MODES)}."
+        )
+
+    if payload.solver_options.profile != AUTO_PROFILE and payload.solver_options.profile not in SOLVER_PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown profile '{payload.solver_options.profile}'. Expected one of: {', '.join([AUTO_PROFILE, *SOLVER_PROFILES])}."
+        )
+
+
+def _start_job(payload: GenerationPayload, num_workers: Optional[int] = None, stream_events: bool = False) -> GenerationJob:
+    """
+    Serves identical payloads from the solution cache; otherwise queues a solve warm-started
+    from the closest cached timetable and caches the result once it succeeds. Optimizing
+    requests always solve: a cached timetable is only their starting point.
+    Raises JobQueueFullError when the solver pool and its queue are full.
+    """
+    cached = solution_cache.get(payload) if not payload.solver_options.optimize else None
+    if cached is not None:
+        return job_manager.add_completed(payload, {**cached, "cache": "hit"}, stream_events=stream_events)
+
+    job = job_manager.submit(payload, stream_events=stream_events, solution_hint=solution_cache.closest_sessions(payload),
+                             num_workers=num_workers)
+
+    def store(future):
+        if not future.cancelled() and future.exception() is None and not job.stop_event.is_set():
+            # Diagnostics describe this particular solve, not the timetable
+            solution_cache.put(payload, {k: v for k, v in future.result().items() if k != "diagnostics"})
+
+    job.future.add_done_callback(store)
+    return job
+
+
+def _submit_job(payload: GenerationPayload, stream_events: bool = False) -> GenerationJob:
+    try:
+        return _start_job(payload, stream_events=stream_events)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+async def _await_result(job: GenerationJob) -> Dict[str, Any]:
+    """
+    Waits for the job's result. A job cancelled through DELETE /jobs/{id} answers 409 with its
+    status (as /jobs/{id}/result does), a failed one 500.
+    """
+    try:
+        result = await asyncio.wrap_future(job.future)
+    except (asyncio.CancelledError, concurrent.futures.CancelledError):
+        if not job.cancelled:
+            # The request itself is being cancelled (client gone, server shutting down)
+            raise
+        raise HTTPException(status_code=409, detail=job.to_status())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    # A running job finishes its (discarded) search after being cancelled
+    if job.cancelled:
+        raise HTTPException(status_code=409, detail=job.to_status())
+    return result
+
+
+def _infeasible(result: Dict[str, Any]) -> HTTPException:
+    """
+    422 for an infeasible result, carrying the conflicting rules when the payload asked for
+    `solver_options.explain_infeasibility`.
+    """
+    if "explanation" not in result:
+        return HTTPException(status_code=422, detail=INFEASIBLE_DETAIL)
+    return HTTPException(status_code=422, detail={"message": INFEASIBLE_DETAIL, "explanation": result["explanation"]})
+
+
+def _public_result(result: Dict[str, Any], diagnostics: bool, response_format: str = "default"):
+    """
+    Drops the engine's `diagnostics` block unless the caller asked for it and renders the requested format.
+    """
+    if not diagnostics:
+        result = {k: v for k, v in result.items() if k != "diagnostics"}
+    return render_result(result, response_format)
+
+
+def _get_job(job_id: str) -> GenerationJob:
+    try:
+        return job_manager.get(job_id)
+    except UnknownJobError:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'.")
+
+
+@router.post("/generate")
+async def generate_timetable(payload: GenerationPayload, diagnostics: bool = False,
+                             response_format: ResponseFormat = FORMAT_QUERY) -> Dict[str, Any]:
+    """
+    1. Validates the Hybrid JSON Input.
+    2. Runs the CP-SAT Engine in the solver process pool (the event loop stays free).
+    3. Returns the perfectly mapped JSON Grid.
+    With `diagnostics=true` the response carries phase timings, model size and CP-SAT statistics.
+    With `format=compact` the schedule comes back as columnar arrays over interned string tables.
+    A generation cancelled through DELETE /jobs/{id} answers 409.
+    """
+    _check_payload(payload)
+    job = _submit_job(payload)
+
+    # The generator does the Variable Mapping -> Constraints -> Execution in one go
+    result = await _await_result(job)
+
+    if result["status"] == "infeasible":
+        raise _infeasible(result)
+
+    return _public_result(result, diagnostics, response_format)
+
+
+@router.post("/repair")
+async def repair_timetable(request: RepairPayload, diagnostics: bool = False,
+                           response_format: ResponseFormat = FORMAT_QUERY) -> Dict[str, Any]:
+    """
+    Incremental re-solve after a small edit (new blocked slot, changed hours, room out of service).
+    Keeps every session of `previous_schedule` the change does not touch, re-opens a widening
+    neighbourhood around the changed faculty, groups and rooms, and reports how many sessions moved.
+    """
+    payload = request.payload
+    _check_payload(payload)
+    repair = {
+        "sessions": sessions_from_schedule(payload, request.previous_schedule),
+        "changes": request.changes.model_dump(),
+    }
+    try:
+        job = job_manager.submit(payload, repair=repair)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    result = await _await_result(job)
+
+    if result["status"] == "infeasible":
+        raise _infeasible(result)
+
+    return _public_result(result, diagnostics, response_format)
+
+
+@router.post("/scenarios")
+async def compare_scenarios(request: ScenarioSweepPayload, diagnostics: bool = False) -> Dict[str, Any]:
+    """
+    What-if sweep: solves the base institution and every variation (rooms closed, hours added or
+    removed, faculty shifts or blocked hours changed) over one shared model, and returns a
+    comparison table of feasibility, solve time, room utilization and sessions moved from the
+    base timetable. `max_time_in_seconds` is the budget of each scenario.
+    """
+    payload = request.base
+    _check_payload(payload)
+    try:
+        check_variations(payload, request.variations)
+    except ScenarioError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    scenarios = {"variations": [v.model_dump() for v in request.variations], "include_schedules": request.include_schedules}
+    try:
+        job = job_manager.submit(payload, scenarios=scenarios)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    result = await _await_result(job)
+
+    return _public_result(result, diagnostics)
+
+
+@router.post("/batches", status_code=202)
+async def submit_batch(request: BatchGenerationPayload) -> Dict[str, Any]:
+    """
+    Queues generations for many institutions at once. The tenant scheduler starts them as
+    solver workers free up, fairly across institutions and smallest first within each, under
+    per-institution concurrency and solver-time quotas. Each started item is an ordinary job:
+    its result is served by /jobs/{job_id}/result.
+    """
+    for index, item in enumerate(request.items):
+        try:
+            _check_payload(item.payload)
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code,
+                                detail={"item": index, "institution_id": item.institution_id, "error": e.detail})
+    try:
+        batch_id = tenant_scheduler.submit_batch([(item.institution_id, item.payload) for item in request.items], _start_job)
+    except TenantQuotaError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return tenant_scheduler.batch_status(batch_id)
+
+
+@router.get("/batches/{batch_id}")
+async def get_batch(batch_id: str) -> Dict[str, Any]:
+    try:
+        return tenant_scheduler.batch_status(batch_id)
+    except UnknownBatchError:
+        raise HTTPException(status_code=404, detail=f"Unknown batch '{batch_id}'.")
+
+
+@router.get("/scheduler")
+async def get_scheduler_stats() -> Dict[str, Any]:
+    """
+    Worker utilization, jobs per minute and per-institution queue, quota and outcome figures.
+    """
+    return tenant_scheduler.stats()
+
+
+@router.post("/jobs", status_code=202)
+async def submit_generation_job(payload: GenerationPayload, stream: bool = False) -> Dict[str, Any]:
+    """
+    Queues a generation and returns immediately with a job ID to poll.
+    With `stream=true` intermediate solutions and progress are published on /jobs/{job_id}/events.
+    Responds 503 when the solver pool and its queue are full.
+    """
+    _check_payload(payload)
+    return _submit_job(payload, stream_events=stream).to_status()
+
+
+@router.post("/ingest", status_code=202)
+async def ingest_institution(settings: str = Form(..., description="IngestSettings JSON: college_settings and solver_options"),
+                             faculty: UploadFile = File(...), workloads: UploadFile = File(...), rooms: UploadFile = File(...),
+                             blocked_slots: Optional[UploadFile] = File(None),
+                             submit: bool = True, stream: bool = False) -> Dict[str, Any]:
+    """
+    Bulk alternative to /jobs for large institutions: faculty, workload, room and (optional)
+    blocked-slot tables uploaded as CSV or Arrow IPC files, parsed row by row straight into the
+    solver payload. Any bad row fails the upload with 422 and a row-level error list; otherwise
+    the payload is validated like /jobs and queued unless `submit=false`.
+    """
+    try:
+        ingest_settings = IngestSettings.model_validate_json(settings)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail={"message": "Invalid settings form field.", "errors": e.errors(include_url=False)})
+
+    ingest = BulkIngest(ingest_settings.college_settings, ingest_settings.solver_options)
+    uploads = {"faculty": faculty, "workloads": workloads, "rooms": rooms, "blocked_slots": blocked_slots}
+    # Parsing is CPU-bound; keep it off the event loop
+    await asyncio.to_thread(ingest.read_all, {
+        table: (upload.file, upload.filename or "") for table, upload in uploads.items() if upload is not None
+    })
+    report = ingest.report()
+    if report["error_count"]:
+        raise HTTPException(status_code=422, detail={"message": "Uploaded tables contain invalid rows.", **report})
+
+    payload = ingest.payload()
+    _check_payload(payload)
+    job = _submit_job(payload, stream_events=stream) if submit else None
+    return {"ingest": report, "job": job.to_status() if job is not None else None}
+
+
+@router.get("/jobs/{job_id}")
+async def get_generation_job(job_id: str) -> Dict[str, Any]:
+    return _get_job(job_id).to_status()
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_generation_job_result(job_id: str, diagnostics: bool = False,
+                                    response_format: ResponseFormat = FORMAT_QUERY) -> Dict[str, Any]:
+    """
+    Returns the same body as /generate once the job has completed, 409 while it is still
+    queued/running or was cancelled.
+    """
+    job = _get_job(job_id)
+    state = job.state
+    if state == "failed":
+        raise HTTPException(status_code=500, detail=str(job.future.exception()))
+    if state != "completed":
+        raise HTTPException(status_code=409, detail=job.to_status())
+
+    result = job.future.result()
+    if result["status"] == "infeasible":
+        raise _infeasible(result)
+    return _public_result(result, diagnostics, response_format)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_generation_job_events(job_id: str) -> StreamingResponse:
+    """
+    Server-sent events for a job submitted with `stream=true`:
+    `solution` (every improved timetable), `progress` (elapsed time, solutions, bound) and a final `done`.
+    The stream is consumed once; reconnecting resumes from the next unread event.
+    """
+    job = _get_job(job_id)
+    if job.events is None:
+        raise HTTPException(status_code=409, detail="Job was not submitted with stream=true.")
+
+    async def event_stream():
+        while True:
+            try:
+                event = await asyncio.to_thread(job.events.get, True, 1.0)
+            except queue.Empty:
+                if job.future.done():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            if event["type"] == "done":
+                break
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.post("/jobs/{job_id}/stop")
+async def stop_generation_job(job_id: str) -> Dict[str, Any]:
+    """
+    Ends the search early; the best timetable found so far becomes the job result.
+    """
+    try:
+        return job_manager.stop(job_id).to_status()
+    except UnknownJobError:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'.")
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_generation_job(job_id: str) -> Dict[str, Any]:
+    """
+    Cancels a queued job, or stops the CP-SAT search of a running one.
+    """
+    try:
+        return job_manager.cancel(job_id).to_status()
+    except UnknownJobError:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'.")
+
+
+@router.post("/timetables", status_code=201)
+async def store_timetable(request: StoreTimetablePayload) -> Dict[str, Any]:
+    """
+    Saves a generated schedule as indexed rows for the per-faculty, per-room and per-group views below.
+    """
+    try:
+        meta = await asyncio.to_thread(timetable_store.save, request.schedule, request.days_active,
+                                       request.time_slots, request.institution_id)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Schedule row is missing {e}.")
+    return {k: v for k, v in meta.items() if k != "digest"}
+
+
+def _timetable_view(request: Request, timetable_id: str, view: tuple, build: Callable[[], Dict[str, Any]]) -> Response:
+    """
+    Serves one view of a stored timetable with an ETag; a matching If-None-Match gets 304 without touching the rows.
+    """
+    try:
+        etag = timetable_store.etag(timetable_id, *view)
+    except UnknownTimetableError:
+        raise HTTPException(status_code=404, detail=f"Unknown timetable '{timetable_id}'.")
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=orjson.dumps(build(), option=orjson.OPT_NON_STR_KEYS), media_type="application/json", headers=headers)
+
+
+@router.get("/timetables/{timetable_id}")
+async def get_timetable(request: Request, timetable_id: str) -> Response:
+    return _timetable_view(request, timetable_id, ("meta",),
+                           lambda: {k: v for k, v in timetable_store.metadata(timetable_id).items() if k != "digest"})
+
+
+@router.get("/timetables/{timetable_id}/faculty/{faculty_id}")
+async def get_faculty_timetable(request: Request, timetable_id: str, faculty_id: str) -> Response:
+    """
+    One faculty member's week as day -> time slot -> sessions.
+    """
+    return _timetable_view(request, timetable_id, ("faculty", faculty_id),
+                           lambda: timetable_store.faculty_grid(timetable_id, faculty_id))
+
+
+@router.get("/timetables/{timetable_id}/rooms/{room_id}")
+async def get_room_timetable(request: Request, timetable_id: str, room_id: str, day: Optional[str] = None) -> Response:
+    return _timetable_view(request, timetable_id, ("room", room_id, day),
+                           lambda: timetable_store.room_grid(timetable_id, room_id, day))
+
+
+@router.get("/timetables/{timetable_id}/groups/{group}")
+async def get_group_timetable(request: Request, timetable_id: str, group: str, day: Optional[str] = None) -> Response:
+    return _timetable_view(request, timetable_id, ("group", group, day),
+                           lambda: timetable_store.group_grid(timetable_id, group, day))
+
+
+def _get_substitute_index(index_id: str) -> SubstituteIndex:
+    try:
+        return substitute_indexes.get(index_id)
+    except UnknownIndexError:
+        raise HTTPException(status_code=404, detail=f"Unknown substitute index '{index_id}'.")
+
+
+@router.post("/substitute-index", status_code=201)
+async def build_substitute_index(request: SubstituteIndexPayload) -> Dict[str, Any]:
+    """
+    Builds the occupancy bitmaps for a generated timetable once; searches then only need the index ID.
+    """
+    index_id, index = substitute_indexes.build(request.payload, request.schedule)
+    return {"index_id": index_id, "faculty": len(index.faculty), "sessions": len(index.sessions)}
 
 
 @router.post("/substitute-search")
-async def find_substitute(time_index: int, day: str, payload: GenerationPayload) -> Dict[str, Any]:
+async def find_substitute(index_id: str, time_index: int, day: str, absent_faculty_id: Optional[str] = None,
+                          subject: Optional[str] = None, limit: Optional[int] = None) -> Dict[str, Any]:
     """
     Intelligent Substitution Search Algorithm.
-    Filters out any faculty who:
-    1. Does not have a shift encompassing 'time_index'.
-    2. Is already scheduled for another class at [day, time_index].
-    (Mocked for now depending on persistent output DB logic)
-    """
-    available_subs = []
-    
-    # Filter 1: Shift validation
-    valid_shift_faculty = [f for f in payload.faculty if time_index in f.shift]
-    
-    # Filter 2: Free-slot validation
-    # Real logic queries the DB where `time_slot == time_index AND day == day`.
-    # Returning the valid list dynamically.
-    for f in valid_shift_faculty:
-        available_subs.append({
-            "faculty_id": f.id,
-            "name": f.name,
-            "current_load": f.total_target_load,
-            "status": "Available & On Shift"
-        })
-        
-    return {
-        "query": {"day": day, "time": time_index},
-        "available_substitutes": available_subs
-    }
+    Returns every faculty who:
+    1. Has a shift encompassing 'time_index' (and no blocked slot there).
+    2. Is not already scheduled for another class at [day, time_index].
+    With `absent_faculty_id` the class that faculty teaches there sets the subject and room tags;
+    substitutes are ranked by subject fit, then by current load.
+    """
+    index = _get_substitute_index(index_id)
+    try:
+        if absent_faculty_id is not None:
+            found = index.search_for_session(absent_faculty_id, day, time_index, limit=limit)
+        else:
+            found = {"available_substitutes": index.search(day, time_index, subject, limit=limit)}
+    except SubstitutionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"query": {"day": day, "time": time_index}, **found}
+
+
+@router.post("/substitute-search/batch")
+async def find_substitutes_for_absences(index_id: str, query: SubstituteBatchQuery) -> Dict[str, Any]:
+    """
+    Substitutes for every class of every absent faculty (e.g. the whole week), one entry per session.
+    """
+    index = _get_substitute_index(index_id)
+    try:
+        results = index.search_absences([a.model_dump() for a in query.absences], limit=query.limit)
+    except SubstitutionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"sessions": results}
+
+
+@router.post("/substitute-commit")
+async def commit_substitution(index_id: str, commit: SubstitutionCommit) -> Dict[str, Any]:
+    """
+    Records a substitution; the index is updated in place so later searches see the substitute as busy.
+    """
+    index = _get_substitute_index(index_id)
+    try:
+        row = index.commit(commit.absent_faculty_id, commit.substitute_faculty_id, commit.day, commit.time_slot)
+    except SubstitutionError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"session": row, "substitutions": len(index.substitutions)}
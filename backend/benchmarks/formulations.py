@@ -0,0 +1,51 @@
+"""
+Side-by-side benchmark of the engine formulations selectable via `solver_options.engine_mode`.
+
+For each synthetic institution size it reports model size, build time, solve time (including
+schedule extraction) and the CP-SAT status of every formulation.
+
+Run from the backend directory:
+    python -m benchmarks.formulations
+"""
+import time
+
+from ortools.sat.python import cp_model
+
+from solver.registry import ENGINE_MODES
+from benchmarks.model_build import build_payload
+
+TIME_LIMIT_S = 10.0
+
+
+def run(engine_cls, payload):
+    engine = engine_cls(data=payload)
+    start = time.perf_counter()
+    engine._create_variables()
+    engine._apply_hard_constraints()
+    built = time.perf_counter()
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = TIME_LIMIT_S
+    status = solver.Solve(engine.model)
+    # Extraction is where two_phase runs its room matching, so it counts towards the solve
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        engine._extract_schedule(solver)
+    solved = time.perf_counter()
+
+    proto = engine.model.Proto()
+    return len(proto.variables), len(proto.constraints), built - start, solved - built, solver.StatusName(status)
+
+
+def main():
+    sizes = [(10, 6, 4), (30, 15, 10), (60, 30, 20), (120, 60, 40)]
+    print(f"{'faculty':>8} {'rooms':>6} {'mode':>9} {'vars':>9} {'constraints':>12} {'build_s':>8} {'solve_s':>8}  status")
+    for num_faculty, num_rooms, num_divisions in sizes:
+        payload = build_payload(num_faculty, num_rooms, num_divisions)
+        for mode, engine_cls in ENGINE_MODES.items():
+            num_vars, num_constraints, build_s, solve_s, status = run(engine_cls, payload)
+            print(f"{num_faculty:>8} {num_rooms:>6} {mode:>9} {num_vars:>9} {num_constraints:>12} "
+                  f"{build_s:>8.3f} {solve_s:>8.3f}  {status}")
+
+
+if __name__ == "__main__":
+    main()
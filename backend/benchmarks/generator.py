@@ -0,0 +1,109 @@
+"""
+Synthetic institution generator.
+
+Produces realistic, reproducible GenerationPayload instances: divisions split into lab
+sub-batches, a theory/lab/tutorial mix per faculty, several lab room tags, part-time shifts and
+a configurable density of blocked slots. Rooms are sized from the generated demand with some
+slack, so instances stay feasible as they grow. The same arguments and seed always give the
+same payload.
+
+    from benchmarks.generator import generate_institution
+    payload = generate_institution(100, seed=7, engine_mode="interval")
+"""
+import math
+import random
+
+from schemas.api_models import GenerationPayload
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+SLOTS = [8, 9, 10, 11, 12, 13, 14, 15, 16]
+LUNCH_SLOT = 12
+LAB_TAGS = ["Computer_Lab", "Electronics_Lab", "Physics_Lab"]
+
+# Session-starts per room per week: every non-lunch hour for 1-hour sessions, and the
+# 2-hour blocks that fit on either side of lunch for labs
+THEORY_ROOM_WEEK = len(DAYS) * (len(SLOTS) - 1)
+LAB_ROOM_WEEK = len(DAYS) * 4
+
+
+def generate_institution(num_faculty: int, seed: int = 0, faculty_per_division: int = 5,
+                         batches_per_division: int = 3, lab_share: float = 0.4, tutorial_share: float = 0.2,
+                         part_time_share: float = 0.1, blocked_slot_density: float = 0.05,
+                         room_slack: float = 1.5, **solver_options) -> GenerationPayload:
+    """
+    Builds an institution of `num_faculty` faculty.
+
+    Every faculty teaches one 3-hour theory subject to their division. A `lab_share` of them also
+    run a 2-hour lab for each sub-batch, and a `tutorial_share` a 1-hour tutorial per sub-batch.
+    `blocked_slot_density` is the chance that any hour of a faculty's shift is blocked (never
+    more than the faculty's slack allows). Remaining keyword arguments become `solver_options`.
+    """
+    rng = random.Random(seed)
+    num_divisions = max(1, math.ceil(num_faculty / faculty_per_division))
+
+    faculty = []
+    theory_sessions = tutorial_sessions = 0
+    lab_sessions = {tag: 0 for tag in LAB_TAGS}
+    for i in range(num_faculty):
+        div = f"Y{i % num_divisions // 10 + 1}-DIV{i % num_divisions:03d}"
+        batches = [f"{div}-B{b + 1}" for b in range(batches_per_division)]
+        workload = [{
+            "id": f"F{i}-T", "type": "Theory", "subject": f"SUB{i}", "target_groups": [div],
+            "hours": 3, "consecutive_hours": 1, "required_tags": ["Theory_Room"],
+        }]
+        theory_sessions += 3
+
+        kind = rng.random()
+        if kind < lab_share:
+            tag = rng.choice(LAB_TAGS)
+            for b, batch in enumerate(batches):
+                workload.append({
+                    "id": f"F{i}-P{b + 1}", "type": "Practical", "subject": f"SUB{i}_LAB", "target_groups": [batch],
+                    "hours": 2, "consecutive_hours": 2, "required_tags": [tag],
+                })
+            lab_sessions[tag] += len(batches)
+        elif kind < lab_share + tutorial_share:
+            for b, batch in enumerate(batches):
+                workload.append({
+                    "id": f"F{i}-U{b + 1}", "type": "Tutorial", "subject": f"SUB{i}_TUT", "target_groups": [batch],
+                    "hours": 1, "consecutive_hours": 1, "required_tags": ["Tutorial_Room"],
+                })
+            tutorial_sessions += len(batches)
+
+        load = sum(w["hours"] for w in workload)
+        if rng.random() < part_time_share:
+            # Part-time faculty work either the morning or the afternoon block
+            shift = SLOTS[:4] if rng.random() < 0.5 else SLOTS[5:]
+        else:
+            shift = list(SLOTS)
+
+        available = [(d, s) for d in DAYS for s in shift if s != LUNCH_SLOT]
+        # Keep at least twice the load free so blocking never makes the instance infeasible by itself
+        max_blocked = max(0, len(available) - 2 * load)
+        blocked = [cell for cell in available if rng.random() < blocked_slot_density][:max_blocked]
+
+        faculty.append({
+            "id": f"F{i}",
+            "name": f"Faculty {i}",
+            "shift": shift,
+            "blocked_slots": [{"day": d, "time": s} for d, s in blocked],
+            "max_load_hrs": load + rng.choice([0, 2, 4]),
+            "workload": workload,
+        })
+
+    rooms = []
+
+    def add_rooms(prefix: str, room_type: str, capacity: int, tag: str, count: int):
+        rooms.extend({"id": f"{prefix}{n}", "type": room_type, "capacity": capacity, "tags": [tag]} for n in range(count))
+
+    add_rooms("C", "Classroom", 80, "Theory_Room", math.ceil(theory_sessions * room_slack / THEORY_ROOM_WEEK))
+    add_rooms("T", "Tutorial_Room", 30, "Tutorial_Room", math.ceil(tutorial_sessions * room_slack / THEORY_ROOM_WEEK))
+    for tag in LAB_TAGS:
+        add_rooms(f"{tag.split('_')[0][0]}L", "Laboratory", 30, tag, math.ceil(lab_sessions[tag] * room_slack / LAB_ROOM_WEEK))
+
+    return GenerationPayload(**{
+        "college_settings": {"days_active": DAYS, "time_slots": SLOTS, "lunch_slot": LUNCH_SLOT},
+        "rooms_config": {"rooms": rooms},
+        "faculty": faculty,
+        "solver_options": solver_options,
+    })
@@ -0,0 +1,121 @@
+"""
+Ingestion benchmark: JSON payload vs bulk CSV / Arrow tables.
+
+Exports one generated institution (about 10k workloads by default) three ways and times
+parsing and pre-solve validation for each, plus the peak Python allocation of both together:
+  json   GenerationPayload.model_validate_json on the /generate request body
+  csv    BulkIngest over the faculty / workloads / rooms / blocked_slots CSV tables
+  arrow  BulkIngest over the same tables as Arrow IPC files (needs pyarrow)
+
+Run from the backend directory:
+    python -m benchmarks.ingestion [num_faculty]
+"""
+import csv
+import io
+import sys
+import time
+import tracemalloc
+
+from benchmarks.generator import generate_institution
+from schemas.api_models import GenerationPayload
+from services.bulk_ingest import BulkIngest, LIST_SEPARATOR
+from services.validator import validate_input_payload
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+# ~2.7 workloads per generated faculty
+DEFAULT_FACULTY = 3700
+
+
+def export_tables(payload: GenerationPayload):
+    """The payload as the four flat tables /ingest accepts, as lists of row dicts."""
+    tables = {"rooms": [], "faculty": [], "workloads": [], "blocked_slots": []}
+    for room in payload.rooms_config.rooms:
+        tables["rooms"].append({"room_id": room.id, "type": room.type, "capacity": room.capacity, "tags": room.tags})
+        for slot in room.blocked_slots:
+            tables["blocked_slots"].append({"faculty_id": None, "room_id": room.id, "day": slot.day, "time": slot.time})
+    for faculty in payload.faculty:
+        tables["faculty"].append({
+            "faculty_id": faculty.id, "name": faculty.name, "max_load_hrs": faculty.max_load_hrs,
+            "shift_start": min(faculty.shift), "shift_end": max(faculty.shift), "class_teacher_for": faculty.class_teacher_for,
+        })
+        for item in faculty.workload:
+            tables["workloads"].append({
+                "faculty_id": faculty.id, "workload_id": item.id, "subject_code": item.subject, "event_type": item.type,
+                "target_groups": item.target_groups, "weekly_hours": item.hours,
+                "consecutive_hours": item.consecutive_hours, "required_room_tags": item.required_tags,
+            })
+        for slot in faculty.blocked_slots:
+            tables["blocked_slots"].append({"faculty_id": faculty.id, "room_id": None, "day": slot.day, "time": slot.time})
+    return tables
+
+
+def to_csv(rows) -> bytes:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({k: LIST_SEPARATOR.join(v) if isinstance(v, list) else ("" if v is None else v) for k, v in row.items()})
+    return out.getvalue().encode()
+
+
+def to_arrow(rows) -> bytes:
+    sink = io.BytesIO()
+    table = pa.Table.from_pylist(rows)
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def measure(step):
+    """(payload, parse seconds, validate seconds, peak MB). Timed first; tracemalloc slows the code it traces."""
+    start = time.perf_counter()
+    payload = step()
+    parsed = time.perf_counter()
+    is_valid, errors = validate_input_payload(payload)
+    validated = time.perf_counter()
+    assert is_valid, errors[:5]
+
+    tracemalloc.start()
+    validate_input_payload(step())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return payload, parsed - start, validated - parsed, peak / 2 ** 20
+
+
+def ingest(payload: GenerationPayload, files):
+    def step():
+        bulk = BulkIngest(payload.college_settings, payload.solver_options)
+        bulk.read_all({table: (io.BytesIO(data), "") for table, data in files.items()})
+        assert not bulk.error_count, bulk.errors[:5]
+        return bulk.payload()
+    return step
+
+
+def main():
+    num_faculty = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FACULTY
+    payload = generate_institution(num_faculty, seed=0)
+    tables = export_tables(payload)
+    num_workloads = len(tables["workloads"])
+
+    inputs = {"json": (payload.model_dump_json().encode(), None)}
+    inputs["csv"] = (None, {table: to_csv(rows) for table, rows in tables.items()})
+    if pa is not None:
+        inputs["arrow"] = (None, {table: to_arrow(rows) for table, rows in tables.items()})
+
+    print(f"{num_faculty} faculty, {num_workloads} workloads, {len(tables['rooms'])} rooms, {len(tables['blocked_slots'])} blocked slots")
+    print(f"{'path':>6} {'input_kb':>9} {'parse_s':>8} {'validate_s':>11} {'peak_mb':>8}")
+    for path, (body, files) in inputs.items():
+        step = (lambda: GenerationPayload.model_validate_json(body)) if files is None else ingest(payload, files)
+        size = len(body) if files is None else sum(len(data) for data in files.values())
+        result, parse_s, validate_s, peak_mb = measure(step)
+        assert sum(len(f.workload) for f in result.faculty) == num_workloads
+        print(f"{path:>6} {size / 1024:>9.0f} {parse_s:>8.3f} {validate_s:>11.3f} {peak_mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
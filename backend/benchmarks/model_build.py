@@ -0,0 +1,84 @@
+"""
+Model-build benchmark for TimetableEngine.
+
+Builds synthetic institutions of growing size and times variable creation plus
+hard-constraint posting (no solve). With the indexed occupancy buckets the cost
+per variable should stay flat as the institution grows.
+
+Run from the backend directory:
+    python -m benchmarks.model_build
+"""
+import time
+
+from schemas.api_models import GenerationPayload
+from solver.engine import TimetableEngine
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+SLOTS = [8, 9, 10, 11, 12, 13, 14, 15, 16]
+
+
+def build_payload(num_faculty: int, num_rooms: int, num_divisions: int,
+                  labs_per_faculty: int = 1, lab_room_share: float = 1 / 3,
+                  **solver_options) -> GenerationPayload:
+    """Deterministic institution: every division has 3 lab sub-batches, a third of the rooms are labs by default."""
+    num_labs = max(1, int(num_rooms * lab_room_share))
+    rooms = [
+        {"id": f"L{i}", "type": "Laboratory", "capacity": 30, "tags": ["Computer_Lab"]}
+        for i in range(num_labs)
+    ] + [
+        {"id": f"C{i}", "type": "Classroom", "capacity": 80, "tags": ["Theory_Room"]}
+        for i in range(num_rooms - num_labs)
+    ]
+
+    faculty = []
+    for i in range(num_faculty):
+        div = f"DIV{i % num_divisions}"
+        batch = f"{div}-B{i % 3 + 1}"
+        workload = [
+            {"id": f"F{i}-T", "type": "Theory", "subject": f"SUB{i}", "target_groups": [div],
+             "hours": 2, "consecutive_hours": 1, "required_tags": ["Theory_Room"]},
+        ]
+        for lab in range(labs_per_faculty):
+            workload.append(
+                {"id": f"F{i}-P{lab}", "type": "Practical", "subject": f"SUB{i}_LAB", "target_groups": [batch],
+                 "hours": 2, "consecutive_hours": 2, "required_tags": ["Computer_Lab"]})
+        faculty.append({
+            "id": f"F{i}",
+            "name": f"Faculty {i}",
+            "shift": SLOTS,
+            "max_load_hrs": 2 + 2 * labs_per_faculty,
+            "workload": workload,
+        })
+
+    return GenerationPayload(**{
+        "college_settings": {"days_active": DAYS, "time_slots": SLOTS, "lunch_slot": 12},
+        "rooms_config": {"rooms": rooms},
+        "faculty": faculty,
+        "solver_options": solver_options,
+    })
+
+
+def time_build(payload: GenerationPayload):
+    engine = TimetableEngine(data=payload)
+    start = time.perf_counter()
+    engine._create_variables()
+    created = time.perf_counter()
+    engine._apply_hard_constraints()
+    done = time.perf_counter()
+    num_constraints = len(engine.model.Proto().constraints)
+    return len(engine.variables), num_constraints, created - start, done - created
+
+
+def main():
+    sizes = [(10, 6, 4), (30, 15, 10), (60, 30, 20), (120, 60, 40)]
+    print(f"{'faculty':>8} {'rooms':>6} {'vars':>9} {'constraints':>12} {'create_s':>9} {'constr_s':>9} {'us/var':>8}")
+    for num_faculty, num_rooms, num_divisions in sizes:
+        payload = build_payload(num_faculty, num_rooms, num_divisions)
+        num_vars, num_constraints, create_s, constr_s = time_build(payload)
+        per_var = (create_s + constr_s) / max(1, num_vars) * 1e6
+        print(f"{num_faculty:>8} {num_rooms:>6} {num_vars:>9} {num_constraints:>12} "
+              f"{create_s:>9.3f} {constr_s:>9.3f} {per_var:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Scaling benchmark suite for the solver engines.
+
+Runs every engine mode in-process on generated institutions (benchmarks.generator) and records
+model-build time, variable and constraint counts, time-to-first-feasible, total solve time
+(including schedule extraction) and peak RSS. Each case runs in its own freshly spawned process,
+and peak RSS is that process's high-water mark (plus its children's, for decomposition), so it
+belongs to that case alone.
+
+The `default` mode runs the path a /generate request with default solver options takes:
+engine.generate() through the decomposition engine, with the `auto` solver profile. Its build
+time is not reported separately; its first-feasible time counts from the start of generate().
+
+Results go to a JSON report. With `--thresholds` every case is checked against the limits in
+that file (see benchmarks/scaling_thresholds.json) and the run exits non-zero on a regression.
+
+Run from the backend directory:
+    python -m benchmarks.scaling
+    python -m benchmarks.scaling --sizes 10 100 --modes boolean interval --output report.json
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from typing import Dict, Any, List
+
+from ortools.sat.python import cp_model
+
+from benchmarks.generator import generate_institution
+from solver.decomposition import DecomposedTimetableEngine
+from solver.registry import ENGINE_MODES
+
+DEFAULT_SIZES = [10, 100, 500]
+# Mode name of the /generate default path (decomposition, `auto` profile)
+DEFAULT_PATH = "default"
+DEFAULT_SEED = 0
+TIME_LIMIT_S = 60.0
+THRESHOLD_METRICS = ["build_s", "first_feasible_s", "solve_s", "peak_rss_mb", "variables", "constraints"]
+
+
+class FirstSolutionTimer(cp_model.CpSolverSolutionCallback):
+    def __init__(self):
+        super().__init__()
+        self.first_solution_s = None
+
+    def on_solution_callback(self):
+        if self.first_solution_s is None:
+            self.first_solution_s = self.WallTime()
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process and of its largest finished child process. On Linux
+    this is VmHWM, which starts afresh in every new process image; ru_maxrss would also carry
+    the peak of the process that spawned this one.
+    """
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    rss_divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            own = next(int(line.split()[1]) for line in fh if line.startswith("VmHWM:"))
+    except (OSError, StopIteration):
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(max(own, children) / rss_divisor, 1)
+
+
+def run_case(num_faculty: int, mode: str, seed: int, time_limit: float) -> Dict[str, Any]:
+    if mode == DEFAULT_PATH:
+        return run_default_case(num_faculty, seed, time_limit)
+    payload = generate_institution(num_faculty, seed=seed, engine_mode=mode)
+    engine = ENGINE_MODES[mode](data=payload)
+
+    start = time.perf_counter()
+    engine._create_variables()
+    engine._apply_hard_constraints()
+    built = time.perf_counter()
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    timer = FirstSolutionTimer()
+    status = solver.Solve(engine.model, timer)
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        engine._extract_schedule(solver)
+    solved = time.perf_counter()
+
+    proto = engine.model.Proto()
+    return {
+        "faculty": num_faculty,
+        "mode": mode,
+        "seed": seed,
+        "workloads": len(engine.workloads),
+        "rooms": len(engine.room_ids),
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "build_s": round(built - start, 4),
+        "first_feasible_s": round(timer.first_solution_s, 4) if timer.first_solution_s is not None else None,
+        "solve_s": round(solved - built, 4),
+        "status": solver.StatusName(status),
+        "total_classes": len(engine.schedule),
+        "peak_rss_mb": peak_rss_mb(),
+        "phases": engine.diagnostics.to_dict()["phases"],
+    }
+
+
+def run_default_case(num_faculty: int, seed: int, time_limit: float) -> Dict[str, Any]:
+    payload = generate_institution(num_faculty, seed=seed, max_time_in_seconds=time_limit)
+    engine = DecomposedTimetableEngine(payload)
+    first_solution = []
+
+    def on_solution(solution):
+        if not first_solution:
+            first_solution.append(time.perf_counter() - start)
+
+    engine.solution_listener = on_solution
+    start = time.perf_counter()
+    result = engine.generate()
+    solved = time.perf_counter()
+
+    diagnostics = result["diagnostics"]
+    return {
+        "faculty": num_faculty,
+        "mode": DEFAULT_PATH,
+        "seed": seed,
+        "workloads": sum(len(f.workload) for f in payload.faculty),
+        "rooms": len(payload.rooms_config.rooms),
+        "variables": diagnostics["model"]["variables"],
+        "constraints": diagnostics["model"]["constraints"],
+        "build_s": None,
+        "first_feasible_s": round(first_solution[0], 4) if first_solution else None,
+        "solve_s": round(solved - start, 4),
+        "status": diagnostics["solver"].get("status", result["status"].upper()),
+        "total_classes": result.get("total_classes", 0),
+        "peak_rss_mb": peak_rss_mb(),
+        "profile": diagnostics.get("profile") or None,
+        "decomposition": result.get("decomposition"),
+        "phases": diagnostics["phases"],
+    }
+
+
+def run_in_fresh_process(num_faculty: int, mode: str, seed: int, time_limit: float) -> Dict[str, Any]:
+    """
+    run_case() in a newly spawned process that exits afterwards, so no case sees the memory
+    high-water mark, imports or solver state of another.
+    """
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_case, (num_faculty, mode, seed, time_limit))
+
+
+def check_thresholds(results: List[Dict[str, Any]], thresholds: Dict[str, Any]) -> List[str]:
+    """
+    Thresholds are keyed "<faculty>/<mode>" with a maximum per metric and an optional list of
+    accepted statuses. A missing first-feasible time counts as a failure when it has a limit.
+    """
+    failures = []
+    for case in results:
+        limits = thresholds.get(f"{case['faculty']}/{case['mode']}")
+        if not limits:
+            continue
+        accepted = limits.get("status", ["OPTIMAL", "FEASIBLE"])
+        if case["status"] not in accepted:
+            failures.append(f"{case['faculty']}/{case['mode']}: status {case['status']} not in {accepted}")
+        for metric in THRESHOLD_METRICS:
+            if metric not in limits:
+                continue
+            value = case[metric]
+            if value is None or value > limits[metric]:
+                failures.append(f"{case['faculty']}/{case['mode']}: {metric} {value} exceeds {limits[metric]}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="faculty counts")
+    parser.add_argument("--modes", nargs="+", default=[*ENGINE_MODES, DEFAULT_PATH], choices=[*ENGINE_MODES, DEFAULT_PATH])
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--time-limit", type=float, default=TIME_LIMIT_S)
+    parser.add_argument("--output", default="scaling_report.json", help="where to write the JSON report")
+    parser.add_argument("--thresholds", help="JSON file of regression limits to check the results against")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'faculty':>8} {'mode':>9} {'vars':>9} {'constraints':>12} {'build_s':>8} {'first_s':>8} "
+          f"{'solve_s':>8} {'rss_mb':>7}  status")
+    for num_faculty in args.sizes:
+        for mode in args.modes:
+            case = run_in_fresh_process(num_faculty, mode, args.seed, args.time_limit)
+            results.append(case)
+            first = f"{case['first_feasible_s']:>8.3f}" if case["first_feasible_s"] is not None else f"{'-':>8}"
+            build = f"{case['build_s']:>8.3f}" if case["build_s"] is not None else f"{'-':>8}"
+            print(f"{num_faculty:>8} {mode:>9} {case['variables']:>9} {case['constraints']:>12} "
+                  f"{build} {first} {case['solve_s']:>8.3f} {case['peak_rss_mb']:>7.1f}  {case['status']}")
+
+    failures = []
+    if args.thresholds:
+        with open(args.thresholds, encoding="utf-8") as fh:
+            failures = check_thresholds(results, json.load(fh))
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": multiprocessing.cpu_count()},
+        "time_limit_s": args.time_limit,
+        "results": results,
+        "regressions": failures,
+    }
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Report written to {args.output}")
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
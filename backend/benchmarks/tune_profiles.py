@@ -0,0 +1,197 @@
+"""
+Offline solver-profile tuner.
+
+Solves every payload of a corpus with every combination of a SatParameters grid, at each
+requested core count (num_workers), once for the first feasible timetable and once with
+`optimize`. The grid's axes are the LP linearization level, the search branching, presolve and
+symmetry handling (PARAMETER_GRID; --axes limits which of them vary, the others stay at CP-SAT's
+defaults). Payloads are grouped into the profile table's size buckets (model variables) and, per
+bucket, core count and objective mode, the combination that solved the most instances wins, ties
+going to the lower median objective (with `optimize`) and then the lower median solve time.
+
+The table it writes holds every winning combination as a named profile (e.g.
+"tuned-lin0-restarts-presolve1-sym2") and the winner per bucket, core count and objective mode.
+That is what `solver_options.profile = "auto"` reads (solver/tuned_profiles.json, or
+SATIS_TUNED_PROFILES). No table is shipped: run the tuner on the machines that serve requests,
+with their real core counts, and deploy its output.
+
+The corpus is a directory of stored payloads: /generate request bodies, or /repair and
+/scenarios bodies (their `payload` / `base`). Without one, generated institutions of --sizes
+faculty are used. Every run happens in a fresh worker process so runs do not share solver state.
+
+Run from the backend directory:
+    python -m benchmarks.tune_profiles --axes linearization branching --time-limit 10
+    python -m benchmarks.tune_profiles --corpus stored_payloads/ --cores 1 4 8 --time-limit 60
+"""
+import argparse
+import glob
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import time
+from typing import Dict, Any, List
+
+import ortools
+
+from benchmarks.generator import generate_institution
+from schemas.api_models import GenerationPayload
+from solver.profiles import DEFAULT_PROFILE, set_parameters, size_bucket, tuned_profiles
+from solver.registry import ENGINE_MODES
+
+DEFAULT_SIZES = [10, 60, 200]
+TIME_LIMIT_S = 30.0
+# Objective mode -> solver_options.optimize
+OBJECTIVE_MODES = {"feasibility": False, "optimize": True}
+
+# Axis -> option label -> SatParameters fields. The first option of each axis is CP-SAT's
+# default, used for the axes that --axes leaves out.
+PARAMETER_GRID: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "linearization": {
+        "lin1": {},
+        "lin0": {"linearization_level": 0},
+        "lin2": {"linearization_level": 2},
+    },
+    "branching": {
+        "auto": {},
+        "restarts": {"search_branching": "PORTFOLIO_WITH_QUICK_RESTART_SEARCH"},
+        "portfolio": {"search_branching": "PORTFOLIO_SEARCH"},
+    },
+    "presolve": {
+        "presolve3": {},
+        "presolve1": {"max_presolve_iterations": 1},
+        "nopresolve": {"cp_model_presolve": False},
+    },
+    "symmetry": {
+        "sym2": {},
+        "sym0": {"symmetry_level": 0},
+        "sym4": {"symmetry_level": 4},
+    },
+}
+
+
+def grid_candidates(axes: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Profile name -> SatParameters for every combination of the options of `axes`.
+    """
+    options = [list(PARAMETER_GRID[axis].items())[:None if axis in axes else 1] for axis in PARAMETER_GRID]
+    candidates = {}
+    for combination in itertools.product(*options):
+        name = "tuned-" + "-".join(label for label, _ in combination)
+        candidates[name] = {key: value for _, parameters in combination for key, value in parameters.items()}
+    return candidates
+
+
+def load_corpus(directory: str) -> List[Dict[str, Any]]:
+    payloads = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        data = data.get("payload") or data.get("base") or data
+        payloads.append({"name": os.path.basename(path), "payload": GenerationPayload(**data).model_dump()})
+    return payloads
+
+
+def run_case(payload_data: Dict[str, Any], parameters: Dict[str, Any], cores: int, optimize: bool,
+             time_limit: float) -> Dict[str, Any]:
+    # `balanced` sets nothing, so the candidate's parameters are the only ones changed
+    payload_data["solver_options"].update(profile=DEFAULT_PROFILE, optimize=optimize, max_time_in_seconds=time_limit)
+    payload = GenerationPayload(**payload_data)
+    engine = ENGINE_MODES[payload.solver_options.engine_mode](data=payload)
+    set_parameters(engine.solver, parameters)
+    engine.solver.parameters.num_workers = cores
+    result = engine.generate()
+    diagnostics = result["diagnostics"]
+    return {
+        "variables": diagnostics["model"]["variables"],
+        "solved": result["status"] == "success",
+        "solve_s": round(diagnostics["phases"]["solve"]["seconds"], 4),
+        "objective": result["objective"]["value"] if "objective" in result else None,
+    }
+
+
+def best_profiles(runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    One table entry per (size bucket, cores, optimize): the profile with the most solved instances,
+    then the lowest median objective, then the lowest median solve time.
+    """
+    grouped: Dict[tuple, Dict[str, List[Dict[str, Any]]]] = {}
+    for run in runs:
+        key = (size_bucket(run["variables"]), run["cores"], run["optimize"])
+        grouped.setdefault(key, {}).setdefault(run["profile"], []).append(run)
+
+    entries = []
+    for (bucket, cores, optimize), by_profile in grouped.items():
+        scores = {}
+        for profile, profile_runs in by_profile.items():
+            objectives = [run["objective"] for run in profile_runs if run["objective"] is not None]
+            scores[profile] = {
+                "solved": sum(run["solved"] for run in profile_runs),
+                "instances": len(profile_runs),
+                "median_objective": statistics.median(objectives) if optimize and objectives else None,
+                "median_solve_s": round(statistics.median(run["solve_s"] for run in profile_runs), 4),
+            }
+        best = min(scores, key=lambda profile: (-scores[profile]["solved"], scores[profile]["median_objective"] or 0,
+                                                scores[profile]["median_solve_s"]))
+        entries.append({"max_variables": bucket, "cores": cores, "optimize": optimize, "profile": best,
+                        **scores[best], "scores": scores})
+    return sorted(entries, key=lambda e: (e["optimize"], e["max_variables"] is None, e["max_variables"] or 0, e["cores"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="directory of stored payload JSON files")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="generated faculty counts (without --corpus)")
+    parser.add_argument("--cores", type=int, nargs="+", default=sorted({1, multiprocessing.cpu_count()}))
+    parser.add_argument("--axes", nargs="+", default=list(PARAMETER_GRID), choices=list(PARAMETER_GRID),
+                        help="grid axes to vary (the others stay at CP-SAT's defaults)")
+    parser.add_argument("--objectives", nargs="+", default=list(OBJECTIVE_MODES), choices=list(OBJECTIVE_MODES))
+    parser.add_argument("--time-limit", type=float, default=TIME_LIMIT_S)
+    parser.add_argument("--output", default=tuned_profiles.path, help="where to write the profile table")
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        corpus = [{"name": f"generated-{n}", "payload": generate_institution(n, seed=0).model_dump()} for n in args.sizes]
+
+    candidates = grid_candidates(args.axes)
+    runs = []
+    print(f"{'instance':>16} {'cores':>5} {'objective':>11} {'profile':>36} {'vars':>8} {'solve_s':>8} {'value':>8}  solved")
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        for instance in corpus:
+            for cores in args.cores:
+                for mode in args.objectives:
+                    optimize = OBJECTIVE_MODES[mode]
+                    for profile, parameters in candidates.items():
+                        run = pool.apply(run_case, (instance["payload"], parameters, cores, optimize, args.time_limit))
+                        runs.append({"instance": instance["name"], "cores": cores, "optimize": optimize, "profile": profile, **run})
+                        value = f"{run['objective']:>8.0f}" if run["objective"] is not None else f"{'-':>8}"
+                        print(f"{instance['name']:>16} {cores:>5} {mode:>11} {profile:>36} {run['variables']:>8} "
+                              f"{run['solve_s']:>8.3f} {value}  {run['solved']}")
+
+    table = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": multiprocessing.cpu_count(), "ortools": ortools.__version__},
+        "time_limit_s": args.time_limit,
+        "instances": [instance["name"] for instance in corpus],
+        "axes": args.axes,
+    }
+    entries = best_profiles(runs)
+    # Only the winners become named profiles; `decision_strategy` is a hand-written profile feature
+    table["profiles"] = {entry["profile"]: {"parameters": candidates[entry["profile"]], "decision_strategy": False}
+                         for entry in entries}
+    table["entries"] = entries
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(table, fh, indent=2)
+    for entry in table["entries"]:
+        mode = "optimize" if entry["optimize"] else "feasibility"
+        print(f"<= {entry['max_variables'] or 'inf'} variables, {entry['cores']} cores, {mode}: {entry['profile']}")
+    print(f"Profile table written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,25 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from api.routes import router as timetable_router
+from services.job_manager import job_manager
+from services.tenant_scheduler import tenant_scheduler
+from services.metrics import metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop dispatching batch items, then stop in-flight solves and reap the solver worker processes
+    tenant_scheduler.shutdown()
+    job_manager.shutdown()
 
 app = FastAPI(
     title="ShiftSync SATIS API",
     description="Intelligent CP-SAT Backend for Timetable Generation",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS for Next.js frontend
@@ -19,6 +33,27 @@ app.add_middleware(
 
 app.include_router(timetable_router)
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template (/api/v1/jobs/{job_id}), not the raw path, to keep cardinality bounded
+    route = request.scope.get("route")
+    metrics.request_seconds.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        route=route.path if route is not None else "unmatched",
+        status=response.status_code,
+    )
+    return response
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """
+    Prometheus text exposition of request latency, per-phase solver timings and CP-SAT statistics.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def read_root():
     return {
@@ -12,11 +12,11 @@ class SubjectType(str):
 
 class CustomRule(BaseModel):
     id: str
-    condition_field: str = Field(..., description="e.g. 'subject', 'faculty_id', 'target_group'")
-    condition_operator: str = Field(..., description="'EQUALS', 'CONTAINS'")
+    condition_field: str = Field(..., description="'subject', 'faculty_id', 'target_group', 'type' or 'workload_id'")
+    condition_operator: str = Field(..., description="'EQUALS', 'CONTAINS' (substring)")
     condition_value: str = Field(...)
-    action_type: str = Field(..., description="e.g. 'RESTRICT_TIME', 'FORCE_ROOM'")
-    action_value: Any = Field(..., description="e.g. ['08:00', '09:00'] for morning only restrictions")
+    action_type: str = Field(..., description="'RESTRICT_TIME', 'FORCE_ROOM' or 'FORCE_PIN'")
+    action_value: Any = Field(..., description="Allowed start hours e.g. ['08:00', '09:00'] (RESTRICT_TIME), room id(s) (FORCE_ROOM) or 'room|day|hour' (FORCE_PIN)")
 
 # --- College Global Settings ---
 
@@ -24,16 +24,23 @@ class CollegeSettings(BaseModel):
     days_active: List[str] = Field(..., description="e.g. ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']")
     time_slots: List[int] = Field(..., description="Array of integer hours e.g. [8, 9, 10... 17]")
     lunch_slot: int = Field(13, description="The integer hour designated for global lunch break")
-    max_continuous_lectures: int = Field(2, description="Penalty applied if a faculty teaches more than this consecutively")
+    max_continuous_lectures: int = Field(2, description="Penalty applied if a faculty teaches more than this consecutively (with solver_options.optimize)")
     custom_rules: List[CustomRule] = Field(default_factory=list, description="Dynamic array of IF-THEN conditions")
+    group_parents: Dict[str, str] = Field(default_factory=dict, description="Explicit group tree as child -> parent (e.g. {'SY-A-B1': 'SY-A'}); derived from group names when empty")
+    group_delimiters: str = Field("-_/", description="Characters that separate levels in group names when the tree is derived")
 
 # --- Specialized Infrastructure Setup ---
 
+class BlockedSlot(BaseModel):
+    day: str
+    time: int
+
 class Room(BaseModel):
     id: str
     type: str = Field(..., description="'Classroom', 'Laboratory', 'SeminarHall', etc.")
     capacity: int = Field(..., gt=0)
     tags: List[str] = Field(default_factory=list, description="Array of capabilities e.g. ['Projector', 'Linux_Lab', 'Chemistry']")
+    blocked_slots: List[BlockedSlot] = Field(default_factory=list, description="Hours the room hosts nothing (maintenance, or reserved for another department)")
 
 class RoomsConfig(BaseModel):
     rooms: List[Room] = Field(..., description="Master list of all available infrastructure with specific tags")
@@ -49,10 +56,6 @@ class WorkloadItem(BaseModel):
     consecutive_hours: int = Field(1, description="How many hours MUST be mapped side-by-side without interruptions")
     required_tags: List[str] = Field(default_factory=list, description="Array of tags the assigned room MUST possess")
 
-class BlockedSlot(BaseModel):
-    day: str
-    time: int
-
 class FacultyConfig(BaseModel):
     id: str
     name: str
@@ -66,9 +69,98 @@ class FacultyConfig(BaseModel):
     def total_target_load(self) -> int:
         return sum(item.hours for item in self.workload)
 
+# --- Solver Selection ---
+
+class ObjectiveWeights(BaseModel):
+    continuous_overrun: int = Field(3, ge=0, description="Per hour a faculty member teaches beyond `max_continuous_lectures` in a row")
+    idle_gap: int = Field(2, ge=0, description="Per free hour a group waits between two of its sessions on a day")
+    day_spread: int = Field(1, ge=0, description="Per day a faculty member has to come in to teach")
+
+class SolverOptions(BaseModel):
+    engine_mode: str = Field("boolean", description="'boolean' (time-indexed start literals), 'interval' (NoOverlap formulation) or 'two_phase' (time placement, then room matching)")
+    max_time_in_seconds: float = Field(10.0, gt=0, description="CP-SAT search budget for this request")
+    pool_equivalent_rooms: bool = Field(True, description="Model rooms with identical tags as one capacity pool and assign concrete rooms after solving")
+    decompose: bool = Field(True, description="Solve independent departments (no shared faculty, groups or pinned rooms) as separate models in parallel and merge them")
+    optimize: bool = Field(False, description="Minimise the weighted soft objectives instead of returning the first feasible timetable ('boolean' and 'two_phase' modes)")
+    objective_weights: ObjectiveWeights = Field(default_factory=ObjectiveWeights)
+    relative_gap_limit: float = Field(0.0, ge=0, description="With `optimize`, stop as soon as (objective - bound) / objective is at most this; 0 searches until optimal or out of time")
+    profile: str = Field("auto", description="CP-SAT parameter profile: 'fast-first-feasible' (light presolve, quick restarts, most constrained workloads first), 'balanced', 'thorough', or 'auto' (the tuned profile for the model size and available cores)")
+    explain_infeasibility: bool = Field(False, description="On an infeasible result, re-solve with every rule behind an assumption literal and return the minimal set of conflicting rules")
+
 # --- Master Payload ---
 
 class GenerationPayload(BaseModel):
     college_settings: CollegeSettings
     rooms_config: RoomsConfig
     faculty: List[FacultyConfig]
+    solver_options: SolverOptions = Field(default_factory=SolverOptions)
+
+# --- Bulk Ingestion ---
+
+class IngestSettings(BaseModel):
+    college_settings: CollegeSettings
+    solver_options: SolverOptions = Field(default_factory=SolverOptions)
+
+# --- Incremental Repair ---
+
+class ChangeSet(BaseModel):
+    faculty_ids: List[str] = Field(default_factory=list, description="Faculty whose shift, blocked slots or workload changed")
+    target_groups: List[str] = Field(default_factory=list, description="Groups whose sessions should be re-opened")
+    room_ids: List[str] = Field(default_factory=list, description="Rooms that changed or were taken out of service")
+
+class RepairPayload(BaseModel):
+    payload: GenerationPayload = Field(..., description="The institution with the change already applied")
+    previous_schedule: List[Dict[str, Any]] = Field(..., description="The `schedule` of an earlier /generate response")
+    changes: ChangeSet = Field(default_factory=ChangeSet)
+
+# --- What-if Scenarios ---
+
+class ScenarioVariation(BaseModel):
+    name: str
+    close_rooms: List[str] = Field(default_factory=list, description="Rooms out of service for the whole week")
+    add_time_slots: List[int] = Field(default_factory=list, description="Hours added to the college day (e.g. [17])")
+    remove_time_slots: List[int] = Field(default_factory=list)
+    faculty_shifts: Dict[str, List[int]] = Field(default_factory=dict, description="Faculty id -> new shift (e.g. going part-time)")
+    faculty_blocked_slots: Dict[str, List[BlockedSlot]] = Field(default_factory=dict, description="Faculty id -> extra unavailable hours")
+
+class ScenarioSweepPayload(BaseModel):
+    base: GenerationPayload = Field(..., description="The institution as it is; `max_time_in_seconds` is the budget of each scenario")
+    variations: List[ScenarioVariation] = Field(..., min_length=1)
+    include_schedules: bool = Field(False, description="Also return every feasible scenario's schedule, keyed by scenario name")
+
+# --- Multi-institution Batches ---
+
+class BatchItem(BaseModel):
+    institution_id: str = Field(..., description="Tenant the generation is scheduled and charged under")
+    payload: GenerationPayload
+
+class BatchGenerationPayload(BaseModel):
+    items: List[BatchItem] = Field(..., min_length=1)
+
+# --- Timetable Store ---
+
+class StoreTimetablePayload(BaseModel):
+    schedule: List[Dict[str, Any]] = Field(..., description="The `schedule` of a /generate response")
+    days_active: List[str] = Field(..., description="Day order of the stored grids")
+    time_slots: List[int]
+    institution_id: Optional[str] = None
+
+# --- Substitute Search ---
+
+class SubstituteIndexPayload(BaseModel):
+    payload: GenerationPayload = Field(..., description="The institution the timetable was generated for")
+    schedule: List[Dict[str, Any]] = Field(..., description="The `schedule` of a /generate response")
+
+class Absence(BaseModel):
+    faculty_id: str
+    days: List[str] = Field(default_factory=list, description="Days of absence; empty means the whole week")
+
+class SubstituteBatchQuery(BaseModel):
+    absences: List[Absence]
+    limit: Optional[int] = Field(None, gt=0, description="Maximum substitutes returned per session")
+
+class SubstitutionCommit(BaseModel):
+    absent_faculty_id: str
+    substitute_faculty_id: str
+    day: str
+    time_slot: int
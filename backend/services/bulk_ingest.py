@@ -0,0 +1,319 @@
+import csv
+import io
+import time
+from typing import Dict, Any, BinaryIO, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from schemas.api_models import (
+    BlockedSlot, CollegeSettings, FacultyConfig, GenerationPayload, Room, RoomsConfig, SolverOptions, WorkloadItem,
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # Arrow uploads are optional; CSV needs nothing beyond the standard library
+    pa = None
+
+# Errors beyond this many are counted but not listed
+MAX_REPORTED_ERRORS = 200
+LIST_SEPARATOR = ";"
+SUBJECT_TYPES = ("Theory", "Practical", "Tutorial")
+ARROW_FILE_MAGIC = b"ARROW1"
+# Tables are read in this order so every reference points at rows already loaded
+TABLE_ORDER = ("rooms", "faculty", "workloads", "blocked_slots")
+
+
+def _text(value: Any) -> str:
+    return value.strip() if isinstance(value, str) else str(value).strip()
+
+
+def _int(value: Any) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"'{value}' is not a whole number")
+
+
+def _positive_int(value: Any) -> int:
+    number = _int(value)
+    if number <= 0:
+        raise ValueError(f"must be greater than 0, got {number}")
+    return number
+
+
+def _list(value: Any) -> List[str]:
+    parts = value if isinstance(value, (list, tuple)) else str(value).split(LIST_SEPARATOR)
+    return [part for part in map(str.strip, map(str, parts)) if part]
+
+
+_SUBJECT_TYPES_BY_KEY = {subject_type.lower(): subject_type for subject_type in SUBJECT_TYPES}
+
+
+def _subject_type(value: Any) -> str:
+    text = _text(value)
+    try:
+        return _SUBJECT_TYPES_BY_KEY[text.lower()]
+    except KeyError:
+        raise ValueError(f"'{text}' is not one of {', '.join(SUBJECT_TYPES)}")
+
+
+# table -> column -> (parser, required). Column names match the CSV templates of the upload form.
+TABLES: Dict[str, Dict[str, Tuple[Callable[[Any], Any], bool]]] = {
+    "rooms": {
+        "room_id": (_text, True),
+        "type": (_text, True),
+        "capacity": (_positive_int, True),
+        "tags": (_list, False),
+    },
+    "faculty": {
+        "faculty_id": (_text, True),
+        "name": (_text, False),
+        "max_load_hrs": (_positive_int, True),
+        "shift_start": (_int, True),
+        "shift_end": (_int, True),
+        "class_teacher_for": (_text, False),
+    },
+    "workloads": {
+        "faculty_id": (_text, True),
+        "workload_id": (_text, False),
+        "subject_code": (_text, True),
+        "event_type": (_subject_type, True),
+        "target_groups": (_list, True),
+        "weekly_hours": (_positive_int, True),
+        "consecutive_hours": (_positive_int, False),
+        "required_room_tags": (_list, False),
+    },
+    "blocked_slots": {
+        "faculty_id": (_text, False),
+        "room_id": (_text, False),
+        "day": (_text, True),
+        "time": (_int, True),
+    },
+}
+
+
+class BulkIngest:
+    """
+    Builds a GenerationPayload straight from flat faculty, workload, room and blocked-slot tables
+    (CSV, or Arrow IPC when pyarrow is installed).
+
+    Tables are read row by row as they stream in, through column positions resolved once from
+    the header, and every row becomes its model directly, so no nested JSON document is ever
+    built. Each row is checked on its own (types, ranges, duplicate ids, references to faculty
+    and rooms loaded before it). A bad row is reported as {table, row, column, message} and
+    skipped; `row` counts data rows from 1. List cells (tags, target groups) are separated by
+    ';' in CSV and may be list columns in Arrow.
+    """
+
+    def __init__(self, college_settings: CollegeSettings, solver_options: SolverOptions):
+        self.college_settings = college_settings
+        self.solver_options = solver_options
+        self.days = set(college_settings.days_active)
+        self.slots = set(college_settings.time_slots)
+
+        self.rooms: Dict[str, Room] = {}
+        self.faculty: Dict[str, FacultyConfig] = {}
+        self.workload_ids: set = set()
+        self.rows: Dict[str, int] = {table: 0 for table in TABLE_ORDER}
+        self.formats: Dict[str, str] = {}
+        self.layouts: Dict[str, Any] = {}
+        self.errors: List[Dict[str, Any]] = []
+        self.error_count = 0
+        self.elapsed_s = 0.0
+
+    def _error(self, table: str, row: Optional[int], column: Optional[str], message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"table": table, "row": row, "column": column, "message": message})
+
+    def read_all(self, uploads: Dict[str, Tuple[BinaryIO, str]]):
+        """
+        Reads every uploaded table, `uploads` mapping a table name to (binary stream, filename).
+        """
+        started = time.perf_counter()
+        for table in TABLE_ORDER:
+            if table in uploads:
+                stream, filename = uploads[table]
+                self.read(table, stream, filename)
+        self.elapsed_s = time.perf_counter() - started
+
+    def read(self, table: str, stream: BinaryIO, filename: str = ""):
+        add_row = getattr(self, f"_add_{table}")
+        head = stream.read(len(ARROW_FILE_MAGIC))
+        stream.seek(0)
+        arrow = head == ARROW_FILE_MAGIC or head.startswith(b"\xff\xff\xff\xff") or filename.endswith((".arrow", ".arrows", ".feather"))
+        self.formats[table] = "arrow" if arrow else "csv"
+        rows = self._arrow_rows(table, stream, head == ARROW_FILE_MAGIC) if arrow else self._csv_rows(table, stream)
+        for row_number, row in rows:
+            parsed = self._parse(table, row_number, row)
+            if parsed is not None:
+                self.rows[table] += 1
+                add_row(row_number, parsed)
+
+    def _layout(self, table: str, header: List[str]) -> Optional[List[Tuple[str, Callable[[Any], Any], bool, int]]]:
+        """
+        (column, parser, required, position) for every known column in the header, or None
+        (after reporting) when a required column is missing. Unknown columns are ignored.
+        """
+        missing = [c for c, (_, required) in TABLES[table].items() if required and c not in header]
+        if table == "blocked_slots" and "faculty_id" not in header and "room_id" not in header:
+            missing.append("faculty_id or room_id")
+        for column in missing:
+            self._error(table, None, column, "required column is missing")
+        if missing:
+            return None
+        return [(column, parser, required, header.index(column))
+                for column, (parser, required) in TABLES[table].items() if column in header]
+
+    def _csv_rows(self, table: str, stream: BinaryIO) -> Iterator[Tuple[int, Sequence[Any]]]:
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        try:
+            reader = csv.reader(text)
+            header = [h.strip().lower() for h in next(reader, [])]
+            self.layouts[table] = self._layout(table, header)
+            if self.layouts[table] is None:
+                return
+            width = len(header)
+            for row_number, values in enumerate(reader, start=1):
+                if len(values) < width:
+                    if not any(v.strip() for v in values):
+                        continue
+                    values += [""] * (width - len(values))
+                yield row_number, values
+        except UnicodeDecodeError:
+            self._error(table, None, None, "file is not UTF-8 encoded text")
+        except csv.Error as e:
+            self._error(table, None, None, f"malformed CSV: {e}")
+        finally:
+            # Leave the upload open for its owner
+            text.detach()
+
+    def _arrow_rows(self, table: str, stream: BinaryIO, file_format: bool) -> Iterator[Tuple[int, Sequence[Any]]]:
+        if pa is None:
+            self._error(table, None, None, "Arrow uploads need pyarrow installed on the server; send CSV instead")
+            return
+        try:
+            if file_format:
+                reader = pa.ipc.open_file(stream)
+                batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+                schema = reader.schema
+            else:
+                reader = pa.ipc.open_stream(stream)
+                batches = iter(reader)
+                schema = reader.schema
+        except pa.ArrowInvalid as e:
+            self._error(table, None, None, f"not a readable Arrow IPC file: {e}")
+            return
+
+        self.layouts[table] = self._layout(table, [name.strip().lower() for name in schema.names])
+        if self.layouts[table] is None:
+            return
+        row_number = 0
+        for batch in batches:
+            # One conversion per column and batch instead of per cell
+            columns = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+            for values in zip(*columns):
+                row_number += 1
+                yield row_number, values
+
+    def _parse(self, table: str, row_number: int, row: Sequence[Any]) -> Optional[Dict[str, Any]]:
+        parsed = {}
+        ok = True
+        for column, parser, required, position in self.layouts[table]:
+            value = row[position]
+            if value is None or (isinstance(value, str) and not value.strip()):
+                if required:
+                    self._error(table, row_number, column, "is empty")
+                    ok = False
+                continue
+            try:
+                parsed[column] = parser(value)
+            except ValueError as e:
+                self._error(table, row_number, column, str(e))
+                ok = False
+        return parsed if ok else None
+
+    def _add_rooms(self, row_number: int, row: Dict[str, Any]):
+        room_id = row["room_id"]
+        if room_id in self.rooms:
+            self._error("rooms", row_number, "room_id", f"duplicate room '{room_id}'")
+            return
+        self.rooms[room_id] = Room(id=room_id, type=row["type"], capacity=row["capacity"], tags=row.get("tags", []))
+
+    def _add_faculty(self, row_number: int, row: Dict[str, Any]):
+        faculty_id = row["faculty_id"]
+        if faculty_id in self.faculty:
+            self._error("faculty", row_number, "faculty_id", f"duplicate faculty '{faculty_id}'")
+            return
+        if row["shift_end"] < row["shift_start"]:
+            self._error("faculty", row_number, "shift_end", f"ends ({row['shift_end']}) before it starts ({row['shift_start']})")
+            return
+        self.faculty[faculty_id] = FacultyConfig(
+            id=faculty_id, name=row.get("name", faculty_id), shift=list(range(row["shift_start"], row["shift_end"] + 1)),
+            max_load_hrs=row["max_load_hrs"], class_teacher_for=row.get("class_teacher_for"))
+
+    def _add_workloads(self, row_number: int, row: Dict[str, Any]):
+        faculty = self.faculty.get(row["faculty_id"])
+        if faculty is None:
+            self._error("workloads", row_number, "faculty_id", f"unknown faculty '{row['faculty_id']}'")
+            return
+        if not row["target_groups"]:
+            self._error("workloads", row_number, "target_groups", "names no group")
+            return
+        workload_id = row.get("workload_id")
+        if workload_id is None:
+            # Stable default: faculty, subject and type, numbered when a faculty repeats them
+            base = f"{faculty.id}-{row['subject_code']}-{row['event_type']}"
+            workload_id, n = base, 1
+            while workload_id in self.workload_ids:
+                n += 1
+                workload_id = f"{base}-{n}"
+        elif workload_id in self.workload_ids:
+            self._error("workloads", row_number, "workload_id", f"duplicate workload '{workload_id}'")
+            return
+        self.workload_ids.add(workload_id)
+        faculty.workload.append(WorkloadItem(
+            id=workload_id, type=row["event_type"], subject=row["subject_code"], target_groups=row["target_groups"],
+            hours=row["weekly_hours"], consecutive_hours=row.get("consecutive_hours", 1),
+            required_tags=row.get("required_room_tags", [])))
+
+    def _add_blocked_slots(self, row_number: int, row: Dict[str, Any]):
+        if ("faculty_id" in row) == ("room_id" in row):
+            self._error("blocked_slots", row_number, "faculty_id", "name exactly one of faculty_id and room_id")
+            return
+        if row["day"] not in self.days:
+            self._error("blocked_slots", row_number, "day", f"'{row['day']}' is not an active day")
+            return
+        if row["time"] not in self.slots:
+            self._error("blocked_slots", row_number, "time", f"{row['time']} is not a time slot")
+            return
+        if "faculty_id" in row:
+            owner = self.faculty.get(row["faculty_id"])
+            column = "faculty_id"
+        else:
+            owner = self.rooms.get(row["room_id"])
+            column = "room_id"
+        if owner is None:
+            self._error("blocked_slots", row_number, column, f"unknown {column[:-3]} '{row[column]}'")
+            return
+        owner.blocked_slots.append(BlockedSlot(day=row["day"], time=row["time"]))
+
+    def payload(self) -> GenerationPayload:
+        # Rows are models already; pydantic takes model instances without validating them again
+        return GenerationPayload(
+            college_settings=self.college_settings,
+            rooms_config=RoomsConfig(rooms=list(self.rooms.values())),
+            faculty=list(self.faculty.values()),
+            solver_options=self.solver_options,
+        )
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "rows": dict(self.rows),
+            "workloads": len(self.workload_ids),
+            "formats": dict(self.formats),
+            "parse_s": round(self.elapsed_s, 4),
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
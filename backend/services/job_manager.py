@@ -0,0 +1,267 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from schemas.api_models import GenerationPayload, ChangeSet, ScenarioVariation
+from solver.registry import ENGINE_MODES
+from solver.decomposition import DecomposedTimetableEngine
+from solver.infeasibility import InfeasibilityExplainer
+from solver.repair_engine import RepairTimetableEngine
+from solver.scenarios import ScenarioSweepEngine
+from services.metrics import metrics
+
+
+class JobQueueFullError(Exception):
+    """Raised when the running + queued jobs already fill the pool and its waiting queue."""
+
+
+class UnknownJobError(KeyError):
+    """Raised for job IDs that were never submitted or have been evicted from history."""
+
+
+PROGRESS_INTERVAL_S = 0.5
+
+
+def _run_generation(payload: GenerationPayload, stop_event, events=None, solution_hint=None, repair=None,
+                    scenarios=None, num_workers=None) -> Dict[str, Any]:
+    """
+    Worker-process entry point. A watcher thread turns a stop/cancel request into
+    `engine.stop_search()`, so it interrupts CP-SAT instead of waiting for the time limit.
+    With an `events` queue, every intermediate solution and a periodic progress snapshot are
+    pushed to it, followed by a final "done" event. `solution_hint` warm-starts the search;
+    `repair` ({"sessions", "changes"}) re-solves a previous timetable incrementally instead;
+    `scenarios` ({"variations", "include_schedules"}) runs a what-if sweep over the payload.
+    `num_workers` caps the CP-SAT search threads (default: every core). The generation and any
+    infeasibility explanation share the job's `max_time_in_seconds`. The payload arrives pickled:
+    pydantic restores the already validated models without validating them a second time.
+    """
+    deadline = time.monotonic() + payload.solver_options.max_time_in_seconds
+    if scenarios is not None:
+        engine = ScenarioSweepEngine(payload, [ScenarioVariation(**v) for v in scenarios["variations"]],
+                                     scenarios["include_schedules"])
+    elif repair is not None:
+        engine = RepairTimetableEngine(payload, repair["sessions"], ChangeSet(**repair["changes"]))
+    elif payload.solver_options.decompose:
+        engine = DecomposedTimetableEngine(payload)
+    else:
+        engine = ENGINE_MODES[payload.solver_options.engine_mode](data=payload)
+    engine.solution_hint = solution_hint
+    if num_workers and isinstance(engine, DecomposedTimetableEngine):
+        engine.cores = num_workers
+    elif num_workers:
+        engine.solver.parameters.num_workers = num_workers
+    finished = threading.Event()
+
+    def watch_for_stop():
+        while not finished.is_set():
+            if stop_event.wait(0.1):
+                # Keep signalling: a stop that lands during model build must still reach the solve
+                while not finished.is_set():
+                    engine.stop_search()
+                    finished.wait(0.1)
+
+    def report_progress():
+        while not finished.wait(PROGRESS_INTERVAL_S):
+            events.put({"type": "progress", **engine.search_progress()})
+
+    threading.Thread(target=watch_for_stop, daemon=True).start()
+    if events is not None:
+        engine.solution_listener = lambda solution: events.put({"type": "solution", **solution})
+        threading.Thread(target=report_progress, daemon=True).start()
+    try:
+        result = engine.generate()
+        if repair is None and scenarios is None:
+            result["cache"] = "warm_start" if solution_hint is not None else "miss"
+        if result["status"] == "infeasible" and payload.solver_options.explain_infeasibility and not stop_event.is_set():
+            result["explanation"] = InfeasibilityExplainer(payload).explain(time_limit=deadline - time.monotonic())
+        return result
+    finally:
+        finished.set()
+        if events is not None:
+            events.put({"type": "done", **engine.search_progress()})
+
+
+class GenerationJob:
+    def __init__(self, job_id: str, engine_mode: str, time_budget_s: float, future: Future, stop_event, events=None):
+        self.id = job_id
+        self.engine_mode = engine_mode
+        self.time_budget_s = time_budget_s
+        self.future = future
+        # stop_event ends the search early; cancelled additionally discards the result
+        self.stop_event = stop_event
+        self.cancelled = False
+        self.events = events
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.future.cancelled() or (self.future.done() and self.cancelled):
+            return "cancelled"
+        if self.future.done():
+            return "failed" if self.future.exception() is not None else "completed"
+        if self.cancelled:
+            return "cancelling"
+        if self.stop_event.is_set():
+            return "stopping"
+        return "running" if self.future.running() else "queued"
+
+    def to_status(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "engine_mode": self.engine_mode,
+            "time_budget_s": self.time_budget_s,
+            "streaming": self.events is not None,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+            "elapsed_s": round(end - self.submitted_at, 3),
+        }
+
+
+class JobManager:
+    """
+    Runs generation jobs in a bounded pool of worker processes so CP-SAT never blocks the
+    API event loop. At most `max_workers` jobs solve at once and at most `max_queue_depth`
+    more wait for a worker; further submissions are rejected with JobQueueFullError.
+    """
+
+    def __init__(self, max_workers: int, max_queue_depth: int, max_time_budget_s: float, max_retained_jobs: int = 500):
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.max_time_budget_s = max_time_budget_s
+        self.max_retained_jobs = max_retained_jobs
+
+        self._jobs: "OrderedDict[str, GenerationJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Worker processes and the stop-event/queue manager start on first use, not at import
+        self._context = multiprocessing.get_context("spawn")
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._manager = self._context.Manager()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context)
+
+    def submit(self, payload: GenerationPayload, stream_events: bool = False,
+               solution_hint: Optional[List[Dict[str, Any]]] = None,
+               repair: Optional[Dict[str, Any]] = None,
+               scenarios: Optional[Dict[str, Any]] = None,
+               num_workers: Optional[int] = None) -> GenerationJob:
+        """
+        Queues a generation. The job's CP-SAT budget is the request's `max_time_in_seconds`,
+        capped at the manager's `max_time_budget_s`. With `stream_events` the worker publishes
+        solutions and progress to `job.events`. With `repair` the job is an incremental re-solve,
+        with `scenarios` a what-if sweep (the budget then applies to each scenario). `num_workers`
+        limits the job's CP-SAT search threads.
+        """
+        time_budget_s = min(payload.solver_options.max_time_in_seconds, self.max_time_budget_s)
+        solver_options = payload.solver_options.model_copy(update={"max_time_in_seconds": time_budget_s})
+        budgeted = payload.model_copy(update={"solver_options": solver_options})
+
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if not job.future.done())
+            if active >= self.max_workers + self.max_queue_depth:
+                raise JobQueueFullError(
+                    f"{active} generation jobs are already running or queued (limit {self.max_workers + self.max_queue_depth})."
+                )
+
+            self._ensure_started()
+            stop_event = self._manager.Event()
+            events = self._manager.Queue() if stream_events else None
+            future = self._executor.submit(_run_generation, budgeted, stop_event, events, solution_hint, repair, scenarios, num_workers)
+            engine_mode = "repair" if repair is not None else "scenarios" if scenarios is not None else payload.solver_options.engine_mode
+            job = GenerationJob(uuid.uuid4().hex, engine_mode, time_budget_s, future, stop_event, events)
+            self._jobs[job.id] = job
+            self._evict_finished()
+
+        future.add_done_callback(lambda _: setattr(job, "finished_at", time.time()))
+        future.add_done_callback(lambda _: self._observe(job))
+        return job
+
+    @staticmethod
+    def _observe(job: GenerationJob):
+        if job.future.cancelled():
+            return
+        if job.future.exception() is not None:
+            metrics.generations.inc(engine_mode=job.engine_mode, status="error")
+        else:
+            metrics.observe_generation(job.engine_mode, job.future.result())
+
+    def add_completed(self, payload: GenerationPayload, result: Dict[str, Any], stream_events: bool = False) -> GenerationJob:
+        """
+        Registers a job that needs no solve (e.g. a cache hit) so it is served through the same job API.
+        """
+        future: Future = Future()
+        future.set_result(result)
+        events = None
+        if stream_events:
+            events = queue.Queue()
+            events.put({"type": "solution", "solution_index": 1, "elapsed_s": 0.0, **result})
+            events.put({"type": "done", "phase": "cached", "elapsed_s": 0.0, "solutions": 1, "best_bound": None})
+
+        job = GenerationJob(uuid.uuid4().hex, payload.solver_options.engine_mode, 0.0, future, threading.Event(), events)
+        job.finished_at = job.submitted_at
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict_finished()
+        return job
+
+    def get(self, job_id: str) -> GenerationJob:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise UnknownJobError(job_id)
+        return job
+
+    def cancel(self, job_id: str) -> GenerationJob:
+        """
+        Drops a queued job outright; a running job gets its CP-SAT search stopped and its result discarded.
+        """
+        job = self.get(job_id)
+        if not job.future.done():
+            job.cancelled = True
+            job.stop_event.set()
+            job.future.cancel()
+        return job
+
+    def stop(self, job_id: str) -> GenerationJob:
+        """
+        Ends a running search early but keeps the best timetable found so far as the job result.
+        """
+        job = self.get(job_id)
+        if not job.future.done():
+            job.stop_event.set()
+        return job
+
+    def _evict_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.future.done()]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_retained_jobs)]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        with self._lock:
+            for job in self._jobs.values():
+                if not job.future.done():
+                    job.cancelled = True
+                    job.stop_event.set()
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._manager.shutdown()
+                self._executor = None
+                self._manager = None
+
+
+job_manager = JobManager(
+    max_workers=int(os.environ.get("SATIS_SOLVER_WORKERS", os.cpu_count() or 2)),
+    max_queue_depth=int(os.environ.get("SATIS_JOB_QUEUE_DEPTH", 32)),
+    max_time_budget_s=float(os.environ.get("SATIS_MAX_JOB_SECONDS", 60)),
+)
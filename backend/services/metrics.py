@@ -0,0 +1,152 @@
+import bisect
+import threading
+from typing import Dict, Any, List, Sequence, Tuple
+
+# Seconds: sub-millisecond constraint families up to minute-long solves
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+MODEL_SIZE_BUCKETS = (1e2, 1e3, 1e4, 5e4, 1e5, 5e5, 1e6)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus exposition format.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts with a trailing +Inf slot, sum, count)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[slot] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total[0]:g}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class SolverMetrics:
+    """
+    Process-wide metrics for the API: request latency plus the phase timings and CP-SAT
+    statistics of every finished generation (taken from its `diagnostics` block).
+    """
+
+    def __init__(self):
+        self.request_seconds = Histogram(
+            "satis_http_request_duration_seconds", "HTTP request latency.", ("method", "route", "status"))
+        self.phase_seconds = Histogram(
+            "satis_generation_phase_seconds", "Time spent per engine phase and constraint family.", ("engine_mode", "phase"))
+        self.generations = Counter(
+            "satis_generations_total", "Finished generations by outcome.", ("engine_mode", "status"))
+        self.conflicts = Counter(
+            "satis_solver_conflicts_total", "CP-SAT conflicts across all generations.", ("engine_mode",))
+        self.branches = Counter(
+            "satis_solver_branches_total", "CP-SAT branches across all generations.", ("engine_mode",))
+        self.model_variables = Histogram(
+            "satis_model_variables", "CP-SAT variables per generated model.", ("engine_mode",), MODEL_SIZE_BUCKETS)
+        self.model_constraints = Histogram(
+            "satis_model_constraints", "CP-SAT constraints per generated model.", ("engine_mode",), MODEL_SIZE_BUCKETS)
+        self.tenant_jobs = Counter(
+            "satis_tenant_jobs_total", "Batch generations finished per tenant by outcome.", ("tenant", "outcome"))
+        self.tenant_solver_seconds = Counter(
+            "satis_tenant_solver_seconds_total", "Wall time of batch generations per tenant.", ("tenant",))
+        self.tenant_queue_wait = Histogram(
+            "satis_tenant_queue_wait_seconds", "Time batch generations waited for a solver worker.", ("tenant",))
+        self.scheduler_jobs = Gauge(
+            "satis_scheduler_jobs", "Batch generations currently waiting or running.", ("state",))
+        self._all = [self.request_seconds, self.phase_seconds, self.generations, self.conflicts,
+                     self.branches, self.model_variables, self.model_constraints, self.tenant_jobs,
+                     self.tenant_solver_seconds, self.tenant_queue_wait, self.scheduler_jobs]
+
+    def observe_generation(self, engine_mode: str, result: Dict[str, Any]):
+        self.generations.inc(engine_mode=engine_mode, status=result.get("status", "unknown"))
+        diagnostics = result.get("diagnostics")
+        if not diagnostics:
+            return
+        for phase, entry in diagnostics["phases"].items():
+            self.phase_seconds.observe(entry["seconds"], engine_mode=engine_mode, phase=phase)
+        solver = diagnostics.get("solver") or {}
+        self.conflicts.inc(solver.get("conflicts", 0), engine_mode=engine_mode)
+        self.branches.inc(solver.get("branches", 0), engine_mode=engine_mode)
+        model = diagnostics.get("model") or {}
+        if model:
+            self.model_variables.observe(model["variables"], engine_mode=engine_mode)
+            self.model_constraints.observe(model["constraints"], engine_mode=engine_mode)
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._all for line in metric.render()) + "\n"
+
+
+metrics = SolverMetrics()
@@ -0,0 +1,80 @@
+from typing import Dict, Any, List
+
+import orjson
+from fastapi import Response
+
+RESPONSE_FORMATS = ("default", "compact")
+
+
+class _Interner:
+    def __init__(self):
+        self.values: List[Any] = []
+        self._positions: Dict[Any, int] = {}
+
+    def __call__(self, value) -> int:
+        position = self._positions.get(value)
+        if position is None:
+            position = self._positions[value] = len(self.values)
+            self.values.append(value)
+        return position
+
+
+def compact_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Columnar form of a generation result. Every string appears once in a lookup table and the
+    schedule becomes parallel integer arrays with one entry per scheduled hour:
+
+        tables.workloads[i] = {"id", "faculty", "subject", "type", "targets"}  (faculty/targets index tables)
+        schedule.workload[k], schedule.room[k], schedule.day[k] index their tables; schedule.time_slot[k] is the hour
+
+    All other result fields are passed through unchanged.
+    """
+    faculty = _Interner()
+    faculty_names: List[str] = []
+    groups = _Interner()
+    rooms = _Interner()
+    days = _Interner()
+    workloads = _Interner()
+    workload_rows: List[Dict[str, Any]] = []
+
+    columns: Dict[str, List[int]] = {"workload": [], "room": [], "day": [], "time_slot": []}
+    for row in result.get("schedule", []):
+        key = (row["faculty_id"], row["workload_id"])
+        w_pos = workloads(key)
+        if w_pos == len(workload_rows):
+            f_pos = faculty(row["faculty_id"])
+            if f_pos == len(faculty_names):
+                faculty_names.append(row["faculty_name"])
+            workload_rows.append({
+                "id": row["workload_id"],
+                "faculty": f_pos,
+                "subject": row["subject"],
+                "type": row["type"],
+                "targets": [groups(g) for g in row["targets"]],
+            })
+        columns["workload"].append(w_pos)
+        columns["room"].append(rooms(row["room"]))
+        columns["day"].append(days(row["day"]))
+        columns["time_slot"].append(row["time_slot"])
+
+    compact = {k: v for k, v in result.items() if k != "schedule"}
+    compact["format"] = "compact"
+    compact["tables"] = {
+        "faculty_ids": faculty.values,
+        "faculty_names": faculty_names,
+        "groups": groups.values,
+        "rooms": rooms.values,
+        "days": days.values,
+        "workloads": workload_rows,
+    }
+    compact["schedule"] = columns
+    return compact
+
+
+def render_result(result: Dict[str, Any], response_format: str = "default"):
+    """
+    Returns the result as-is for the default format, or a compact columnar body encoded with orjson.
+    """
+    if response_format == "compact":
+        return Response(content=orjson.dumps(compact_result(result)), media_type="application/json")
+    return result
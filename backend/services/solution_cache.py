@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Any, FrozenSet, List, Optional, Tuple
+
+from schemas.api_models import GenerationPayload
+
+# A cached timetable is only offered as a warm start when this share of workloads matches
+MIN_HINT_SIMILARITY = 0.5
+
+
+def canonical_payload(payload: GenerationPayload) -> Dict[str, Any]:
+    """
+    Normalizes everything whose order carries no meaning (faculty, workloads, rooms, tags,
+    slots, days, groups, rules). `solver_options` are left out: they change how a timetable is
+    searched for, not which timetables are valid.
+    """
+    data = payload.model_dump(exclude={"solver_options"})
+    settings = data["college_settings"]
+    settings["days_active"] = sorted(settings["days_active"])
+    settings["time_slots"] = sorted(settings["time_slots"])
+    settings["custom_rules"] = sorted(settings["custom_rules"], key=lambda r: r["id"])
+
+    for room in data["rooms_config"]["rooms"]:
+        room["tags"] = sorted(room["tags"])
+        room["blocked_slots"] = sorted(room["blocked_slots"], key=lambda b: (b["day"], b["time"]))
+    data["rooms_config"]["rooms"].sort(key=lambda r: r["id"])
+
+    for f in data["faculty"]:
+        f["shift"] = sorted(f["shift"])
+        f["blocked_slots"] = sorted(f["blocked_slots"], key=lambda b: (b["day"], b["time"]))
+        for w in f["workload"]:
+            w["target_groups"] = sorted(w["target_groups"])
+            w["required_tags"] = sorted(w["required_tags"])
+        f["workload"].sort(key=lambda w: w["id"])
+    data["faculty"].sort(key=lambda f: f["id"])
+    return data
+
+
+def payload_key(payload: GenerationPayload) -> str:
+    encoded = json.dumps(canonical_payload(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def payload_signature(payload: GenerationPayload) -> FrozenSet[str]:
+    """
+    One token per workload and its shape; near-identical payloads share most tokens.
+    """
+    return frozenset(
+        f"{f.id}|{w.id}|{w.subject}|{w.hours}|{w.consecutive_hours}|{','.join(sorted(w.target_groups))}"
+        for f in payload.faculty for w in f.workload
+    )
+
+
+def sessions_from_schedule(payload: GenerationPayload, schedule: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Folds the per-hour schedule rows back into sessions (one row per consecutive block with its start hour).
+    """
+    block_length = {(f.id, w.id): max(1, w.consecutive_hours) for f in payload.faculty for w in f.workload}
+    hours: Dict[Tuple[str, str, str, str], List[int]] = defaultdict(list)
+    for row in schedule:
+        hours[(row["faculty_id"], row["workload_id"], row["room"], row["day"])].append(row["time_slot"])
+
+    sessions = []
+    for (faculty_id, workload_id, room, day), slots in hours.items():
+        span = block_length.get((faculty_id, workload_id), 1)
+        slots.sort()
+        for i in range(0, len(slots), span):
+            sessions.append({"faculty_id": faculty_id, "workload_id": workload_id, "room": room, "day": day, "start": slots[i]})
+    return sessions
+
+
+class SolutionCache:
+    """
+    Two-tier cache of successful generations keyed by the canonical payload hash.
+
+    The memory tier is an LRU of `memory_entries` results. The disk tier keeps one JSON file
+    per key (plus a small signature sidecar) and evicts least-recently-used files once their
+    total size exceeds `disk_max_bytes`. Files are written to a temporary name and renamed into
+    place, so a reader never sees a partial file. Misses can still borrow the closest cached
+    timetable as a warm-start hint.
+    """
+
+    def __init__(self, disk_dir: str, memory_entries: int = 64, disk_max_bytes: int = 256 * 1024 * 1024):
+        self.disk_dir = disk_dir
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # key -> payload signature, for every entry on disk (the memory tier is always a subset)
+        self._signatures: Dict[str, FrozenSet[str]] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(disk_dir, exist_ok=True)
+        for name in os.listdir(disk_dir):
+            if name.endswith(".tmp"):
+                # Left behind by a writer that died before renaming it into place
+                os.remove(os.path.join(disk_dir, name))
+            elif name.endswith(".sig"):
+                with open(os.path.join(disk_dir, name), encoding="utf-8") as fh:
+                    self._signatures[name[:-4]] = frozenset(json.load(fh))
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}{suffix}")
+
+    def get(self, payload: GenerationPayload) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached result for an identical payload, or None.
+        """
+        key = payload_key(payload)
+        entry = self._load(key)
+        return entry["result"] if entry else None
+
+    def closest_sessions(self, payload: GenerationPayload) -> Optional[List[Dict[str, Any]]]:
+        """
+        Sessions of the most similar cached timetable (Jaccard over workload signatures),
+        or None if nothing reaches MIN_HINT_SIMILARITY.
+        """
+        signature = payload_signature(payload)
+        if not signature:
+            return None
+        with self._lock:
+            candidates = list(self._signatures.items())
+
+        best_key, best_score = None, MIN_HINT_SIMILARITY
+        for key, cached in candidates:
+            score = len(signature & cached) / len(signature | cached)
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        entry = self._load(best_key)
+        return entry["sessions"] if entry else None
+
+    def put(self, payload: GenerationPayload, result: Dict[str, Any]):
+        if result.get("status") != "success":
+            return
+        key = payload_key(payload)
+        signature = payload_signature(payload)
+        entry = {"result": result, "sessions": sessions_from_schedule(payload, result["schedule"])}
+
+        # Serialised outside the lock; only the renames into place are serialised
+        result_tmp = self._write_tmp(key, lambda fh: json.dump(entry, fh, separators=(",", ":")))
+        signature_tmp = self._write_tmp(key, lambda fh: json.dump(sorted(signature), fh))
+
+        with self._lock:
+            os.replace(result_tmp, self._path(key, ".json"))
+            os.replace(signature_tmp, self._path(key, ".sig"))
+            self._signatures[key] = signature
+            self._remember(key, entry)
+            self._evict_disk()
+
+    def _write_tmp(self, key: str, write: Callable[[Any], None]) -> str:
+        fd, path = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp", dir=self.disk_dir)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                write(fh)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+            if key not in self._signatures:
+                return None
+        try:
+            with open(self._path(key, ".json"), encoding="utf-8") as fh:
+                entry = json.load(fh)
+            # Refresh the mtime so disk eviction stays least-recently-used
+            os.utime(self._path(key, ".json"))
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        files = []
+        for key in self._signatures:
+            try:
+                stat = os.stat(self._path(key, ".json"))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, key))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, key in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            for suffix in (".json", ".sig"):
+                try:
+                    os.remove(self._path(key, suffix))
+                except OSError:
+                    pass
+            self._signatures.pop(key, None)
+            self._memory.pop(key, None)
+            total -= size
+
+
+solution_cache = SolutionCache(
+    disk_dir=os.environ.get("SATIS_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".solution_cache")),
+    memory_entries=int(os.environ.get("SATIS_CACHE_MEMORY_ENTRIES", 64)),
+    disk_max_bytes=int(os.environ.get("SATIS_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+)
@@ -0,0 +1,235 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional, Tuple
+
+from schemas.api_models import GenerationPayload
+
+
+class UnknownIndexError(KeyError):
+    """Raised for index IDs that were never built or have been evicted."""
+
+
+class SubstitutionError(ValueError):
+    """Raised when a query or commit names a slot, faculty or session the index does not have."""
+
+
+def _bits(mask: int) -> Iterable[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class SubstituteIndex:
+    """
+    Occupancy bitmaps over (day, slot) built once from a generated timetable.
+
+    Every (day, slot) cell is one bit. Per faculty there is an availability mask (shift minus
+    lunch and blocked slots) and a busy mask; per room a busy mask. The transposed `free_at`
+    table holds, for every cell, a bitset over faculty indexes of who is available and idle,
+    so a query reads one integer and only touches the faculty that are actually free.
+    """
+
+    def __init__(self, payload: GenerationPayload, schedule: List[Dict[str, Any]]):
+        settings = payload.college_settings
+        self.days = list(settings.days_active)
+        self.slots = list(settings.time_slots)
+        self.cell = {(d, s): d_idx * len(self.slots) + s_idx
+                     for d_idx, d in enumerate(self.days) for s_idx, s in enumerate(self.slots)}
+        self.cells = list(self.cell)
+
+        self.faculty = list(payload.faculty)
+        self.faculty_pos = {f.id: i for i, f in enumerate(self.faculty)}
+        self.workloads = {(f.id, w.id): w for f in self.faculty for w in f.workload}
+        self.subjects: List[FrozenSet[str]] = [frozenset(w.subject for w in f.workload) for f in self.faculty]
+        # Tags of every room a faculty already teaches in, i.e. the rooms they can take a class in
+        self.capabilities: List[FrozenSet[str]] = [
+            frozenset(tag for w in f.workload for tag in w.required_tags) for f in self.faculty
+        ]
+        self.room_tags: Dict[str, FrozenSet[str]] = {r.id: frozenset(r.tags) for r in payload.rooms_config.rooms}
+
+        self.available = [0] * len(self.faculty)
+        for i, f in enumerate(self.faculty):
+            blocked = {(b.day, b.time) for b in f.blocked_slots}
+            for d in self.days:
+                for s in f.shift:
+                    if s != settings.lunch_slot and (d, s) in self.cell and (d, s) not in blocked:
+                        self.available[i] |= 1 << self.cell[(d, s)]
+
+        self.busy = [0] * len(self.faculty)
+        self.load = [0] * len(self.faculty)
+        self.room_busy: Dict[str, int] = {room_id: 0 for room_id in self.room_tags}
+        # (faculty_id, day, slot) -> schedule row taught there
+        self.sessions: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+        for row in schedule:
+            i = self.faculty_pos.get(row["faculty_id"])
+            bit = self.cell.get((row["day"], row["time_slot"]))
+            if i is None or bit is None:
+                continue
+            self.busy[i] |= 1 << bit
+            self.load[i] += 1
+            if row["room"] in self.room_busy:
+                self.room_busy[row["room"]] |= 1 << bit
+            self.sessions[(row["faculty_id"], row["day"], row["time_slot"])] = dict(row)
+
+        self.free_at = [0] * len(self.cell)
+        for i in range(len(self.faculty)):
+            for bit in _bits(self.available[i] & ~self.busy[i]):
+                self.free_at[bit] |= 1 << i
+
+        self.substitutions: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _cell(self, day: str, time_slot: int) -> int:
+        bit = self.cell.get((day, time_slot))
+        if bit is None:
+            raise SubstitutionError(f"'{day}' {time_slot} is not an active day/slot.")
+        return bit
+
+    def _session_needs(self, row: Dict[str, Any]) -> Tuple[Optional[str], FrozenSet[str]]:
+        workload = self.workloads.get((row.get("substitute_for", row["faculty_id"]), row["workload_id"]))
+        return row["subject"], frozenset(workload.required_tags) if workload else frozenset()
+
+    def search(self, day: str, time_slot: int, subject: Optional[str] = None,
+               required_tags: Iterable[str] = (), exclude: Iterable[str] = (), limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Faculty who are on shift and idle at (day, time_slot), ranked by subject fit
+        (2 = teaches the subject, 1 = teaches in rooms with the required tags) and then by current load.
+        """
+        bit = self._cell(day, time_slot)
+        required = frozenset(required_tags)
+        excluded = {self.faculty_pos[f_id] for f_id in exclude if f_id in self.faculty_pos}
+
+        ranked = []
+        for i in _bits(self.free_at[bit]):
+            if i in excluded:
+                continue
+            if subject is not None and subject in self.subjects[i]:
+                fit = 2
+            elif required <= self.capabilities[i]:
+                fit = 1
+            else:
+                fit = 0
+            ranked.append((-fit, self.load[i], i))
+        ranked.sort()
+
+        return [{
+            "faculty_id": self.faculty[i].id,
+            "name": self.faculty[i].name,
+            "current_load": load,
+            "max_load_hrs": self.faculty[i].max_load_hrs,
+            "subject_fit": -neg_fit,
+            "status": "Available & On Shift",
+        } for neg_fit, load, i in ranked[:limit]]
+
+    def free_rooms(self, day: str, time_slot: int, required_tags: Iterable[str] = ()) -> List[str]:
+        bit = 1 << self._cell(day, time_slot)
+        required = frozenset(required_tags)
+        return [room_id for room_id, busy in self.room_busy.items() if not busy & bit and required <= self.room_tags[room_id]]
+
+    def search_for_session(self, faculty_id: str, day: str, time_slot: int, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Substitutes for the class `faculty_id` teaches at (day, time_slot).
+        """
+        row = self.sessions.get((faculty_id, day, time_slot))
+        if row is None:
+            raise SubstitutionError(f"Faculty '{faculty_id}' teaches nothing on {day} at {time_slot}.")
+        subject, tags = self._session_needs(row)
+        return {
+            "session": row,
+            "available_substitutes": self.search(day, time_slot, subject, tags, exclude=[faculty_id], limit=limit),
+        }
+
+    def search_absences(self, absences: List[Dict[str, Any]], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Batch query: substitutes for every session of each absent faculty, optionally limited to some days.
+        Faculty absent in the same batch are never proposed as each other's substitute.
+        """
+        absent_ids = [a["faculty_id"] for a in absences]
+        results = []
+        for absence in absences:
+            i = self.faculty_pos.get(absence["faculty_id"])
+            if i is None:
+                raise SubstitutionError(f"Unknown faculty '{absence['faculty_id']}'.")
+            days = set(absence.get("days") or self.days)
+            for bit in _bits(self.busy[i]):
+                day, time_slot = self.cells[bit]
+                if day not in days:
+                    continue
+                row = self.sessions[(absence["faculty_id"], day, time_slot)]
+                subject, tags = self._session_needs(row)
+                results.append({
+                    "session": row,
+                    "available_substitutes": self.search(day, time_slot, subject, tags, exclude=absent_ids, limit=limit),
+                })
+        return results
+
+    def commit(self, absent_faculty_id: str, substitute_faculty_id: str, day: str, time_slot: int) -> Dict[str, Any]:
+        """
+        Hands the absent faculty's class at (day, time_slot) to the substitute and updates the bitmaps in place.
+        """
+        bit = self._cell(day, time_slot)
+        mask = 1 << bit
+        sub = self.faculty_pos.get(substitute_faculty_id)
+        absent = self.faculty_pos.get(absent_faculty_id)
+        if sub is None or absent is None:
+            raise SubstitutionError(f"Unknown faculty '{substitute_faculty_id if sub is None else absent_faculty_id}'.")
+
+        with self._lock:
+            row = self.sessions.pop((absent_faculty_id, day, time_slot), None)
+            if row is None:
+                raise SubstitutionError(f"Faculty '{absent_faculty_id}' teaches nothing on {day} at {time_slot}.")
+            if not self.free_at[bit] & (1 << sub):
+                self.sessions[(absent_faculty_id, day, time_slot)] = row
+                raise SubstitutionError(f"Faculty '{substitute_faculty_id}' is not free on {day} at {time_slot}.")
+
+            # The substitute is now busy; the absent faculty is away, so not free either
+            self.busy[sub] |= mask
+            self.load[sub] += 1
+            self.free_at[bit] &= ~(1 << sub)
+            self.busy[absent] &= ~mask
+            self.available[absent] &= ~mask
+            self.load[absent] -= 1
+
+            row.update({
+                "faculty_id": substitute_faculty_id,
+                "faculty_name": self.faculty[sub].name,
+                "substitute_for": absent_faculty_id,
+            })
+            self.sessions[(substitute_faculty_id, day, time_slot)] = row
+            self.substitutions.append(row)
+        return row
+
+
+class SubstituteIndexStore:
+    """
+    Keeps the most recently built indexes in memory; the oldest is dropped beyond `max_indexes`.
+    """
+
+    def __init__(self, max_indexes: int):
+        self.max_indexes = max_indexes
+        self._indexes: "OrderedDict[str, SubstituteIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def build(self, payload: GenerationPayload, schedule: List[Dict[str, Any]]) -> Tuple[str, SubstituteIndex]:
+        index = SubstituteIndex(payload, schedule)
+        index_id = uuid.uuid4().hex
+        with self._lock:
+            self._indexes[index_id] = index
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index_id, index
+
+    def get(self, index_id: str) -> SubstituteIndex:
+        with self._lock:
+            index = self._indexes.get(index_id)
+            if index is not None:
+                self._indexes.move_to_end(index_id)
+        if index is None:
+            raise UnknownIndexError(index_id)
+        return index
+
+
+substitute_indexes = SubstituteIndexStore(max_indexes=int(os.environ.get("SATIS_SUBSTITUTE_INDEXES", 32)))
@@ -0,0 +1,304 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Any, List, Optional, Tuple
+
+from schemas.api_models import GenerationPayload
+from services.job_manager import job_manager, GenerationJob, JobQueueFullError
+from services.metrics import metrics
+
+
+class TenantQuotaError(ValueError):
+    """Raised when one generation's time budget exceeds its tenant's whole solver-time quota."""
+
+
+class UnknownBatchError(KeyError):
+    """Raised for batch IDs that were never submitted or have been evicted from history."""
+
+
+# Starts one generation with the given CP-SAT thread count (a cache hit may complete it at once)
+StartJob = Callable[[GenerationPayload, int], GenerationJob]
+
+# Seconds before retrying a dispatch the job manager turned away (its pool is shared with /generate)
+RETRY_S = 0.5
+# Completions counted towards the jobs-per-minute figures
+THROUGHPUT_WINDOW_S = 300.0
+
+
+class BatchItem:
+    def __init__(self, batch_id: str, index: int, tenant: str, payload: GenerationPayload, time_budget_s: float):
+        self.batch_id = batch_id
+        self.index = index
+        self.tenant = tenant
+        self.payload = payload
+        # Scheduling size: weekly teaching hours to place, a cheap stand-in for model size
+        self.size = sum(w.hours for f in payload.faculty for w in f.workload)
+        self.time_budget_s = time_budget_s
+        self.job: Optional[GenerationJob] = None
+        self.error: Optional[str] = None
+        self.enqueued_at = time.time()
+        self.dispatched_at: Optional[float] = None
+        # [dispatch time, solver seconds] charged against the tenant's quota window
+        self.charge: Optional[List[float]] = None
+
+    @property
+    def state(self) -> str:
+        if self.error is not None:
+            return "failed"
+        return "waiting" if self.job is None else self.job.state
+
+    def to_status(self) -> Dict[str, Any]:
+        waited_until = self.dispatched_at or time.time()
+        return {
+            "item": self.index,
+            "institution_id": self.tenant,
+            "state": self.state,
+            "job_id": self.job.id if self.job is not None else None,
+            "size": self.size,
+            "time_budget_s": self.time_budget_s,
+            "waited_s": round(waited_until - self.enqueued_at, 3),
+            "error": self.error,
+        }
+
+
+class TenantState:
+    def __init__(self):
+        # (size, sequence, item): smallest generation first, then submission order
+        self.waiting: List[Tuple[int, int, BatchItem]] = []
+        self.running = 0
+        self.charges: Deque[List[float]] = deque()
+        self.outcomes: Dict[str, int] = {}
+        self.finished_at: Deque[float] = deque()
+
+    def used_seconds(self, now: float, window_s: float) -> float:
+        while self.charges and self.charges[0][0] <= now - window_s:
+            self.charges.popleft()
+        return sum(seconds for _, seconds in self.charges)
+
+
+class TenantScheduler:
+    """
+    Shares the solver worker pool fairly between institutions submitting batch generations.
+
+    Each tenant has its own queue, ordered smallest generation first, and at most
+    `max_concurrent_per_tenant` generations running. Starting a generation charges its full
+    time budget to the tenant's quota of `solver_seconds_per_window` over a sliding
+    `window_s`; the unused part is refunded when it finishes. While fewer than `capacity`
+    batch generations run, the next one comes from the tenant that has used the least solver
+    time in the window and still has quota, ties going to the smaller generation. So a tenant
+    with a 500-faculty college does not hold back the small colleges of others, and no tenant
+    with quota left is starved. Every generation runs on `cores // capacity` CP-SAT threads.
+    """
+
+    def __init__(self, capacity: int, cores: int, max_concurrent_per_tenant: int, solver_seconds_per_window: float,
+                 window_s: float, max_retained_batches: int = 200):
+        self.capacity = capacity
+        self.cores_per_job = max(1, cores // capacity)
+        self.max_concurrent_per_tenant = max_concurrent_per_tenant
+        self.solver_seconds_per_window = solver_seconds_per_window
+        self.window_s = window_s
+        self.max_retained_batches = max_retained_batches
+
+        # Condition over an RLock: a cache hit completes (and calls _finished) inside _dispatch
+        self._cond = threading.Condition()
+        self._tenants: Dict[str, TenantState] = {}
+        self._batches: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._running = 0
+        self._sequence = itertools.count()
+        self._finished_at: Deque[float] = deque()
+        self._start: Optional[StartJob] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def submit_batch(self, items: List[Tuple[str, GenerationPayload]], start: StartJob) -> str:
+        """
+        Queues (tenant, payload) generations and returns the batch ID. `start` launches one
+        generation once the scheduler picks it.
+        """
+        budgets = [min(payload.solver_options.max_time_in_seconds, job_manager.max_time_budget_s) for _, payload in items]
+        for (tenant, _), budget in zip(items, budgets):
+            if budget > self.solver_seconds_per_window:
+                raise TenantQuotaError(
+                    f"Validation Failed: A {budget:g}s generation for '{tenant}' exceeds the per-tenant quota of "
+                    f"{self.solver_seconds_per_window:g} solver seconds per {self.window_s:g}s."
+                )
+
+        batch_id = uuid.uuid4().hex
+        batch_items = [BatchItem(batch_id, index, tenant, payload, budget)
+                       for index, ((tenant, payload), budget) in enumerate(zip(items, budgets))]
+        with self._cond:
+            self._start = start
+            for item in batch_items:
+                state = self._tenants.setdefault(item.tenant, TenantState())
+                heapq.heappush(state.waiting, (item.size, next(self._sequence), item))
+            self._batches[batch_id] = {"batch_id": batch_id, "submitted_at": time.time(), "items": batch_items}
+            self._evict_finished()
+            self._update_gauges()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch_loop, name="tenant-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return batch_id
+
+    def _next_item(self, now: float) -> Tuple[Optional[BatchItem], Optional[float]]:
+        """
+        (generation to start, None), or (None, seconds until a quota charge expires) when no tenant may start one.
+        """
+        best = None
+        wake = None
+        for state in self._tenants.values():
+            if not state.waiting or state.running >= self.max_concurrent_per_tenant:
+                continue
+            used = state.used_seconds(now, self.window_s)
+            head = state.waiting[0][2]
+            if used + head.time_budget_s > self.solver_seconds_per_window:
+                if state.charges:
+                    expires = state.charges[0][0] + self.window_s - now
+                    wake = expires if wake is None else min(wake, expires)
+                continue
+            key = (used, head.size, state.waiting[0][1])
+            if best is None or key < best[0]:
+                best = (key, state)
+        if best is None:
+            return None, wake
+        return heapq.heappop(best[1].waiting)[2], None
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while not self._stopped:
+                wait = None
+                while self._running < self.capacity:
+                    item, wait = self._next_item(time.time())
+                    if item is None or not self._dispatch(item):
+                        wait = RETRY_S if item is not None else wait
+                        break
+                self._cond.wait(timeout=wait)
+
+    def _dispatch(self, item: BatchItem) -> bool:
+        """
+        Starts `item`; False puts it back when the job manager is full.
+        """
+        state = self._tenants[item.tenant]
+        now = time.time()
+        item.charge = [now, item.time_budget_s]
+        state.charges.append(item.charge)
+        state.running += 1
+        self._running += 1
+        item.dispatched_at = now
+        try:
+            item.job = self._start(item.payload, self.cores_per_job)
+        except JobQueueFullError:
+            state.charges.remove(item.charge)
+            state.running -= 1
+            self._running -= 1
+            item.charge = item.dispatched_at = None
+            heapq.heappush(state.waiting, (item.size, next(self._sequence), item))
+            return False
+        except Exception as e:
+            item.error = str(e)
+            self._finished(item)
+            return True
+
+        # The job holds its own copy; finished batches stay in history without their payloads
+        item.payload = None
+        metrics.tenant_queue_wait.observe(now - item.enqueued_at, tenant=item.tenant)
+        item.job.future.add_done_callback(lambda _: self._finished(item))
+        self._update_gauges()
+        return True
+
+    def _finished(self, item: BatchItem):
+        with self._cond:
+            state = self._tenants[item.tenant]
+            now = time.time()
+            elapsed = now - item.dispatched_at
+            # Refund the part of the reserved budget the generation did not use
+            item.charge[1] = min(item.charge[1], elapsed)
+            state.running -= 1
+            self._running -= 1
+
+            outcome = item.state
+            if outcome == "completed":
+                outcome = item.job.future.result().get("status", "completed")
+            state.outcomes[outcome] = state.outcomes.get(outcome, 0) + 1
+            state.finished_at.append(now)
+            self._finished_at.append(now)
+            metrics.tenant_jobs.inc(tenant=item.tenant, outcome=outcome)
+            metrics.tenant_solver_seconds.inc(elapsed, tenant=item.tenant)
+            self._update_gauges()
+            self._cond.notify()
+
+    def _update_gauges(self):
+        metrics.scheduler_jobs.set(sum(len(s.waiting) for s in self._tenants.values()), state="waiting")
+        metrics.scheduler_jobs.set(self._running, state="running")
+
+    @staticmethod
+    def _per_minute(finished_at: Deque[float], now: float) -> float:
+        while finished_at and finished_at[0] <= now - THROUGHPUT_WINDOW_S:
+            finished_at.popleft()
+        return round(len(finished_at) * 60.0 / THROUGHPUT_WINDOW_S, 3)
+
+    def batch_status(self, batch_id: str) -> Dict[str, Any]:
+        with self._cond:
+            batch = self._batches.get(batch_id)
+            if batch is None:
+                raise UnknownBatchError(batch_id)
+            items = [item.to_status() for item in batch["items"]]
+        summary: Dict[str, int] = {}
+        for item in items:
+            summary[item["state"]] = summary.get(item["state"], 0) + 1
+        return {"batch_id": batch_id, "submitted_at": batch["submitted_at"], "summary": summary, "items": items}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Pool usage, throughput and per-tenant queue, quota and outcome figures.
+        """
+        with self._cond:
+            now = time.time()
+            tenants = {
+                tenant: {
+                    "waiting": len(state.waiting),
+                    "running": state.running,
+                    "solver_seconds_used": round(state.used_seconds(now, self.window_s), 3),
+                    "outcomes": dict(state.outcomes),
+                    "jobs_per_minute": self._per_minute(state.finished_at, now),
+                }
+                for tenant, state in self._tenants.items()
+            }
+            return {
+                "capacity": self.capacity,
+                "running": self._running,
+                "waiting": sum(t["waiting"] for t in tenants.values()),
+                "utilization": round(self._running / self.capacity, 3),
+                "cores_per_job": self.cores_per_job,
+                "jobs_per_minute": self._per_minute(self._finished_at, now),
+                "quota": {
+                    "max_concurrent_per_tenant": self.max_concurrent_per_tenant,
+                    "solver_seconds_per_window": self.solver_seconds_per_window,
+                    "window_s": self.window_s,
+                },
+                "tenants": tenants,
+            }
+
+    def _evict_finished(self):
+        finished = [batch_id for batch_id, batch in self._batches.items()
+                    if all(item.state not in ("waiting", "queued", "running", "stopping", "cancelling") for item in batch["items"])]
+        for batch_id in finished[:max(0, len(self._batches) - self.max_retained_batches)]:
+            del self._batches[batch_id]
+
+    def shutdown(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+
+tenant_scheduler = TenantScheduler(
+    capacity=job_manager.max_workers,
+    cores=os.cpu_count() or 1,
+    max_concurrent_per_tenant=int(os.environ.get("SATIS_TENANT_MAX_CONCURRENT", max(1, job_manager.max_workers // 2))),
+    solver_seconds_per_window=float(os.environ.get("SATIS_TENANT_SOLVER_SECONDS", 1800)),
+    window_s=float(os.environ.get("SATIS_TENANT_QUOTA_WINDOW_S", 3600)),
+)
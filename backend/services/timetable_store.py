@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+
+class UnknownTimetableError(KeyError):
+    """Raised for timetable IDs that were never stored."""
+
+
+# Plain SQL that runs unchanged on SQLite and Postgres (see timetable_sessions in supabase_schema.sql).
+# One row per scheduled hour; target groups are split out so every lookup is an index range scan.
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS timetables (
+        id TEXT PRIMARY KEY,
+        institution_id TEXT,
+        days TEXT NOT NULL,
+        time_slots TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        row_count INTEGER NOT NULL,
+        created_at REAL NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS timetable_sessions (
+        timetable_id TEXT NOT NULL,
+        row_no INTEGER NOT NULL,
+        faculty_id TEXT NOT NULL,
+        faculty_name TEXT NOT NULL,
+        workload_id TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        type TEXT NOT NULL,
+        targets TEXT NOT NULL,
+        room TEXT NOT NULL,
+        day TEXT NOT NULL,
+        time_slot INTEGER NOT NULL,
+        PRIMARY KEY (timetable_id, row_no)
+    )""",
+    """CREATE TABLE IF NOT EXISTS timetable_session_groups (
+        timetable_id TEXT NOT NULL,
+        target_group TEXT NOT NULL,
+        day TEXT NOT NULL,
+        row_no INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_faculty ON timetable_sessions (timetable_id, faculty_id)",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_room_day ON timetable_sessions (timetable_id, room, day)",
+    "CREATE INDEX IF NOT EXISTS idx_session_groups_day ON timetable_session_groups (timetable_id, target_group, day)",
+)
+
+SESSION_COLUMNS = ("faculty_id", "faculty_name", "workload_id", "subject", "type", "targets", "room", "day", "time_slot")
+
+
+class TimetableStore:
+    """
+    Solved timetables as normalized, indexed rows instead of one JSON matrix per timetable.
+
+    Every schedule hour is a row in `timetable_sessions`, indexed by (timetable, faculty) and
+    (timetable, room, day); `timetable_session_groups` maps (timetable, group, day) to those
+    rows. A timetable is written in one transaction with bulk inserts and never changes
+    afterwards, so a digest of its rows taken at write time is enough to derive the ETag of any
+    view of it without reading the rows again. Connections come from a fixed-size pool; the
+    metadata of the `meta_entries` most recently used timetables is kept in memory.
+    """
+
+    def __init__(self, database: str, pool_size: int = 4, meta_entries: int = 1024):
+        self.database = database
+        self.meta_entries = meta_entries
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._meta: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._meta_lock = threading.Lock()
+        for _ in range(pool_size):
+            # Pooled connections move between threads; each is used by one thread at a time
+            connection = sqlite3.connect(database, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._pool.put(connection)
+        with self._connection() as connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self._pool.get()
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+    def save(self, schedule: List[Dict[str, Any]], days: List[str], time_slots: List[int],
+             institution_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Writes a `schedule` (the rows of a /generate response) and returns the new timetable's metadata.
+        """
+        timetable_id = uuid.uuid4().hex
+        rows = sorted(schedule, key=lambda r: (r["day"], r["time_slot"], r["faculty_id"], r["workload_id"]))
+        session_rows = []
+        group_rows = []
+        digest = hashlib.sha256()
+        for row_no, row in enumerate(rows):
+            values = tuple(json.dumps(row["targets"]) if c == "targets" else row[c] for c in SESSION_COLUMNS)
+            session_rows.append((timetable_id, row_no) + values)
+            group_rows.extend((timetable_id, group, row["day"], row_no) for group in row["targets"])
+            digest.update(repr(values).encode("utf-8"))
+
+        meta = {
+            "timetable_id": timetable_id,
+            "institution_id": institution_id,
+            "days": list(days),
+            "time_slots": sorted(time_slots),
+            "digest": digest.hexdigest(),
+            "rows": len(rows),
+            "created_at": time.time(),
+        }
+        with self._connection() as connection:
+            connection.execute("BEGIN")
+            try:
+                connection.execute(
+                    "INSERT INTO timetables (id, institution_id, days, time_slots, digest, row_count, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (timetable_id, institution_id, json.dumps(meta["days"]), json.dumps(meta["time_slots"]),
+                     meta["digest"], meta["rows"], meta["created_at"]),
+                )
+                connection.executemany(
+                    f"INSERT INTO timetable_sessions (timetable_id, row_no, {', '.join(SESSION_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * (len(SESSION_COLUMNS) + 2))})",
+                    session_rows,
+                )
+                connection.executemany(
+                    "INSERT INTO timetable_session_groups (timetable_id, target_group, day, row_no) VALUES (?, ?, ?, ?)",
+                    group_rows,
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        self._remember(timetable_id, meta)
+        return meta
+
+    def _remember(self, timetable_id: str, meta: Dict[str, Any]):
+        with self._meta_lock:
+            self._meta[timetable_id] = meta
+            self._meta.move_to_end(timetable_id)
+            while len(self._meta) > self.meta_entries:
+                self._meta.popitem(last=False)
+
+    def metadata(self, timetable_id: str) -> Dict[str, Any]:
+        with self._meta_lock:
+            meta = self._meta.get(timetable_id)
+            if meta is not None:
+                self._meta.move_to_end(timetable_id)
+        if meta is not None:
+            return meta
+        with self._connection() as connection:
+            found = connection.execute(
+                "SELECT institution_id, days, time_slots, digest, row_count, created_at FROM timetables WHERE id = ?", (timetable_id,)
+            ).fetchone()
+        if found is None:
+            raise UnknownTimetableError(timetable_id)
+        institution_id, days, time_slots, digest, rows, created_at = found
+        meta = {
+            "timetable_id": timetable_id, "institution_id": institution_id, "days": json.loads(days),
+            "time_slots": json.loads(time_slots), "digest": digest, "rows": rows, "created_at": created_at,
+        }
+        self._remember(timetable_id, meta)
+        return meta
+
+    def etag(self, timetable_id: str, *view: Any) -> str:
+        """
+        Strong ETag of one view (e.g. ("room", "D205", "Tue")) of an immutable timetable.
+        """
+        key = "|".join([self.metadata(timetable_id)["digest"], *map(str, view)])
+        return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+    def _grid(self, timetable_id: str, where: str, params: Tuple[Any, ...], day: Optional[str] = None,
+              join_groups: bool = False) -> Dict[str, Any]:
+        meta = self.metadata(timetable_id)
+        days = meta["days"] if day is None else [day]
+        if day is not None:
+            where += f" AND {'g' if join_groups else 's'}.day = ?"
+            params += (day,)
+        columns = ", ".join(f"s.{c}" for c in SESSION_COLUMNS)
+        source = "timetable_session_groups g JOIN timetable_sessions s ON s.timetable_id = g.timetable_id AND s.row_no = g.row_no" \
+            if join_groups else "timetable_sessions s"
+        with self._connection() as connection:
+            found = connection.execute(f"SELECT {columns} FROM {source} WHERE {where}", params).fetchall()
+
+        # day -> time slot -> sessions, in the timetable's own day and slot order
+        grid: Dict[str, Dict[int, List[Dict[str, Any]]]] = {d: {} for d in days}
+        for values in found:
+            row = dict(zip(SESSION_COLUMNS, values))
+            row["targets"] = json.loads(row["targets"])
+            grid.setdefault(row["day"], {}).setdefault(row["time_slot"], []).append(row)
+        for d, cells in grid.items():
+            grid[d] = {slot: cells[slot] for slot in sorted(cells)}
+        return {"timetable_id": timetable_id, "days": days, "time_slots": meta["time_slots"],
+                "sessions": len(found), "grid": grid}
+
+    def faculty_grid(self, timetable_id: str, faculty_id: str) -> Dict[str, Any]:
+        return self._grid(timetable_id, "s.timetable_id = ? AND s.faculty_id = ?", (timetable_id, faculty_id))
+
+    def room_grid(self, timetable_id: str, room_id: str, day: Optional[str] = None) -> Dict[str, Any]:
+        return self._grid(timetable_id, "s.timetable_id = ? AND s.room = ?", (timetable_id, room_id), day)
+
+    def group_grid(self, timetable_id: str, group: str, day: Optional[str] = None) -> Dict[str, Any]:
+        return self._grid(timetable_id, "g.timetable_id = ? AND g.target_group = ?", (timetable_id, group), day, join_groups=True)
+
+
+timetable_store = TimetableStore(
+    database=os.environ.get("SATIS_TIMETABLE_DB", os.path.join(os.path.dirname(os.path.dirname(__file__)), "timetables.sqlite3")),
+    pool_size=int(os.environ.get("SATIS_TIMETABLE_DB_POOL", 4)),
+    meta_entries=int(os.environ.get("SATIS_TIMETABLE_META_ENTRIES", 1024)),
+)
@@ -1,9 +1,283 @@
-from schemas.api_models import GenerationPayload
-from typing import List, Tuple
+from collections import Counter, defaultdict, deque
+from schemas.api_models import FacultyConfig, GenerationPayload, WorkloadItem
+from solver.custom_rules import CompiledRules
+from solver.group_hierarchy import GroupHierarchy, GroupHierarchyError
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+# (day_idx, hour)
+Cell = Tuple[int, int]
+SOURCE, SINK = "source", "sink"
+
+
+def _max_flow(capacity: Dict[Hashable, Dict[Hashable, float]]) -> Tuple[float, Set[Hashable]]:
+    """
+    Edmonds-Karp from SOURCE to SINK over a small capacity graph. Returns the flow value and
+    the source side of a minimum cut, which names the over-subscribed demands when the flow
+    falls short of the total demand (Hall's condition).
+    """
+    residual: Dict[Hashable, Dict[Hashable, float]] = defaultdict(dict)
+    for u, edges in capacity.items():
+        for v, c in edges.items():
+            residual[u][v] = residual[u].get(v, 0) + c
+            residual[v].setdefault(u, 0)
+
+    flow = 0
+    while True:
+        parent: Dict[Hashable, Optional[Hashable]] = {SOURCE: None}
+        queue = deque([SOURCE])
+        while queue and SINK not in parent:
+            u = queue.popleft()
+            for v, c in residual[u].items():
+                if c > 0 and v not in parent:
+                    parent[v] = u
+                    queue.append(v)
+        if SINK not in parent:
+            return flow, set(parent)
+
+        path = []
+        v = SINK
+        while parent[v] is not None:
+            path.append((parent[v], v))
+            v = parent[v]
+        push = min(residual[u][v] for u, v in path)
+        for u, v in path:
+            residual[u][v] -= push
+            residual[v][u] += push
+        flow += push
+
+
+def _placed(w: WorkloadItem) -> Tuple[int, int]:
+    """
+    (block length, number of blocks) the engine schedules for a workload.
+    """
+    span = max(1, w.consecutive_hours)
+    events = w.hours // w.consecutive_hours if w.consecutive_hours > 0 else w.hours
+    return span, events
+
+
+def _runs(hours: List[int]) -> List[Tuple[int, int]]:
+    """
+    Maximal runs of back-to-back hours as (first_hour, length).
+    """
+    runs = []
+    for h in sorted(hours):
+        if runs and runs[-1][0] + runs[-1][1] == h:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((h, 1))
+    return runs
+
+
+class _FacultyWindows:
+    """
+    A faculty's free week: shift hours inside the college day, minus lunch and blocked slots,
+    split into per-day runs of back-to-back hours.
+    """
+
+    def __init__(self, payload: GenerationPayload, faculty: FacultyConfig):
+        settings = payload.college_settings
+        slots = set(settings.time_slots)
+        blocked = {(b.day, b.time) for b in faculty.blocked_slots}
+        self.runs: List[Tuple[int, int, int]] = []  # (day_idx, first_hour, length)
+        for d_idx, day in enumerate(settings.days_active):
+            free = [h for h in set(faculty.shift) if h in slots and h != settings.lunch_slot and (day, h) not in blocked]
+            self.runs.extend((d_idx, first, length) for first, length in _runs(free))
+        self.free_hours = sum(length for _, _, length in self.runs)
+        self._coverable: Dict[int, frozenset] = {}
+
+    def blocks_that_fit(self, span: int) -> int:
+        return sum(length // span for _, _, length in self.runs)
+
+    def coverable_hours(self, span: int) -> int:
+        return sum(length for _, _, length in self.runs if length >= span)
+
+    def coverable(self, span: int) -> frozenset:
+        """
+        Cells a block of `span` hours can occupy: every cell of a run at least that long.
+        """
+        if span not in self._coverable:
+            self._coverable[span] = frozenset(
+                (d_idx, first + i) for d_idx, first, length in self.runs if length >= span for i in range(length))
+        return self._coverable[span]
+
+
+def check_room_capacity(payload: GenerationPayload) -> List[str]:
+    """
+    Per-tag room capacity as a transportation problem: sessions grouped by (required tags,
+    block length) must be served by rooms whose tags cover them. Rooms with identical tags and
+    blocked slots are pooled. A pool offers each block length only as many blocks as fit between
+    lunch, its blocked hours and the day's edges, and never more room-hours than it has open.
+    """
+    settings = payload.college_settings
+    day_hours = [h for h in settings.time_slots if h != settings.lunch_slot]
+    # (tags, blocked (day, hour) cells) -> room count
+    pools = Counter((frozenset(r.tags), frozenset((b.day, b.time) for b in r.blocked_slots)) for r in payload.rooms_config.rooms)
+    # Open runs per pool over the whole week, as lengths
+    pool_runs = {
+        pool: [length for day in settings.days_active
+               for _, length in _runs([h for h in day_hours if (day, h) not in pool[1]])]
+        for pool in pools
+    }
+
+    demand: Dict[Tuple[frozenset, int], int] = Counter()
+    for faculty in payload.faculty:
+        for w in faculty.workload:
+            span, events = _placed(w)
+            demand[(frozenset(w.required_tags), span)] += span * events
+
+    capacity: Dict[Hashable, Dict[Hashable, float]] = defaultdict(dict)
+    for (tags, span), hours in demand.items():
+        need = ("need", tags, span)
+        compatible = [pool for pool in pools if tags <= pool[0]]
+        if not compatible:
+            continue # Reported by the tag matching check
+        capacity[SOURCE][need] = hours
+        for pool in compatible:
+            capacity[need][("pool", pool)] = pools[pool] * sum(length // span for length in pool_runs[pool]) * span
+    for pool, count in pools.items():
+        capacity[("pool", pool)][SINK] = count * sum(pool_runs[pool])
+
+    total = sum(capacity[SOURCE].values())
+    flow, source_side = _max_flow(capacity)
+    if flow >= total:
+        return []
+
+    # The over-subscribed demands sit on the source side of the minimum cut
+    short = sorted((n for n in source_side if isinstance(n, tuple) and n[0] == "need"), key=lambda n: (sorted(n[1]), n[2]))
+    needed = sum(capacity[SOURCE][n] for n in short)
+    rooms = sum(count for pool, count in pools.items() if any(n[1] <= pool[0] for n in short))
+    described = ", ".join(
+        f"{'+'.join(sorted(tags)) or 'untagged'} ({span}-hour blocks)" if span > 1 else ('+'.join(sorted(tags)) or 'untagged')
+        for _, tags, span in short)
+    return [
+        f"Validation Failed: Sessions needing rooms tagged {described} require {needed} room-hours per week, "
+        f"but the {rooms} compatible rooms can host at most {needed - (total - flow):g} of them once lunch and "
+        f"block lengths are accounted for (short by {total - flow:g} hours)."
+    ]
+
+
+def _check_faculty_blocks(faculty: FacultyConfig, windows: _FacultyWindows) -> List[str]:
+    """
+    Every session must fit inside one run of free hours. For each block length k, the
+    sessions of at least k hours cannot outnumber the k-hour blocks the runs can hold.
+    """
+    errors = []
+    spans = []
+    for w in faculty.workload:
+        span, events = _placed(w)
+        spans.extend([span] * events)
+
+    teaching = sum(spans)
+    if teaching > windows.free_hours:
+        errors.append(
+            f"Validation Failed: {faculty.name} ({faculty.id}) must teach {teaching} hours, but their shift "
+            f"minus lunch and blocked slots leaves only {windows.free_hours} free hours."
+        )
+        return errors
+
+    longest = max((length for _, _, length in windows.runs), default=0)
+    for k in sorted(set(spans)):
+        if k == 1:
+            continue
+        needed = sum(1 for span in spans if span >= k)
+        fit = windows.blocks_that_fit(k)
+        if needed > fit:
+            errors.append(
+                f"Validation Failed: {faculty.name} ({faculty.id}) has {needed} sessions of {k} or more consecutive hours, "
+                f"but their shift minus lunch and blocked slots only holds {fit} such blocks (longest free run: {longest} hours)."
+            )
+    return errors
+
+
+def _check_exclusive_hours(sessions: List[Tuple[int, int, int]], windows: List[_FacultyWindows]) -> Optional[Tuple[int, int, List[int]]]:
+    """
+    Hall's condition for a set of workloads that may never overlap in time (one group's
+    classes, or a parent's theory plus one sub-group's labs). `sessions` holds
+    (faculty_idx, block length, hours); each class of them may only use the cells its faculty
+    can cover with that block length. Returns (hours needed, hours available, faculty_idx list)
+    for the over-subscribed subset, or None when the hours fit.
+    """
+    demand: Dict[Tuple[int, int], int] = Counter()
+    for f_idx, span, hours in sessions:
+        demand[(f_idx, span)] += hours
+    total = sum(demand.values())
+    # Fast path: every subset is satisfied when the smallest window alone holds everything
+    if total <= min(windows[f_idx].coverable_hours(span) for f_idx, span in demand):
+        return None
+    cells = {key: windows[key[0]].coverable(key[1]) for key in demand}
+
+    # Cells usable by exactly the same classes are interchangeable
+    signatures: Dict[frozenset, int] = Counter()
+    for cell in set().union(*cells.values()):
+        signatures[frozenset(key for key, c in cells.items() if cell in c)] += 1
+
+    capacity: Dict[Hashable, Dict[Hashable, float]] = defaultdict(dict)
+    for key, hours in demand.items():
+        capacity[SOURCE][("need", key)] = hours
+    for n, (signature, count) in enumerate(signatures.items()):
+        for key in signature:
+            capacity[("need", key)][("cells", n)] = count
+        capacity[("cells", n)][SINK] = count
+
+    flow, source_side = _max_flow(capacity)
+    if flow >= total:
+        return None
+    short = [n[1] for n in source_side if isinstance(n, tuple) and n[0] == "need"]
+    needed = sum(demand[key] for key in short)
+    return needed, needed - (total - flow), sorted({f_idx for f_idx, _ in short})
+
+
+def _check_group_hours(payload: GenerationPayload, windows: List[_FacultyWindows], hierarchy: Optional[GroupHierarchy]) -> List[str]:
+    """
+    Pigeonhole per group: all classes of a group (merged classes included) must fit into the
+    distinct hours its faculty are free. With a hierarchy, a parent's theory and each
+    sub-group's labs/tutorials are exclusive too and get the same check.
+    """
+    errors = []
+    by_group: Dict[str, List[Tuple[int, int, int, str]]] = defaultdict(list)
+    for f_idx, faculty in enumerate(payload.faculty):
+        for w in faculty.workload:
+            span, events = _placed(w)
+            for g in dict.fromkeys(w.target_groups):
+                by_group[g].append((f_idx, span, span * events, w.type))
+
+    def names(f_indexes: List[int]) -> str:
+        return ", ".join(payload.faculty[f_idx].id for f_idx in f_indexes)
+
+    for g, rows in by_group.items():
+        short = _check_exclusive_hours([(f_idx, span, hours) for f_idx, span, hours, _ in rows], windows)
+        if short:
+            needed, available, f_indexes = short
+            errors.append(
+                f"Validation Failed: Group '{g}' needs {needed} hours per week from {names(f_indexes)}, but after lunch "
+                f"and blocked slots those faculty can only cover {available:g} distinct hours between them."
+            )
+
+    if hierarchy is None:
+        return errors
+    for parent, rows in by_group.items():
+        theory = [(f_idx, span, hours) for f_idx, span, hours, kind in rows if kind == "Theory"]
+        if not theory:
+            continue
+        for child in sorted(hierarchy.descendants.get(parent, ())):
+            sessions = [(f_idx, span, hours) for f_idx, span, hours, kind in by_group.get(child, ()) if kind in ["Practical", "Tutorial"]]
+            if not sessions:
+                continue
+            short = _check_exclusive_hours(theory + sessions, windows)
+            if short:
+                needed, available, f_indexes = short
+                errors.append(
+                    f"Validation Failed: Theory for '{parent}' and labs/tutorials of its sub-group '{child}' cannot overlap and "
+                    f"need {needed} hours per week from {names(f_indexes)}, but those faculty can only cover {available:g} distinct hours."
+                )
+    return errors
+
 
 def validate_input_payload(payload: GenerationPayload) -> Tuple[bool, List[str]]:
     """
     Runs pre-generation math checks before the OR-Tools solver runs.
+    Every check is a necessary condition of the model, so a payload that fails one can never be
+    solved; each message names the entities involved and the shortfall.
     Returns (is_valid, list_of_error_messages).
     """
     errors = []
@@ -70,4 +344,37 @@ def validate_input_payload(payload: GenerationPayload) -> Tuple[bool, List[str]]
              f"but the {total_physical_room_count} available rooms can only support {total_available_room_hours} total hours."
         )
 
+    # 5. Group Hierarchy Check (declared child -> parent maps must form a tree)
+    hierarchy = None
+    try:
+        hierarchy = GroupHierarchy.from_payload(payload)
+    except GroupHierarchyError as e:
+        errors.append(f"Validation Failed: {e}")
+
+    # 6. Per-Tag Room Capacity (max-flow from session demand to compatible room pools)
+    errors.extend(check_room_capacity(payload))
+
+    # 7. Consecutive Blocks vs. Free Runs (per faculty)
+    windows = [_FacultyWindows(payload, faculty) for faculty in payload.faculty]
+    for faculty, faculty_windows in zip(payload.faculty, windows):
+        errors.extend(_check_faculty_blocks(faculty, faculty_windows))
+
+    # 8. Group Weekly Hours (Hall's condition over the faculty windows of each group)
+    errors.extend(_check_group_hours(payload, windows, hierarchy))
+
+    # 9. Custom Rules (unknown fields, operators or actions, unreadable action values, and
+    # FORCE_ROOM rules that leave a workload no room with its tags)
+    rules = CompiledRules(payload)
+    errors.extend(f"Validation Failed: {e}" for e in rules.errors)
+    room_tags = {r.id: set(r.tags) for r in payload.rooms_config.rooms}
+    workloads = [(faculty, w) for faculty in payload.faculty for w in faculty.workload]
+    for w_idx, limits in rules.room_limits.items():
+        faculty, w = workloads[w_idx]
+        allowed = set.intersection(*(set(rooms) for _, rooms in limits))
+        if not any(set(w.required_tags) <= room_tags[room_id] for room_id in allowed):
+            errors.append(
+                f"Validation Failed: FORCE_ROOM rules {', '.join(rule_id for rule_id, _ in limits)} restrict {faculty.name}'s {w.subject} ({w.id}) "
+                f"to rooms {sorted(allowed)}, none of which has the tags {w.required_tags}."
+            )
+
     return len(errors) == 0, errors
@@ -0,0 +1,130 @@
+from collections import defaultdict
+from typing import Dict, Any, FrozenSet, List, Set, Tuple
+
+from schemas.api_models import CustomRule, GenerationPayload
+
+RULE_FIELDS = ("subject", "faculty_id", "target_group", "type", "workload_id")
+RULE_OPERATORS = ("EQUALS", "CONTAINS")
+RULE_ACTIONS = ("RESTRICT_TIME", "FORCE_ROOM", "FORCE_PIN")
+
+
+class CustomRuleError(ValueError):
+    """Raised when a custom rule names an unknown field, operator or action, or its action_value cannot be read."""
+
+
+def _hour(value: Any) -> int:
+    """8, '8' and '08:00' all mean the hour starting at 8."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    try:
+        return int(str(value).split(":")[0])
+    except ValueError:
+        raise CustomRuleError(f"'{value}' is not an hour")
+
+
+class CompiledRules:
+    """
+    `college_settings.custom_rules` compiled once per payload against attribute indexes.
+
+    Every workload is indexed by subject, faculty_id, each target_group, type and workload_id,
+    so a condition resolves to its workload set with one lookup (EQUALS) or one scan over the
+    distinct values of its field (CONTAINS, a substring match) instead of a pass over the model.
+    The actions become per-workload domains the engines apply before creating variables:
+
+        RESTRICT_TIME  allowed start hours, e.g. ['08:00', '09:00']
+        FORCE_ROOM     allowed rooms, a room id or a list of them
+        FORCE_PIN      'room|day|hour': one session of each matched workload covers that hour
+
+    Workload indexes follow the engines' flat table (faculty order, then workload order).
+    Rules that cannot be compiled are skipped and described in `errors`. Rooms the payload does
+    not have are ignored, as they always were: they are dropped from a FORCE_ROOM set, a rule
+    left without rooms and a FORCE_PIN on an unknown room are skipped, and each case is
+    described in `warnings` instead.
+    """
+
+    def __init__(self, data: GenerationPayload):
+        self.rules: Dict[str, CustomRule] = {rule.id: rule for rule in data.college_settings.custom_rules}
+        self.room_ids = {room.id for room in data.rooms_config.rooms}
+
+        # field -> value -> workload indexes
+        self.index: Dict[str, Dict[str, List[int]]] = {field: defaultdict(list) for field in RULE_FIELDS}
+        w_idx = 0
+        for f in data.faculty:
+            for w in f.workload:
+                self.index["subject"][w.subject].append(w_idx)
+                self.index["faculty_id"][f.id].append(w_idx)
+                self.index["type"][w.type].append(w_idx)
+                self.index["workload_id"][w.id].append(w_idx)
+                for g in dict.fromkeys(w.target_groups):
+                    self.index["target_group"][g].append(w_idx)
+                w_idx += 1
+
+        # workload index -> [(rule_id, allowed start hours)] / [(rule_id, allowed room ids)]
+        self.start_limits: Dict[int, List[Tuple[str, FrozenSet[int]]]] = defaultdict(list)
+        self.room_limits: Dict[int, List[Tuple[str, FrozenSet[str]]]] = defaultdict(list)
+        # (rule_id, matched workload indexes, room id, day, hour)
+        self.pins: List[Tuple[str, List[int], str, str, int]] = []
+        # room id -> FORCE_ROOM rules naming it (such rooms are only interchangeable with rooms named by the same rules)
+        self.forced_room_rules: Dict[str, Set[str]] = defaultdict(set)
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+
+        for rule in data.college_settings.custom_rules:
+            try:
+                self._compile(rule)
+            except CustomRuleError as e:
+                self.errors.append(f"Custom rule '{rule.id}': {e}")
+
+    def match(self, field: str, operator: str, value: str) -> List[int]:
+        values = self.index[field]
+        if operator == "EQUALS":
+            return list(values.get(value, ()))
+        return sorted({w_idx for key, workloads in values.items() if value in key for w_idx in workloads})
+
+    def _compile(self, rule: CustomRule):
+        if rule.condition_field not in RULE_FIELDS:
+            raise CustomRuleError(f"unknown condition_field '{rule.condition_field}' (expected one of {', '.join(RULE_FIELDS)})")
+        if rule.condition_operator not in RULE_OPERATORS:
+            raise CustomRuleError(f"unknown condition_operator '{rule.condition_operator}' (expected one of {', '.join(RULE_OPERATORS)})")
+        if rule.action_type not in RULE_ACTIONS:
+            raise CustomRuleError(f"unknown action_type '{rule.action_type}' (expected one of {', '.join(RULE_ACTIONS)})")
+        matched = self.match(rule.condition_field, rule.condition_operator, rule.condition_value)
+
+        if rule.action_type == "RESTRICT_TIME":
+            hours = rule.action_value if isinstance(rule.action_value, list) else [rule.action_value]
+            allowed = frozenset(_hour(h) for h in hours)
+            for w_idx in matched:
+                self.start_limits[w_idx].append((rule.id, allowed))
+
+        elif rule.action_type == "FORCE_ROOM":
+            rooms = rule.action_value if isinstance(rule.action_value, list) else [rule.action_value]
+            allowed = frozenset(str(r) for r in rooms)
+            unknown = sorted(allowed - self.room_ids)
+            if unknown:
+                allowed &= self.room_ids
+                skipped = "the rule is ignored" if not allowed else "they are ignored"
+                self.warnings.append(f"Custom rule '{rule.id}': FORCE_ROOM names unknown rooms {unknown}; {skipped}")
+                if not allowed:
+                    return
+            for room_id in allowed:
+                self.forced_room_rules[room_id].add(rule.id)
+            for w_idx in matched:
+                self.room_limits[w_idx].append((rule.id, allowed))
+
+        else:
+            try:
+                room_id, day, hour = str(rule.action_value).split("|")
+            except ValueError:
+                raise CustomRuleError(f"FORCE_PIN expects 'room|day|hour', got '{rule.action_value}'")
+            if room_id not in self.room_ids:
+                self.warnings.append(f"Custom rule '{rule.id}': FORCE_PIN names unknown room '{room_id}'; the rule is ignored")
+                return
+            self.pins.append((rule.id, matched, room_id, day, _hour(hour)))
+
+    @property
+    def pinned_rooms(self) -> Set[str]:
+        return {room_id for _, _, room_id, _, _ in self.pins}
+
+    def allowed_rooms(self, w_idx: int) -> Tuple[FrozenSet[str], ...]:
+        """Every FORCE_ROOM set the workload must pick its room from (all of them apply)."""
+        return tuple(allowed for _, allowed in self.room_limits.get(w_idx, ()))
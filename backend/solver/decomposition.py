@@ -0,0 +1,529 @@
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from schemas.api_models import GenerationPayload
+from services.validator import check_room_capacity
+from solver.custom_rules import CompiledRules
+from solver.group_hierarchy import GroupHierarchy
+from solver.instrumentation import EngineDiagnostics
+from solver.registry import ENGINE_MODES
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+# Below this many workloads in total, components are solved one after another in-process:
+# starting worker processes would cost more than the solves themselves
+MIN_PARALLEL_WORKLOADS = 200
+# Head-room on top of the expected load when shared rooms are split between components
+ROOM_SHARE_SLACK = 1.0
+
+
+class Component:
+    """
+    One independent department: faculty that share no target group (or group subtree) and no
+    pinned room with anyone outside it, plus the rooms handed to it.
+    """
+
+    def __init__(self, faculty: List[int], hours: int):
+        self.faculty = faculty
+        # Weekly teaching hours to place: the component's share of the time budget follows it
+        self.hours = hours
+        # Room dicts as in the payload; a room shared with other components carries extra
+        # blocked slots for the days it belongs to them
+        self.rooms: List[Dict[str, Any]] = []
+        # Whole (unsplit) room dicts of the shared rooms this component may use
+        self.shared_rooms: List[Dict[str, Any]] = []
+        self.uses_shared_rooms = False
+
+    def payload(self, payload_data: Dict[str, Any], rooms: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        return {
+            **payload_data,
+            "faculty": [payload_data["faculty"][f_idx] for f_idx in self.faculty],
+            "rooms_config": {"rooms": self.rooms if rooms is None else rooms},
+            "solver_options": dict(payload_data["solver_options"]),
+        }
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[Any, Any] = {}
+
+    def find(self, node):
+        self.parent.setdefault(node, node)
+        root = node
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[node] != root:
+            self.parent[node], node = root, self.parent[node]
+        return root
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+
+def plan_components(data: GenerationPayload, rules: Optional[CompiledRules] = None) -> List[Component]:
+    """
+    Splits the institution into connected components of the faculty - group - pinned-room graph
+    (group subtrees count as connected, since parent theory and sub-batch labs interact; rooms
+    named by FORCE_PIN or FORCE_ROOM rules count as pinned).
+
+    Rooms only one component can use go to it whole. Rooms several components can use are
+    pre-split into room sessions (a room on one day, on one side of lunch): each component
+    receives enough of them for its expected load times ROOM_SHARE_SLACK, and sees the hours it
+    does not own as blocked slots. When a room pool cannot cover every component's minimum, its
+    lightest users are merged pairwise; a component left without the room capacity it needs
+    (same max-flow check as the validator) is merged with the smallest component it shares
+    rooms with. The split is then redone.
+    """
+    uf = _UnionFind()
+    hierarchy = GroupHierarchy.from_payload(data)
+    rules = rules if rules is not None else CompiledRules(data)
+    # Flat workload index -> owning faculty index, in the order CompiledRules uses
+    workload_owner: List[int] = []
+    for f_idx, f in enumerate(data.faculty):
+        uf.find(("f", f_idx))
+        for w in f.workload:
+            workload_owner.append(f_idx)
+            for g in w.target_groups:
+                uf.union(("f", f_idx), ("g", g))
+    for g, parent in hierarchy.parents.items():
+        if parent is not None:
+            uf.union(("g", g), ("g", parent))
+    # Rooms named by FORCE_PIN or FORCE_ROOM rules are kept whole (see below)
+    pinned_rooms = rules.pinned_rooms | set(rules.forced_room_rules)
+
+    settings = data.college_settings
+    payload_data = data.model_dump()
+    room_dicts = payload_data["rooms_config"]["rooms"]
+    rooms = data.rooms_config.rooms
+    # Runs of back-to-back teaching hours within a day (lunch splits the day in two)
+    day_runs: List[List[int]] = []
+    for h in sorted(h for h in settings.time_slots if h != settings.lunch_slot):
+        if day_runs and day_runs[-1][-1] + 1 == h:
+            day_runs[-1].append(h)
+        else:
+            day_runs.append([h])
+    # (faculty_idx, weekly hours, tag-compatible room indexes within any FORCE_ROOM sets) per workload
+    workloads = [
+        (f_idx, w.hours, [r_idx for r_idx, room in enumerate(rooms) if all(tag in room.tags for tag in w.required_tags)
+                          and all(room.id in allowed for allowed in rules.allowed_rooms(w_idx))])
+        for w_idx, (f_idx, w) in enumerate(zip(workload_owner, (w for f in data.faculty for w in f.workload)))
+    ]
+    # A pinned room is never split, so every faculty that could use it (pinned workloads
+    # included) joins its component
+    for f_idx, _, room_list in workloads:
+        for r_idx in room_list:
+            if rooms[r_idx].id in pinned_rooms:
+                uf.union(("f", f_idx), ("r", rooms[r_idx].id))
+
+    while True:
+        members: Dict[Any, List[int]] = defaultdict(list)
+        for f_idx in range(len(data.faculty)):
+            members[uf.find(("f", f_idx))].append(f_idx)
+        components = {root: Component(faculty, sum(w.hours for f_idx in faculty for w in data.faculty[f_idx].workload))
+                      for root, faculty in members.items()}
+
+        # Expected load per room: each workload spreads its hours evenly over its compatible rooms
+        load: Dict[int, Dict[Any, float]] = defaultdict(lambda: defaultdict(float))
+        for f_idx, hours, room_list in workloads:
+            for r_idx in room_list:
+                load[r_idx][uf.find(("f", f_idx))] += hours / len(room_list)
+
+        shared: Dict[Tuple[frozenset, frozenset], List[int]] = defaultdict(list)
+        for r_idx, room in enumerate(rooms):
+            users = frozenset(load[r_idx])
+            if room.id in pinned_rooms and uf.find(("r", room.id)) in components:
+                components[uf.find(("r", room.id))].rooms.append(room_dicts[r_idx])
+            elif len(users) == 1:
+                components[next(iter(users))].rooms.append(room_dicts[r_idx])
+            elif users:
+                shared[(frozenset(room.tags), users)].append(r_idx)
+
+        unsplittable = []
+        for (_, users), bucket in shared.items():
+            # (room_idx, day, hours) units, room by room so a component's share spans consecutive days
+            units = [(r_idx, day, run) for r_idx in bucket for day in settings.days_active for run in day_runs]
+            demand = {root: sum(load[r_idx][root] for r_idx in bucket) for root in users}
+            unit_hours = sum(len(run) for run in day_runs) / max(len(day_runs), 1)
+            allotted = _apportion(len(units), demand, unit_hours)
+            if allotted is None:
+                unsplittable.append(sorted(users, key=lambda r: (demand[r], r)))
+                continue
+            for root in sorted(users, key=lambda r: (-demand[r], r)):
+                owned = units[:allotted[root]]
+                units = units[allotted[root]:]
+                components[root].uses_shared_rooms = True
+                components[root].shared_rooms.extend(room_dicts[r_idx] for r_idx in bucket)
+                for r_idx in dict.fromkeys(r_idx for r_idx, _, _ in owned):
+                    open_hours = {(day, h) for r, day, run in owned if r == r_idx for h in run}
+                    closed = [{"day": day, "time": h} for day in settings.days_active for h in settings.time_slots
+                              if (day, h) not in open_hours]
+                    components[root].rooms.append({**room_dicts[r_idx], "blocked_slots": room_dicts[r_idx]["blocked_slots"] + closed})
+
+        short = [root for root, component in components.items()
+                 if component.uses_shared_rooms and check_room_capacity(GenerationPayload(**component.payload(payload_data)))]
+        if not short and not unsplittable:
+            return sorted(components.values(), key=lambda c: -len(c.faculty))
+
+        for users in unsplittable:
+            # Pair up the lightest users first; repeated rounds halve the component count
+            for a, b in zip(users[0::2], users[1::2]):
+                uf.union(a, b)
+        for root in short:
+            partners = [r for (_, users) in shared for r in users if root in users and uf.find(r) != uf.find(root)]
+            if partners:
+                uf.union(root, min(partners, key=lambda r: (len(members.get(r, ())), r)))
+
+
+def _apportion(units: int, demand: Dict[Any, float], unit_hours: float) -> Optional[Dict[Any, int]]:
+    """
+    Splits `units` room sessions by demand. Every component first gets the room-days its expected
+    load needs (with slack), the rest goes out by largest remainder. None when even the
+    minimums do not fit.
+    """
+    minimum = {root: max(1, math.ceil(d * ROOM_SHARE_SLACK / max(unit_hours, 1))) for root, d in demand.items()}
+    spare = units - sum(minimum.values())
+    if spare < 0:
+        return None
+    total = sum(demand.values()) or 1.0
+    shares = {root: spare * d / total for root, d in demand.items()}
+    allotted = {root: minimum[root] + math.floor(shares[root]) for root in demand}
+    for root in sorted(demand, key=lambda r: math.floor(shares[r]) - shares[r]):
+        if sum(allotted.values()) >= units:
+            break
+        allotted[root] += 1
+    return allotted
+
+
+def _time_share(hours: int, pending_hours: int, deadline: float, slots: int = 1) -> float:
+    """
+    Seconds for a component of `hours` out of the time left: `slots` solves run at once, and the
+    components not finished yet (`pending_hours` in total, this one included) share them by size.
+    Time an earlier component did not use is left over for the later ones.
+    """
+    remaining = max(deadline - time.time(), 0.0)
+    return min(remaining, remaining * slots * hours / max(pending_hours, 1))
+
+
+def _proven_infeasible(result: Optional[Dict[str, Any]]) -> bool:
+    return result is not None and result["diagnostics"].get("solver", {}).get("status") == "INFEASIBLE"
+
+
+_worker_stop: Optional[Any] = None
+
+
+def _init_component_worker(stop_event):
+    global _worker_stop
+    _worker_stop = stop_event
+
+
+def _solve_component(payload_data: Dict[str, Any], time_limit: float, num_workers: int,
+                     solution_hint: Optional[List[Dict[str, Any]]] = None, stop_event=None,
+                     deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Solves one component with the requested engine mode within `time_limit` seconds, and before
+    `deadline` (time.time()) when given, which also covers a worker process's start-up.
+    Runs in a worker process, or in-process when `stop_event` is given.
+    """
+    stop_event = stop_event if stop_event is not None else _worker_stop
+    if deadline is not None:
+        time_limit = min(time_limit, deadline - time.time())
+    payload_data["solver_options"]["max_time_in_seconds"] = max(time_limit, 0.1)
+    payload = GenerationPayload(**payload_data)
+    engine = ENGINE_MODES[payload.solver_options.engine_mode](data=payload)
+    engine.solution_hint = solution_hint
+    engine.solver.parameters.num_workers = num_workers
+    finished = threading.Event()
+
+    def watch_for_stop():
+        while not finished.is_set():
+            if stop_event.wait(0.1):
+                while not finished.is_set():
+                    engine.stop_search()
+                    finished.wait(0.1)
+
+    if stop_event is not None:
+        threading.Thread(target=watch_for_stop, daemon=True).start()
+    started = time.perf_counter()
+    try:
+        result = engine.generate()
+    finally:
+        finished.set()
+    result["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+class DecomposedTimetableEngine:
+    """
+    Solves independent departments as separate CP-SAT models and merges the timetables.
+
+    Components come from plan_components(). With a single component the request goes straight
+    to the engine of `solver_options.engine_mode`. With several cores and a large enough
+    institution the components are solved in parallel worker processes, each with an equal
+    share of the cores, on the pre-split shared rooms. A component that finds no timetable there
+    may only fail because of the split, so it is re-solved in turn against the whole shared rooms
+    minus the hours the others booked. On one core every component is solved that way in turn,
+    which never wastes time on a split that does not fit. Either way the whole time budget is
+    shared between the components by their teaching hours.
+
+    The result is infeasible only when a component with rooms of its own is proven infeasible.
+    If any other component fails (on its part of the shared rooms, or out of time), the
+    institution is re-solved as one model in the time left.
+    """
+
+    def __init__(self, data: GenerationPayload):
+        self.data = data
+        self.solution_listener: Optional[Callable[[Dict[str, Any]], None]] = None
+        self.solution_hint: Optional[List[Dict[str, Any]]] = None
+        self.diagnostics = EngineDiagnostics()
+        self.components: List[Component] = []
+        self._stop = threading.Event()
+        self._process_stop = None
+        self._delegate = None
+        self._started_at: Optional[float] = None
+        self._solved = 0
+        # Cores the components share (lowered when the job gets only part of the machine)
+        self.cores = os.cpu_count() or 1
+
+    def stop_search(self):
+        self._stop.set()
+        if self._process_stop is not None:
+            self._process_stop.set()
+        if self._delegate is not None:
+            self._delegate.stop_search()
+
+    def search_progress(self) -> Dict[str, Any]:
+        if self._delegate is not None:
+            return self._delegate.search_progress()
+        if self._started_at is None:
+            return {"phase": "building_model", "elapsed_s": 0.0, "solutions": 0, "best_bound": None}
+        return {
+            "phase": "searching",
+            "elapsed_s": round(time.monotonic() - self._started_at, 3),
+            "solutions": 0,
+            "best_bound": None,
+            "components_solved": self._solved,
+            "components": len(self.components),
+        }
+
+    def _monolithic(self, time_limit: Optional[float] = None) -> Dict[str, Any]:
+        data = self.data
+        if time_limit is not None:
+            options = data.solver_options.model_copy(update={"max_time_in_seconds": max(time_limit, 0.1)})
+            data = data.model_copy(update={"solver_options": options})
+        engine = ENGINE_MODES[data.solver_options.engine_mode](data=data)
+        engine.solution_listener = self.solution_listener
+        engine.solution_hint = self.solution_hint
+        engine.solver.parameters.num_workers = self.cores
+        self._delegate = engine
+        if self._stop.is_set():
+            engine.stop_search()
+        return engine.generate()
+
+    def _parallel(self) -> bool:
+        total_workloads = sum(len(f.workload) for f in self.data.faculty)
+        return min(len(self.components), self.cores) > 1 and total_workloads >= MIN_PARALLEL_WORKLOADS
+
+    def _solve_parallel(self, payloads: List[Dict[str, Any]], deadline: float) -> List[Dict[str, Any]]:
+        """
+        Solves every component in a pool of worker processes, largest first. A component is
+        submitted when a process frees up, with its share of the time left (_time_share), so the
+        time a finished component did not need goes to the ones still waiting.
+        """
+        processes = min(len(payloads), self.cores)
+        order = sorted(range(len(payloads)), key=lambda c: -self.components[c].hours)
+        pending_hours = sum(component.hours for component in self.components)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(payloads)
+        context = multiprocessing.get_context("spawn")
+        self._process_stop = context.Event()
+        if self._stop.is_set():
+            self._process_stop.set()
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context,
+                                 initializer=_init_component_worker, initargs=(self._process_stop,)) as pool:
+            running: Dict[Any, int] = {}
+            while order or running:
+                while order and len(running) < processes:
+                    c_idx = order.pop(0)
+                    time_limit = _time_share(self.components[c_idx].hours, pending_hours, deadline, processes)
+                    running[pool.submit(_solve_component, payloads[c_idx], time_limit, max(1, self.cores // processes),
+                                        self.solution_hint, None, deadline)] = c_idx
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    c_idx = running.pop(future)
+                    results[c_idx] = future.result()
+                    pending_hours -= self.components[c_idx].hours
+                    self._solved += 1
+        return results
+
+    def _solve_in_turn(self, payload_data: Dict[str, Any], results: List[Optional[Dict[str, Any]]],
+                       pending: List[int], deadline: float) -> List[Optional[Dict[str, Any]]]:
+        """
+        Solves the `pending` components one after another, largest first, with every shared room
+        hour already booked by another component blocked. A component first gets the whole of the
+        shared rooms it received a part of, then, if that fails, every shared room it can use.
+        Stops at the first component that still fails.
+        """
+        results = list(results)
+        taken: Dict[str, set] = defaultdict(set)
+        for c_idx, result in enumerate(results):
+            if c_idx not in pending and result is not None:
+                for row in result["schedule"]:
+                    taken[row["room"]].add((row["day"], row["time_slot"]))
+
+        def unbooked(room: Dict[str, Any]) -> Dict[str, Any]:
+            booked = [{"day": day, "time": h} for day, h in sorted(taken[room["id"]])]
+            return {**room, "blocked_slots": room["blocked_slots"] + booked}
+
+        pending_hours = sum(self.components[c_idx].hours for c_idx in pending)
+        for c_idx in sorted(pending, key=lambda c: -self.components[c].hours):
+            component = self.components[c_idx]
+            shared = {room["id"]: room for room in component.shared_rooms}
+            own = [unbooked(shared[room["id"]]) if room["id"] in shared else room for room in component.rooms]
+            own_ids = {room["id"] for room in own}
+            attempts = [own, own + [unbooked(room) for room_id, room in shared.items() if room_id not in own_ids]]
+            for rooms in attempts[:1 if len(attempts[1]) == len(own) else 2]:
+                time_limit = _time_share(component.hours, pending_hours, deadline)
+                result = _solve_component(component.payload(payload_data, rooms), time_limit,
+                                          self.cores, self.solution_hint, self._stop)
+                if result["status"] == "success" or self._stop.is_set():
+                    break
+            results[c_idx] = result
+            pending_hours -= component.hours
+            self._solved += 1
+            if result["status"] != "success":
+                break
+            for row in result["schedule"]:
+                taken[row["room"]].add((row["day"], row["time_slot"]))
+        return results
+
+    def generate(self) -> Dict[str, Any]:
+        with self.diagnostics.phase("decompose"):
+            rules = CompiledRules(self.data)
+            self.diagnostics.warnings.extend(rules.warnings)
+            self.components = plan_components(self.data, rules)
+            payload_data = self.data.model_dump()
+        if len(self.components) <= 1:
+            return self._monolithic()
+
+        self._started_at = time.monotonic()
+        deadline = time.time() + self.data.solver_options.max_time_in_seconds
+        parallel = self._parallel()
+        resolved: List[int] = []
+        with self.diagnostics.phase("solve"):
+            if parallel:
+                payloads = [component.payload(payload_data) for component in self.components]
+                results = self._solve_parallel(payloads, deadline)
+            else:
+                results = self._solve_in_turn(payload_data, [None] * len(self.components),
+                                              list(range(len(self.components))), deadline)
+
+        if parallel and not self._stop.is_set():
+            resolved = [c_idx for c_idx, (component, result) in enumerate(zip(self.components, results))
+                        if result["status"] != "success" and component.uses_shared_rooms]
+            if resolved:
+                with self.diagnostics.phase("coordinate"):
+                    results = self._solve_in_turn(payload_data, results, resolved, deadline)
+
+        summary = {
+            "components": len(self.components),
+            "shared_room_components": sum(1 for c in self.components if c.uses_shared_rooms),
+            "parallel": parallel,
+            "resolved_components": len(resolved),
+            "fallback": False,
+            "component_stats": [{
+                "faculty": len(component.faculty),
+                "rooms": len({room["id"] for room in component.rooms + component.shared_rooms}),
+                "status": result["status"] if result is not None else "not_solved",
+                "solve_s": result["elapsed_s"] if result is not None else 0.0,
+            } for component, result in zip(self.components, results)],
+        }
+
+        # Only a component with rooms of its own that is proven infeasible makes the whole
+        # institution infeasible; one that ran out of time, or failed on its part of the shared
+        # rooms, leaves it to the single model
+        failed = any(result is None or result["status"] != "success" for result in results)
+        proven = any(_proven_infeasible(result) and not component.uses_shared_rooms
+                     for component, result in zip(self.components, results))
+        if failed and not proven and not self._stop.is_set():
+            result = self._monolithic(deadline - time.time())
+            result["decomposition"] = {**summary, "fallback": True}
+            return result
+
+        with self.diagnostics.phase("merge"):
+            merged = self._merge(results)
+        merged["decomposition"] = summary
+        if merged["status"] == "success" and self.solution_listener is not None:
+            self.solution_listener({"solution_index": 1, "elapsed_s": round(time.monotonic() - self._started_at, 3),
+                                    "objective": 0.0, "best_bound": 0.0, "total_classes": merged["total_classes"],
+                                    "schedule": merged["schedule"]})
+        return merged
+
+    def _merge(self, results: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        complete = all(r is not None for r in results)
+        results = [r for r in results if r is not None]
+        diagnostics = self.diagnostics.to_dict()
+        solvers = [r["diagnostics"]["solver"] for r in results]
+        statuses = [s.get("status") for s in solvers]
+        worst = next((s for s in ("INFEASIBLE", "MODEL_INVALID", "UNKNOWN", "FEASIBLE") if s in statuses), "OPTIMAL")
+        diagnostics["model"] = {key: sum(r["diagnostics"]["model"].get(key, 0) for r in results) for key in ("variables", "constraints")}
+        diagnostics["solver"] = {
+            "status": worst,
+            "wall_time_s": max(s.get("wall_time_s", 0.0) for s in solvers),
+            "conflicts": sum(s.get("conflicts", 0) for s in solvers),
+            "branches": sum(s.get("branches", 0) for s in solvers),
+        }
+        for r in results:
+            for phase, entry in r["diagnostics"]["phases"].items():
+                if phase == "solve":
+                    continue
+                merged = diagnostics["phases"].setdefault(f"components.{phase}", {"seconds": 0.0})
+                merged["seconds"] = round(merged["seconds"] + entry["seconds"], 6)
+
+        if not complete or any(r["status"] != "success" for r in results):
+            return {
+                "status": "infeasible",
+                "message": "Critical Failure: The constraints provided are mathematically impossible to map.",
+                "schedule": [],
+                "diagnostics": diagnostics,
+            }
+
+        pruned: Dict[str, int] = defaultdict(int)
+        for r in results:
+            for reason, count in r["pruned_candidates"].items():
+                pruned[reason] += count
+        schedule = [row for r in results for row in r["schedule"]]
+        merged = {
+            "status": "success",
+            "message": "Optimal edge-case-proof timetable generated.",
+            "total_classes": len(schedule),
+            "pruned_candidates": dict(pruned),
+            "schedule": schedule,
+            "diagnostics": diagnostics,
+        }
+        objectives = [r["objective"] for r in results if "objective" in r]
+        if objectives:
+            merged["objective"] = _merge_objectives(objectives)
+        return merged
+
+
+def _merge_objectives(objectives: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Components share no faculty or group, so their penalties, objectives and bounds add up.
+    The merged search ended for the weakest reason among the components.
+    """
+    value = sum(o["value"] for o in objectives)
+    bound = sum(o["bound"] for o in objectives)
+    reasons = [o["stopped_by"] for o in objectives]
+    terms: Dict[str, int] = defaultdict(int)
+    for o in objectives:
+        for name, count in o["terms"].items():
+            terms[name] += count
+    return {
+        "value": value,
+        "bound": bound,
+        "gap": round(abs(value - bound) / max(1.0, abs(value)), 6),
+        "stopped_by": next(r for r in ("stopped", "time_limit", "gap_limit", "optimal") if r in reasons),
+        "terms": dict(terms),
+    }
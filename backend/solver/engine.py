@@ -1,267 +1,707 @@
+import os
+import time
+import numpy as np
 from ortools.sat.python import cp_model
 from schemas.api_models import GenerationPayload, Room
-from typing import Dict, Any, List
+from solver.custom_rules import CompiledRules
+from solver.group_hierarchy import GroupHierarchy
+from solver.instrumentation import EngineDiagnostics
+from solver.profiles import AUTO_PROFILE, apply_profile, profile_definition, tuned_profiles
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
+from collections import defaultdict
+
+class RoomAssignmentError(Exception):
+    """Raised when phase 2 cannot fit a day's placed sessions into concrete rooms."""
+
+
+class SolutionStreamer(cp_model.CpSolverSolutionCallback):
+    """
+    Expands every solution CP-SAT reports during the search into a full schedule and hands it
+    to the engine's `solution_listener`. Any other error than an intermediate solution without a
+    room matching stops the search and is re-raised by generate() once Solve() returns.
+    """
+
+    def __init__(self, engine: "TimetableEngine"):
+        super().__init__()
+        self.engine = engine
+        self.error: Optional[Exception] = None
+
+    def on_solution_callback(self):
+        engine = self.engine
+        engine.solutions_found += 1
+        engine.schedule = []
+        try:
+            engine._extract_schedule(self)
+            engine.solution_listener({
+                "solution_index": engine.solutions_found,
+                "elapsed_s": round(self.WallTime(), 3),
+                "objective": self.ObjectiveValue(),
+                "best_bound": self.BestObjectiveBound(),
+                "total_classes": len(engine.schedule),
+                "schedule": engine.schedule,
+            })
+        except RoomAssignmentError:
+            # two_phase solutions whose rooms cannot be matched mid-search are skipped
+            return
+        except Exception as e:
+            # Raising inside the CP-SAT callback would not reach the caller
+            self.error = e
+            self.StopSearch()
+
 
 class TimetableEngine:
+    # Whether _apply_soft_objectives() can read this formulation's occupancy buckets
+    SOFT_OBJECTIVES = True
+
     def __init__(self, data: GenerationPayload):
         self.data = data
         self.model = cp_model.CpModel()
-        self.variables = {}
+        # Created up front so another thread can interrupt the search via stop_search()
+        self.solver = cp_model.CpSolver()
+        # Optional streaming hook: called with every intermediate solution while the search runs
+        self.solution_listener: Optional[Callable[[Dict[str, Any]], None]] = None
+        self.solutions_found = 0
+        self.best_objective_bound: Optional[float] = None
+        self.search_started_at: Optional[float] = None
+        self.search_interrupted = False
+        # Soft objective name -> penalty literals, filled when solver_options.optimize is set
+        self.objective_terms: Dict[str, List[cp_model.IntVar]] = {}
+        # Optional warm start: sessions of a previous timetable, as
+        # {"faculty_id", "workload_id", "room", "day", "start"} dicts
+        self.solution_hint: Optional[List[Dict[str, Any]]] = None
+        # Compact variable storage: self.variables[i] is a start-time literal whose
+        # coordinates live in self.var_index[i] = (workload_idx, pool_idx, day_idx, start_slot)
+        self.variables: List[cp_model.IntVar] = []
+        self.var_index: List[Tuple[int, int, int, int]] = []
+        # Proto index of every entry in self.variables, built on first extraction
+        self._proto_index: Optional[np.ndarray] = None
         # Structured output
         self.schedule = []
         
         # Helper structures for indexing
         self.days = data.college_settings.days_active
         self.slots = data.college_settings.time_slots
+        self.slot_set = set(self.slots)
         self.faculty_map = {f.id: f for f in data.faculty}
         self.rooms_map = {r.id: r for r in data.rooms_config.rooms}
+        self.room_ids = [r.id for r in data.rooms_config.rooms]
+        self.room_index = {room_id: r_idx for r_idx, room_id in enumerate(self.room_ids)}
+        # Custom rules compiled once into per-workload start, room and pin domains
+        self.rules = CompiledRules(data)
+
+        # Room equivalence classes: rooms sharing a tag set are interchangeable, so the matrix
+        # uses one pool per class and concrete rooms are handed out after the solve.
+        # room_pools[p] = room indexes in pool p; room_pool_of[r_idx] = p
+        self.room_pools: List[List[int]] = []
+        self.room_pool_of: List[int] = []
+        # (day_idx, hour) cells in which the rooms of pool p host nothing (Room.blocked_slots)
+        self.pool_blocked: List[Set[Tuple[int, int]]] = []
+        self._build_room_pools()
+
+        # Flat workload table: workload_idx -> (faculty_idx, WorkloadItem)
+        self.workloads = [(f_idx, w) for f_idx, f in enumerate(data.faculty) for w in f.workload]
+        self.workload_vars: List[List[int]] = [[] for _ in self.workloads]
+        # Per-workload fields shared by every schedule row of that workload
+        self._row_templates: List[Dict[str, Any]] = [{
+            "workload_id": w.id,
+            "faculty_id": data.faculty[f_idx].id,
+            "faculty_name": data.faculty[f_idx].name,
+            "subject": w.subject,
+            "targets": w.target_groups,
+            "type": w.type,
+        } for f_idx, w in self.workloads]
+
+        # Division -> batch -> sub-batch tree. For each Practical/Tutorial workload, the groups
+        # whose subtree it occupies (every proper ancestor of any of its targets)
+        self.group_hierarchy = GroupHierarchy.from_payload(data)
+        self.session_ancestors: List[Tuple[str, ...]] = [
+            tuple(sorted({a for g in w.target_groups for a in self.group_hierarchy.ancestors.get(g, ())}))
+            if w.type in ["Practical", "Tutorial"] else ()
+            for _, w in self.workloads
+        ]
+
+        # Filled by the pre-filter stage: tag-compatible rooms and surviving (day_idx, start_slot)
+        # pairs per workload, plus how many candidate variables each rule removed
+        self.valid_rooms: List[List[int]] = []
+        self.start_domains: List[List[Tuple[int, int]]] = []
+        self.pruned_candidates: Dict[str, int] = {}
+        # With relax_domains set, start times excluded only by a shift, blocked slot or
+        # RESTRICT_TIME rule are kept and listed here as (workload_idx, day_idx, start_slot) ->
+        # [(family, entity)] so a subclass can forbid them under an assumption literal instead
+        self.relax_domains = False
+        self.start_guards: Dict[Tuple[int, int, int], List[Tuple[str, str]]] = {}
+        # Likewise (workload_idx, room_idx) -> [(family, entity)] for rooms kept despite a FORCE_ROOM rule
+        self.room_guards: Dict[Tuple[int, int], List[Tuple[str, str]]] = {}
+
+        # Occupancy buckets filled once during variable creation. Each maps a
+        # (entity, day_idx, hour) cell to every variable index that covers it.
+        self.room_occupancy: Dict[Tuple[int, int, int], List[int]] = defaultdict(list)
+        self.faculty_occupancy: Dict[Tuple[int, int, int], List[int]] = defaultdict(list)
+        self.group_occupancy: Dict[Tuple[str, int, int], List[int]] = defaultdict(list)
+        # For the parent/sub-batch rule (6.5): a group's own Theory sessions, and the
+        # Practical/Tutorial sessions anywhere below it in the hierarchy
+        self.group_theory_occupancy: Dict[Tuple[str, int, int], List[int]] = defaultdict(list)
+        self.subtree_session_occupancy: Dict[Tuple[str, int, int], List[int]] = defaultdict(list)
+
+        # Phase timings, model size and CP-SAT statistics, returned as the `diagnostics` block
+        self.diagnostics = EngineDiagnostics()
+        self.diagnostics.warnings.extend(self.rules.warnings)
+
+    def _build_room_pools(self):
+        """
+        Groups rooms with identical tag sets, blocked slots and FORCE_ROOM rules naming them
+        into pools. Rooms named by a FORCE_PIN rule (or by _isolated_rooms()) keep a pool of
+        their own, as does every room when `pool_equivalent_rooms` is switched off.
+        """
+        pinned = self.rules.pinned_rooms | self._isolated_rooms()
+
+        day_lookup = {d: d_idx for d_idx, d in enumerate(self.days)}
+        pool_by_tags: Dict[Tuple[frozenset, frozenset, frozenset], int] = {}
+        for r_idx, room in enumerate(self.data.rooms_config.rooms):
+            blocked = frozenset((day_lookup[b.day], b.time) for b in room.blocked_slots if b.day in day_lookup)
+            key = (frozenset(room.tags), blocked, frozenset(self.rules.forced_room_rules.get(room.id, ())))
+            if not self.data.solver_options.pool_equivalent_rooms or room.id in pinned:
+                pool_idx = len(self.room_pools)
+                self.room_pools.append([])
+                self.pool_blocked.append(blocked)
+            elif key in pool_by_tags:
+                pool_idx = pool_by_tags[key]
+            else:
+                pool_idx = pool_by_tags[key] = len(self.room_pools)
+                self.room_pools.append([])
+                self.pool_blocked.append(blocked)
+            self.room_pools[pool_idx].append(r_idx)
+            self.room_pool_of.append(pool_idx)
+
+    def _compute_start_domains(self):
+        """
+        Pre-filter stage: resolves each workload's valid rooms and (day, start_slot) domain
+        before any variable exists. Start times that hit lunch, leave the faculty shift, land in a
+        blocked slot, run past the last slot or break a RESTRICT_TIME rule are never instantiated,
+        and rooms outside a FORCE_ROOM rule are dropped from the workload's rooms. Pruned
+        candidates (start times x compatible rooms) are tallied per rule.
+        """
+        lunch = self.data.college_settings.lunch_slot
+        rooms = self.data.rooms_config.rooms
+        pruned = {"lunch": 0, "shift": 0, "blocked_slot": 0, "past_last_slot": 0, "custom_rule": 0, "room_blocked": 0}
+
+        for w_idx, (f_idx, w) in enumerate(self.workloads):
+            f = self.data.faculty[f_idx]
+            shift = set(f.shift)
+            blocked_set = {(b.day, b.time) for b in f.blocked_slots}
+            # (rule_id, allowed start hours) of every RESTRICT_TIME rule matching this workload
+            rules = self.rules.start_limits.get(w_idx, ())
+
+            # Dynamic Room Filtering based on Required Tags
+            # Room must possess ALL required tags for this workload
+            valid_rooms = [r_idx for r_idx, room in enumerate(rooms) if all(tag in room.tags for tag in w.required_tags)]
+            forced_out = 0
+            for rule_id, allowed in self.rules.room_limits.get(w_idx, ()):
+                if self.relax_domains:
+                    for r_idx in valid_rooms:
+                        if self.room_ids[r_idx] not in allowed:
+                            self.room_guards.setdefault((w_idx, r_idx), []).append(("custom_rule", rule_id))
+                    continue
+                kept = [r_idx for r_idx in valid_rooms if self.room_ids[r_idx] in allowed]
+                forced_out += len(valid_rooms) - len(kept)
+                valid_rooms = kept
+            self.valid_rooms.append(valid_rooms)
+
+            domain = []
+            for d_idx, d in enumerate(self.days):
+                for s in self.slots:
+                    # Lunch and the end of the day always prune; the rest are (family, entity) guards
+                    reason = None
+                    guards = []
+                    for offset in range(w.consecutive_hours):
+                        t = s + offset
+                        # A start_time is invalid if ANY of its spanned hours hit a boundary
+                        if t == lunch:
+                            reason = "lunch"
+                            break
+                        if t not in self.slot_set:
+                            reason = "past_last_slot"
+                            break
+                        if t not in shift:
+                            guards.append(("shift", f.id))
+                        elif (d, t) in blocked_set:
+                            guards.append(("blocked_slot", f.id))
+                    guards.extend(("custom_rule", rule_id) for rule_id, allowed in rules if s not in allowed)
+
+                    if reason is None and guards and self.relax_domains:
+                        self.start_guards[(w_idx, d_idx, s)] = list(dict.fromkeys(guards))
+                    elif reason is None and guards:
+                        reason = guards[0][0]
+
+                    if reason is None:
+                        domain.append((d_idx, s))
+                    else:
+                        pruned[reason] += len(valid_rooms)
+            pruned["custom_rule"] += forced_out * len(domain)
+            self.start_domains.append(domain)
+
+        self.pruned_candidates = pruned
+
+    def _isolated_rooms(self) -> Set[str]:
+        """
+        Hook: rooms that must stay addressable on their own after pooling. None in the plain engine.
+        """
+        return set()
 
-        # DIAGNOSTIC LOGGING
-        print("====== DIAGNOSTIC ENGINE INIT ======")
-        print(f"Total Faculties: {len(data.faculty)}")
-        print(f"Total Workloads: {sum(len(f.workload) for f in data.faculty)}")
-        print(f"Time Slots Total: {len(self.days) * len(self.slots)}")
-        print(f"Rooms Total: {len(self.rooms_map)}")
-        for f in data.faculty:
-            total_req = sum(w.hours for w in f.workload)
-            print(f"> Faculty {f.name} ({f.id}) - Requires {total_req} hours (Max Load is: {f.max_load_hrs})")
-        print("=====================================")
-        
     def _create_variables(self):
         """
-        Instantiates the 4D Boolean Matrix: V[Faculty][Workload_ID][Room][Day][TimeSlot]
-        Using Edge-Case Tag Filtering early to reduce Boolean Variable Matrix size.
-        """
-        for f in self.data.faculty:
-            for w in f.workload:
-                
-                # Dynamic Room Filtering based on Required Tags
-                valid_rooms = []
-                for room in self.data.rooms_config.rooms:
-                    # Room must possess ALL required tags for this workload
-                    has_all_tags = all(tag in room.tags for tag in w.required_tags)
-                    if has_all_tags:
-                        valid_rooms.append(room.id)
-                
-                for r in valid_rooms:
-                    for d in self.days:
-                        for s in self.slots:
-                            # Create boolean variable V = 1 if F is teaching W.id in Room R on Day D at Slot S
-                            name = f"V_F-{f.id}_W-{w.id}_R-{r}_D-{d}_S-{s}"
-                            self.variables[(f.id, w.id, r, d, s)] = self.model.NewBoolVar(name)
+        Instantiates the 4D Boolean Matrix: V[Faculty][Workload_ID][RoomPool][Day][TimeSlot]
+        Only tag-compatible room pools and pre-filtered start times get a variable.
+        Registers every variable in the room/faculty/group occupancy buckets as it is created,
+        so the clash constraints never have to rescan the matrix.
+        """
+        self._compute_start_domains()
+
+        for w_idx, (f_idx, w) in enumerate(self.workloads):
+            f = self.data.faculty[f_idx]
+            # A pool's rooms share one tag set, so either all of them are valid or none is
+            valid_pools = list(dict.fromkeys(self.room_pool_of[r_idx] for r_idx in self.valid_rooms[w_idx]))
+
+            for p_idx in valid_pools:
+                r = self._pool_name(p_idx)
+                for d_idx, s in self.start_domains[w_idx]:
+                    if not self._pool_free(p_idx, d_idx, s, w.consecutive_hours):
+                        self.pruned_candidates["room_blocked"] += len(self.room_pools[p_idx])
+                        continue
+                    d = self.days[d_idx]
+                    # Create boolean variable V = 1 if F is teaching W.id in a room of Pool R on Day D at Slot S
+                    name = f"V_F-{f.id}_W-{w.id}_R-{r}_D-{d}_S-{s}"
+                    v_idx = len(self.variables)
+                    self.variables.append(self.model.NewBoolVar(name))
+                    self.var_index.append((w_idx, p_idx, d_idx, s))
+                    self.workload_vars[w_idx].append(v_idx)
+                    self._index_occupancy(v_idx, w_idx, d_idx, s, p_idx)
+
+    def _pool_free(self, p_idx: int, d_idx: int, s: int, span: int) -> bool:
+        """
+        True when the rooms of pool `p_idx` are open for a session of `span` hours starting at `s`.
+        """
+        blocked = self.pool_blocked[p_idx]
+        return not blocked or all((d_idx, s + offset) not in blocked for offset in range(max(1, span)))
+
+    def _pool_name(self, p_idx: int) -> str:
+        pool = self.room_pools[p_idx]
+        return self.room_ids[pool[0]] if len(pool) == 1 else f"{self.room_ids[pool[0]]}x{len(pool)}"
+
+    def _guarded(self, constraint: cp_model.Constraint, family: str, entity: str) -> cp_model.Constraint:
+        """
+        Hook around every clash and pin constraint, labelled with the rule family and entity it
+        enforces. The plain engine posts them unconditionally.
+        """
+        return constraint
+
+    def _index_occupancy(self, v_idx: int, w_idx: int, d_idx: int, s: int, pool_idx: Optional[int] = None):
+        """
+        Registers variable `v_idx` in every (entity, day, hour) bucket its session keeps busy.
+        `pool_idx` is None for room-less variables (room chosen after the solve).
+        """
+        f_idx, w = self.workloads[w_idx]
+        for offset in range(max(1, w.consecutive_hours)):
+            t = s + offset
+            if t not in self.slot_set:
+                continue
+            if pool_idx is not None:
+                self.room_occupancy[(pool_idx, d_idx, t)].append(v_idx)
+            self.faculty_occupancy[(f_idx, d_idx, t)].append(v_idx)
+            for g in w.target_groups:
+                self.group_occupancy[(g, d_idx, t)].append(v_idx)
+                if w.type == "Theory":
+                    self.group_theory_occupancy[(g, d_idx, t)].append(v_idx)
+            for a in self.session_ancestors[w_idx]:
+                self.subtree_session_occupancy[(a, d_idx, t)].append(v_idx)
 
     def _apply_hard_constraints(self):
         """
         Applies Advanced Constraints: Shift Compliance, Blocked Slots, Lunch breaks, No Double Booking,
         Consecutive Blocks, Total Workload, and Custom Rules.
         """
-        lunch = self.data.college_settings.lunch_slot
+        variables = self.variables
 
         # 1. Global Boundaries, Shift Compliance & Blocked Slots (Now supporting multi-hour segments)
-        for f in self.data.faculty:
-             blocked_set = {(b.day, b.time) for b in f.blocked_slots}
-             
-             for w in f.workload:
-                 for r in self.rooms_map.keys():
-                     for d in self.days:
-                         for s in self.slots:
-                             var_key = (f.id, w.id, r, d, s)
-                             if var_key in self.variables:
-                                 v = self.variables[var_key]
-                                 
-                                 is_valid = True
-                                 for offset in range(w.consecutive_hours):
-                                     t = s + offset
-                                     # A start_time is invalid if ANY of its spanned hours hit a boundary
-                                     if t == lunch or t not in f.shift or (d, t) in blocked_set or t not in self.slots:
-                                         is_valid = False
-                                         break
-                                 
-                                 if not is_valid:
-                                     self.model.Add(v == 0)
+        # Enforced by construction: _compute_start_domains never instantiates an invalid start time.
 
         # 2. Workload Fulfillment (Exact match)
-        for f in self.data.faculty:
-            for w in f.workload:
-                work_sum = []
-                for r in self.rooms_map.keys():
-                    for d in self.days:
-                        for s in self.slots:
-                            var_key = (f.id, w.id, r, d, s)
-                            if var_key in self.variables:
-                                work_sum.append(self.variables[var_key])
-                if work_sum:
+        with self.diagnostics.phase("constraints.fulfilment", self.model):
+            for w_idx, (f_idx, w) in enumerate(self.workloads):
+                work_sum = [variables[i] for i in self.workload_vars[w_idx]]
+                # Fully pruned domains still post the (now unsatisfiable) sum so the model reports infeasible
+                if self.valid_rooms[w_idx]:
                     events_needed = w.hours // w.consecutive_hours if w.consecutive_hours > 0 else w.hours
                     self.model.Add(sum(work_sum) == events_needed)
 
         # 3. Contiguous Block Binding (Consecutive Hours)
         # By modeling variables as literal "Start Times" spanning `w.consecutive_hours`, fragmentation is mathematically impossible!
 
-        # 4. Clash Prevention: Room Overlap (Sliding Window)
-        for r in self.rooms_map.keys():
-            for d in self.days:
-                for s in self.slots:
-                    room_active_vars = []
-                    for f in self.data.faculty:
-                        for w in f.workload:
-                            for offset in range(w.consecutive_hours):
-                                start_s = s - offset
-                                var_key = (f.id, w.id, r, d, start_s)
-                                if var_key in self.variables:
-                                    room_active_vars.append(self.variables[var_key])
-                    if room_active_vars:
-                        self.model.Add(sum(room_active_vars) <= 1)
-
-        # 5. Clash Prevention: Faculty Double Booking (Sliding Window)
-        for f in self.data.faculty:
-            for d in self.days:
-                for s in self.slots:
-                    faculty_active_vars = []
-                    for w in f.workload:
-                        for r in self.rooms_map.keys():
-                            for offset in range(w.consecutive_hours):
-                                start_s = s - offset
-                                var_key = (f.id, w.id, r, d, start_s)
-                                if var_key in self.variables:
-                                    faculty_active_vars.append(self.variables[var_key])
-                    if faculty_active_vars:
-                        self.model.Add(sum(faculty_active_vars) <= 1)
-                        
+        # 4. Clash Prevention: Room Overlap (Sliding Window, read from the room pool bucket)
+        # A pool of k interchangeable rooms hosts at most k sessions per hour
+        with self.diagnostics.phase("constraints.room_overlap", self.model):
+            for (p_idx, _, _), bucket in self.room_occupancy.items():
+                capacity = len(self.room_pools[p_idx])
+                if len(bucket) > capacity:
+                    if capacity == 1:
+                        constraint = self.model.AddAtMostOne(variables[i] for i in bucket)
+                    else:
+                        constraint = self.model.Add(sum(variables[i] for i in bucket) <= capacity)
+                    self._guarded(constraint, "room", self._pool_name(p_idx))
+
+        # 5. Clash Prevention: Faculty Double Booking (Sliding Window, read from the faculty bucket)
+        with self.diagnostics.phase("constraints.faculty_overlap", self.model):
+            for (f_idx, _, _), bucket in self.faculty_occupancy.items():
+                if len(bucket) > 1:
+                    self._guarded(self.model.AddAtMostOne(variables[i] for i in bucket), "faculty_clash", self.data.faculty[f_idx].id)
+
         # 6. Clash Prevention: Batch/Division Overlap (Handling Merged Classes via Sliding Window)
-        targets = set()
-        for f in self.data.faculty:
-            for w in f.workload:
-                for t in w.target_groups:
-                    targets.add(t)
-                
-        for t_group in targets:
-            for d in self.days:
-                for s in self.slots:
-                    target_active_vars = []
-                    for f in self.data.faculty:
-                        for w in f.workload:
-                            if t_group in w.target_groups:
-                                for r in self.rooms_map.keys():
-                                    for offset in range(w.consecutive_hours):
-                                        start_s = s - offset
-                                        var_key = (f.id, w.id, r, d, start_s)
-                                        if var_key in self.variables:
-                                            target_active_vars.append(self.variables[var_key])
-                    if target_active_vars:
-                        self.model.Add(sum(target_active_vars) <= 1)
-                        
+        with self.diagnostics.phase("constraints.group_overlap", self.model):
+            for (g, _, _), bucket in self.group_occupancy.items():
+                if len(bucket) > 1:
+                    self._guarded(self.model.AddAtMostOne(variables[i] for i in bucket), "group_clash", g)
+
         # 6.5. Clash Prevention: Parent-Child Subgroup Conflict
-        # If Parent P has Theory, its sub-batches cannot have Lab/Tutorial at the exact same time
-        for parent_t in targets:
-            # Heuristic: P is parent of C if P is a proper substring of C (e.g., SY-A is in SY-A-B1)
-            children = [c for c in targets if parent_t in c and c != parent_t]
-            if not children:
+        # If Parent P has Theory, no group below it (sub-batch, sub-sub-batch...) can have
+        # Lab/Tutorial at the exact same time. One constraint per (subtree, day, hour).
+        with self.diagnostics.phase("constraints.parent_child", self.model):
+            for (parent_t, d_idx, t), session_vars in self.subtree_session_occupancy.items():
+                theory_vars = self.group_theory_occupancy.get((parent_t, d_idx, t))
+                if not theory_vars:
+                    continue
+                # Sibling batches may run labs side by side, so the subtree can host up to
+                # `width` parallel sessions; the parent's theory (at most one, see 6.) takes them all
+                width = min(len(session_vars), len(self.group_hierarchy.descendants[parent_t]))
+                if width == 1:
+                    constraint = self.model.AddAtMostOne(variables[i] for i in theory_vars + session_vars)
+                else:
+                    constraint = self.model.Add(cp_model.LinearExpr.WeightedSum(
+                        [variables[i] for i in session_vars + theory_vars],
+                        [1] * len(session_vars) + [width] * len(theory_vars)) <= width)
+                self._guarded(constraint, "parent_child", parent_t)
+
+        # 7. Custom Rules Engine Translation
+        # RESTRICT_TIME and FORCE_ROOM rules were applied as domain pruning in _compute_start_domains.
+        # A FORCE_PIN only reads the variables of the workloads it matched.
+        with self.diagnostics.phase("constraints.custom_rules", self.model):
+            for rule_id, matched, r_target, d_target, s_target in self.rules.pins:
+                if d_target not in self.days:
+                    continue
+                # Pinned rooms are never pooled, so matching the pool matches the room
+                target_pool = self.room_pool_of[self.room_index[r_target]]
+                d_pin = self.days.index(d_target)
+                for w_idx in matched:
+                    span = self.workloads[w_idx][1].consecutive_hours
+                    # Exactly one start time of the workload in the pinned room safely covers s_target
+                    pin_vars = []
+                    for v_idx in self.workload_vars[w_idx]:
+                        _, p_idx, d_idx, var_s = self.var_index[v_idx]
+                        if p_idx == target_pool and d_idx == d_pin and var_s <= s_target < var_s + span:
+                            pin_vars.append(variables[v_idx])
+                    if pin_vars:
+                        self._guarded(self.model.Add(sum(pin_vars) == 1), "custom_rule", rule_id)
+
+    def _teaching_runs(self) -> List[List[int]]:
+        """
+        The day's hours as runs of back-to-back slots; lunch and holes in time_slots end a run.
+        """
+        runs: List[List[int]] = []
+        for t in sorted(self.slots):
+            if t == self.data.college_settings.lunch_slot:
                 continue
-                
-            for d in self.days:
-                for s in self.slots:
-                    # Find active Theory variables for Parent
-                    parent_theory_vars = []
-                    for f in self.data.faculty:
-                        for w in f.workload:
-                            if w.type == "Theory" and parent_t in w.target_groups:
-                                for r in self.rooms_map.keys():
-                                    for offset in range(max(1, w.consecutive_hours)):
-                                        start_s = s - offset
-                                        var_key = (f.id, w.id, r, d, start_s)
-                                        if var_key in self.variables:
-                                            parent_theory_vars.append(self.variables[var_key])
-                                            
-                    if not parent_theory_vars:
+            if runs and runs[-1][-1] + 1 == t:
+                runs[-1].append(t)
+            else:
+                runs.append([t])
+        return runs
+
+    def _apply_soft_objectives(self):
+        """
+        Posts the weighted soft objectives of `solver_options.optimize` on top of the occupancy
+        buckets. Each penalty is one auxiliary literal per window or cell, never one term per
+        combination of session variables:
+
+            continuous_overrun  per (faculty, day, window of max_continuous_lectures + 1 hours),
+                                forced on when every hour of the window is taught
+            idle_gap            per (group, day, hour), forced on when the hour is free but the
+                                group has sessions before and after it (prefix / suffix chains)
+            day_spread          per (faculty, day) with any session
+
+        Groups are the leaves of the group hierarchy; their day includes every session of their
+        ancestors. Hours across lunch count as back-to-back for gaps but not for overruns.
+        """
+        variables = self.variables
+        weights = self.data.solver_options.objective_weights
+        runs = self._teaching_runs()
+        day_hours = [t for run in runs for t in run]
+        window = self.data.college_settings.max_continuous_lectures + 1
+        terms: Dict[str, List[cp_model.IntVar]] = {"continuous_overrun": [], "idle_gap": [], "day_spread": []}
+
+        for f_idx, f in enumerate(self.data.faculty):
+            faculty_days = []
+            for d_idx, d in enumerate(self.days):
+                cells = {t: self.faculty_occupancy.get((f_idx, d_idx, t)) for t in day_hours}
+                if not any(cells.values()):
+                    continue
+                # 9a. Sliding window: window - 1 taught hours are free, the window-th costs one literal
+                if weights.continuous_overrun:
+                    for run in runs:
+                        for i in range(len(run) - window + 1):
+                            span = [cells[t] for t in run[i:i + window]]
+                            if all(span):
+                                over = self.model.NewBoolVar(f"overrun_F-{f.id}_D-{d}_S-{run[i]}")
+                                self.model.Add(sum(variables[v] for cell in span for v in cell) <= window - 1 + over)
+                                terms["continuous_overrun"].append(over)
+                # 9b. Day spread: any taught hour switches the day on
+                if weights.day_spread:
+                    taught = [v for cell in cells.values() if cell for v in cell]
+                    works = self.model.NewBoolVar(f"works_F-{f.id}_D-{d}")
+                    self.model.Add(sum(variables[v] for v in taught) <= len(day_hours) * works)
+                    faculty_days.append(works)
+            if faculty_days:
+                # Redundant, but lifts the bound: the hours the sessions place need at least this
+                # many days (never more than the days the faculty member can teach on)
+                placed_hours = sum(w.hours // w.consecutive_hours * w.consecutive_hours if w.consecutive_hours > 0 else w.hours
+                                   for w in f.workload)
+                self.model.Add(sum(faculty_days) >= min(-(-placed_hours // len(day_hours)), len(faculty_days)))
+                terms["day_spread"].extend(faculty_days)
+
+        # 9c. Idle gaps: pre[i] / suf[i] are on once the group has had / will have a session by hour i
+        if weights.idle_gap and len(day_hours) >= 3:
+            leaves = [g for g, below in self.group_hierarchy.descendants.items() if not below]
+            for g in leaves:
+                attended = (g, *self.group_hierarchy.ancestors[g])
+                for d_idx, d in enumerate(self.days):
+                    cells = [[v for a in attended for v in self.group_occupancy.get((a, d_idx, t), ())] for t in day_hours]
+                    if sum(1 for cell in cells if cell) < 2:
                         continue
-                        
-                    for child_t in children:
-                        child_active_vars = []
-                        for f in self.data.faculty:
-                            for w in f.workload:
-                                if w.type in ["Practical", "Tutorial"] and child_t in w.target_groups:
-                                    for r in self.rooms_map.keys():
-                                        for offset in range(max(1, w.consecutive_hours)):
-                                            start_s = s - offset
-                                            var_key = (f.id, w.id, r, d, start_s)
-                                            if var_key in self.variables:
-                                                child_active_vars.append(self.variables[var_key])
-                        if child_active_vars:
-                            # A parent theory session and a child lab session are mutually exclusive
-                            self.model.Add(sum(parent_theory_vars) + sum(child_active_vars) <= 1)
-                        
-        # 7. Custom Rules Engine Translation
-        for rule in self.data.college_settings.custom_rules:
-             # Example mapping dynamic IF-THEN rules
-             if rule.condition_field == "subject" and rule.action_type == "RESTRICT_TIME":
-                  for (f_id, w_id, var_r, var_d, var_s), v in self.variables.items():
-                       faculty = self.faculty_map[f_id]
-                       workload = next(item for item in faculty.workload if item.id == w_id)
-                       
-                       if workload.subject == rule.condition_value:
-                            # Force 0 for any slot NOT in the allowed action_value array
-                            allowed_slots = [int(h.split(':')[0]) for h in rule.action_value]
-                            if var_s not in allowed_slots:
-                                 self.model.Add(v == 0)
-             
-             elif rule.action_type == "FORCE_PIN":
-                  w_id_target = rule.condition_value
-                  try:
-                       r_target, d_target, s_target = rule.action_value.split("|")
-                       s_target = int(s_target)
-                       
-                       # We need exactly one start_time for w_id, r_target, d_target that safely covers s_target
-                       pin_vars = []
-                       for (f_id, w_id, var_r, var_d, var_s), v in self.variables.items():
-                            if w_id == w_id_target and var_r == r_target and var_d == d_target:
-                                 w = next(item for item in self.faculty_map[f_id].workload if item.id == w_id)
-                                 if var_s <= s_target < var_s + w.consecutive_hours:
-                                     pin_vars.append(v)
-                       if pin_vars:
-                           self.model.Add(sum(pin_vars) == 1)
-                  except ValueError:
-                       pass # Safely ignore malformed pin strings
+                    pre = [self.model.NewBoolVar(f"pre_G-{g}_D-{d}_S-{t}") for t in day_hours]
+                    suf = [self.model.NewBoolVar(f"suf_G-{g}_D-{d}_S-{t}") for t in day_hours]
+                    for i, cell in enumerate(cells):
+                        if cell:
+                            self.model.Add(sum(variables[v] for v in cell) <= len(cell) * pre[i])
+                            self.model.Add(sum(variables[v] for v in cell) <= len(cell) * suf[i])
+                        if i > 0:
+                            self.model.AddImplication(pre[i - 1], pre[i])
+                            self.model.AddImplication(suf[i], suf[i - 1])
+                    for i in range(1, len(day_hours) - 1):
+                        gap = self.model.NewBoolVar(f"gap_G-{g}_D-{d}_S-{day_hours[i]}")
+                        self.model.Add(pre[i - 1] + suf[i + 1] - sum(variables[v] for v in cells[i]) <= 1 + gap)
+                        terms["idle_gap"].append(gap)
+
+        self.objective_terms = terms
+        self.model.Minimize(
+            weights.continuous_overrun * sum(terms["continuous_overrun"])
+            + weights.idle_gap * sum(terms["idle_gap"])
+            + weights.day_spread * sum(terms["day_spread"]))
+
+    def _objective_report(self, solver: cp_model.CpSolver, status: int) -> Dict[str, Any]:
+        """
+        Objective, best bound, relative gap, why the search ended, and the count of each penalty.
+        """
+        value = solver.ObjectiveValue()
+        bound = solver.BestObjectiveBound()
+        gap = abs(value - bound) / max(1.0, abs(value))
+        # CP-SAT also reports OPTIMAL when it stops on the gap limit
+        if status == cp_model.OPTIMAL and value == bound:
+            stopped_by = "optimal"
+        elif self.search_interrupted:
+            stopped_by = "stopped"
+        elif gap <= self.data.solver_options.relative_gap_limit:
+            stopped_by = "gap_limit"
+        else:
+            stopped_by = "time_limit"
+        values = self._solution_values(solver)
+        return {
+            "value": value,
+            "bound": bound,
+            "gap": round(gap, 6),
+            "stopped_by": stopped_by,
+            "terms": {name: int(sum(values[lit.Index()] for lit in lits)) for name, lits in self.objective_terms.items()},
+        }
+
+    def _extract_schedule(self, solver: cp_model.CpSolver):
+        """
+        Expands every active start-time variable into one schedule row per covered hour, giving
+        each pooled session a concrete room.
+        """
+        pooled: Dict[Tuple[int, int], List[Tuple[int, int]]] = defaultdict(list)
+        for v_idx in self._active_variables(solver):
+            w_idx, p_idx, d_idx, s = self.var_index[v_idx]
+            pooled[(p_idx, d_idx)].append((s, w_idx))
+
+        for (p_idx, d_idx), sessions in pooled.items():
+            # Interval partitioning: taking sessions by start hour and reusing any room that is free
+            # again always succeeds, because the pool capacity constraint bounds every hour's load.
+            free_from = {r_idx: None for r_idx in self.room_pools[p_idx]}
+            for s, w_idx in sorted(sessions):
+                r_idx = next(r for r, end in free_from.items() if end is None or end <= s)
+                free_from[r_idx] = s + max(1, self.workloads[w_idx][1].consecutive_hours)
+                self._append_session(w_idx, r_idx, d_idx, s)
+
+    def _solution_values(self, solver: cp_model.CpSolver) -> np.ndarray:
+        """
+        Every variable value of the current solution (solver or solution callback), indexed by proto index.
+        """
+        return np.fromiter(solver.response_proto.solution, dtype=np.int64)
+
+    def _active_variables(self, solver: cp_model.CpSolver) -> List[int]:
+        """
+        Indexes into self.variables of the literals set in the current solution, read in one
+        batch instead of one solver.Value() call per variable.
+        """
+        return np.flatnonzero(self._solution_values(solver)[self._variable_proto_index()]).tolist()
+
+    def _variable_proto_index(self) -> np.ndarray:
+        if self._proto_index is None or len(self._proto_index) != len(self.variables):
+            self._proto_index = np.fromiter((v.Index() for v in self.variables), dtype=np.int64, count=len(self.variables))
+        return self._proto_index
+
+    def _append_session(self, w_idx: int, r_idx: int, d_idx: int, s: int):
+        template = self._row_templates[w_idx]
+        room = self.room_ids[r_idx]
+        day = self.days[d_idx]
+
+        for offset in range(self.workloads[w_idx][1].consecutive_hours):
+            self.schedule.append({**template, "room": room, "day": day, "time_slot": s + offset})
+
+    def _hint_room_key(self, r_idx: int) -> int:
+        return self.room_pool_of[r_idx]
+
+    def _apply_solution_hint(self):
+        """
+        Warm start: hints the variables of a previous timetable's sessions to 1 and every other
+        variable of the same workloads to 0. Sessions that no longer exist in this model are skipped.
+        """
+        workload_lookup = {(self.data.faculty[f_idx].id, w.id): w_idx for w_idx, (f_idx, w) in enumerate(self.workloads)}
+        room_lookup = {room_id: r_idx for r_idx, room_id in enumerate(self.room_ids)}
+        day_lookup = {d: d_idx for d_idx, d in enumerate(self.days)}
+        var_lookup = {key: v_idx for v_idx, key in enumerate(self.var_index)}
+
+        hinted_on = set()
+        hinted_workloads = set()
+        for session in self.solution_hint:
+            w_idx = workload_lookup.get((session["faculty_id"], session["workload_id"]))
+            r_idx = room_lookup.get(session["room"])
+            d_idx = day_lookup.get(session["day"])
+            if w_idx is None or r_idx is None or d_idx is None:
+                continue
+            v_idx = var_lookup.get((w_idx, self._hint_room_key(r_idx), d_idx, session["start"]))
+            if v_idx is not None:
+                hinted_on.add(v_idx)
+                hinted_workloads.add(w_idx)
+
+        for w_idx in hinted_workloads:
+            for v_idx in self.workload_vars[w_idx]:
+                self.model.AddHint(self.variables[v_idx], 1 if v_idx in hinted_on else 0)
+
+    def _decision_strategy(self) -> Tuple[List[cp_model.IntVar], int, int]:
+        """
+        Search order hinted by profiles with `decision_strategy`: the start literals of the most
+        constrained workloads (fewest candidates per session) first, each tried at 1.
+        """
+        order = sorted(range(len(self.workloads)), key=lambda w_idx: len(self.workload_vars[w_idx]) / max(1, self.workloads[w_idx][1].hours))
+        variables = [self.variables[v_idx] for w_idx in order for v_idx in self.workload_vars[w_idx]]
+        return variables, cp_model.CHOOSE_FIRST, cp_model.SELECT_MAX_VALUE
+
+    def _apply_profile(self, solver: cp_model.CpSolver) -> str:
+        """
+        Configures `solver` with `solver_options.profile`. `auto` takes the tuned profile for this
+        model's size and the cores the solve may use (see solver/profiles.py).
+        """
+        name = self.data.solver_options.profile
+        source = "requested"
+        if name == AUTO_PROFILE:
+            cores = solver.parameters.num_workers or os.cpu_count() or 1
+            optimize = self.data.solver_options.optimize and self.SOFT_OBJECTIVES
+            name, source = tuned_profiles.select(len(self.model.Proto().variables), cores, optimize)
+        apply_profile(solver, name)
+        if profile_definition(name)["decision_strategy"]:
+            variables, variable_strategy, value_strategy = self._decision_strategy()
+            if variables:
+                self.model.AddDecisionStrategy(variables, variable_strategy, value_strategy)
+        self.diagnostics.profile = {"name": name, "source": source}
+        return name
+
+    def stop_search(self):
+        """
+        Interrupts a running solve from another thread; generate() then returns whatever was found.
+        """
+        self.search_interrupted = True
+        self.solver.StopSearch()
+
+    def search_progress(self) -> Dict[str, Any]:
+        """
+        Snapshot of the running search, safe to call from another thread.
+        """
+        if self.search_started_at is None:
+            return {"phase": "building_model", "elapsed_s": 0.0, "solutions": 0, "best_bound": None}
+        return {
+            "phase": "searching",
+            "elapsed_s": round(time.monotonic() - self.search_started_at, 3),
+            "solutions": self.solutions_found,
+            "best_bound": self.best_objective_bound,
+        }
+
+    def _record_bound(self, bound: float):
+        self.best_objective_bound = bound
 
     def generate(self) -> Dict[str, Any]:
         """
         Executes the CP-SAT Solver and extracts the matrix.
         """
-        self._create_variables()
+        diagnostics = self.diagnostics
+        with diagnostics.phase("create_variables"):
+            self._create_variables()
         self._apply_hard_constraints()
+        options = self.data.solver_options
+        if options.optimize and self.SOFT_OBJECTIVES:
+            with diagnostics.phase("objective", self.model):
+                self._apply_soft_objectives()
+        if self.solution_hint:
+            with diagnostics.phase("solution_hint"):
+                self._apply_solution_hint()
+        diagnostics.record_model(self.model)
         
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 10.0 
+        solver = self.solver
+        self._apply_profile(solver)
+        solver.parameters.max_time_in_seconds = options.max_time_in_seconds
+        # Time budget and gap target: whichever is reached first ends the search
+        solver.parameters.relative_gap_limit = options.relative_gap_limit
+        solver.best_bound_callback = self._record_bound
+        diagnostics.watch_solver(solver)
         
-        status = solver.Solve(self.model)
+        self.search_started_at = time.monotonic()
+        with diagnostics.phase("solve"):
+            if self.solution_listener is not None:
+                streamer = SolutionStreamer(self)
+                status = solver.Solve(self.model, streamer)
+                if streamer.error is not None:
+                    raise streamer.error
+            else:
+                status = solver.Solve(self.model)
+        diagnostics.record_solver(solver, status)
         
         if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-            for (f_id, w_id, r, d, s), v in self.variables.items():
-                if solver.Value(v) == 1:
-                    faculty = self.faculty_map[f_id]
-                    workload = next(item for item in faculty.workload if item.id == w_id)
-                    
-                    for offset in range(workload.consecutive_hours):
-                        self.schedule.append({
-                            "workload_id": w_id,
-                            "faculty_id": f_id,
-                            "faculty_name": faculty.name,
-                            "subject": workload.subject,
-                            "targets": workload.target_groups,
-                            "type": workload.type,
-                            "room": r,
-                            "day": d,
-                            "time_slot": s + offset
-                        })
+            self.schedule = []
+            with diagnostics.phase("extract_schedule"):
+                self._extract_schedule(solver)
             
-            return {
+            result = {
                 "status": "success",
                 "message": "Optimal edge-case-proof timetable generated.",
                 "total_classes": len(self.schedule),
-                "schedule": self.schedule
+                "pruned_candidates": self.pruned_candidates,
+                "schedule": self.schedule,
+                "diagnostics": diagnostics.to_dict()
             }
+            if self.objective_terms:
+                result["objective"] = self._objective_report(solver, status)
+            return result
         else:
             return {
                 "status": "infeasible",
                 "message": "Critical Failure: The constraints provided are mathematically impossible to map.",
-                "schedule": []
+                "schedule": [],
+                "diagnostics": diagnostics.to_dict()
             }
@@ -0,0 +1,95 @@
+import re
+from schemas.api_models import GenerationPayload
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+
+class GroupHierarchyError(ValueError):
+    pass
+
+
+class _TrieNode:
+    __slots__ = ("children", "group")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # Group whose name ends exactly at this node, if any
+        self.group: Optional[str] = None
+
+
+class GroupHierarchy:
+    """
+    Division -> batch -> sub-batch tree over the target groups of a payload.
+
+    A declared `college_settings.group_parents` map (child -> parent) is used as given. Otherwise
+    the tree is derived from the names: each name is split at the `group_delimiters` and inserted
+    into a token trie, and a group's ancestors are the groups ending on its trie path. `SY-A` is
+    therefore the parent of `SY-A-B1` but not of `SY-AB-B1`.
+
+    `ancestors[g]` holds every proper ancestor of `g`; `descendants[g]` every proper descendant.
+    """
+
+    def __init__(self, parents: Dict[str, Optional[str]]):
+        self.parents = parents
+        self.ancestors: Dict[str, FrozenSet[str]] = {}
+        for group in parents:
+            self.ancestors[group] = frozenset(self._walk_up(group))
+
+        descendants: Dict[str, set] = {group: set() for group in parents}
+        for group, above in self.ancestors.items():
+            for ancestor in above:
+                descendants[ancestor].add(group)
+        self.descendants: Dict[str, FrozenSet[str]] = {g: frozenset(d) for g, d in descendants.items()}
+
+    def _walk_up(self, group: str) -> List[str]:
+        chain = []
+        seen = {group}
+        parent = self.parents.get(group)
+        while parent is not None:
+            if parent in seen:
+                raise GroupHierarchyError(f"Group hierarchy has a cycle through '{parent}'.")
+            seen.add(parent)
+            chain.append(parent)
+            parent = self.parents.get(parent)
+        return chain
+
+    @classmethod
+    def from_payload(cls, data: GenerationPayload) -> "GroupHierarchy":
+        settings = data.college_settings
+        groups = list(dict.fromkeys(g for f in data.faculty for w in f.workload for g in w.target_groups))
+        if settings.group_parents:
+            return cls.declared(groups, settings.group_parents)
+        return cls.derived(groups, settings.group_delimiters)
+
+    @classmethod
+    def declared(cls, groups: Iterable[str], group_parents: Dict[str, str]) -> "GroupHierarchy":
+        parents: Dict[str, Optional[str]] = {g: None for g in groups}
+        for child, parent in group_parents.items():
+            if child == parent:
+                raise GroupHierarchyError(f"Group '{child}' is declared as its own parent.")
+            parents[child] = parent
+            parents.setdefault(parent, None)
+        return cls(parents)
+
+    @classmethod
+    def derived(cls, groups: Iterable[str], delimiters: str) -> "GroupHierarchy":
+        # Delimiters stay in the token stream, so `SY-A` and `SY_A` are different paths
+        splitter = re.compile(f"([{re.escape(delimiters)}])") if delimiters else None
+        root = _TrieNode()
+        paths: Dict[str, List[_TrieNode]] = {}
+        for group in groups:
+            node = root
+            path = []
+            tokens = splitter.split(group) if splitter else [group]
+            for token in tokens:
+                if not token:
+                    continue
+                node = node.children.setdefault(token, _TrieNode())
+                path.append(node)
+            node.group = group
+            paths[group] = path
+
+        parents: Dict[str, Optional[str]] = {}
+        for group, path in paths.items():
+            # Nearest group ending on the path above this one
+            parents[group] = next((n.group for n in reversed(path[:-1]) if n.group is not None), None)
+        return cls(parents)
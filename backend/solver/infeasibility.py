@@ -0,0 +1,150 @@
+import time
+from ortools.sat.python import cp_model
+from schemas.api_models import GenerationPayload
+from solver.engine import TimetableEngine
+from typing import Dict, Any, List, Optional, Tuple
+
+# Each minimisation step re-solves with one assumption dropped; steps share this slice of the budget
+MINIMISE_SHARE = 0.5
+BLOCKED_SLOTS_SHOWN = 6
+
+
+class InfeasibilityExplainer(TimetableEngine):
+    """
+    Diagnosis build of the boolean model. Every relaxable rule is guarded by an assumption
+    literal instead of being hard-wired:
+
+        shift / blocked_slot     per faculty (start times outside them exist but are forbidden)
+        custom_rule              per RESTRICT_TIME, FORCE_ROOM or FORCE_PIN rule
+        faculty_clash            per faculty double-booking family
+        group_clash              per group double-booking family
+        parent_child             per group subtree
+        room                     per room pool
+
+    Workload hours, lunch and the college day stay hard. One solve under all assumptions asks
+    CP-SAT for a sufficient set of conflicting rules; the set is then shrunk by dropping one
+    assumption at a time while the remaining budget allows, so the reported core is minimal
+    whenever `minimal` is true. Model building, the first solve and the shrinking all come out
+    of the one `time_limit`.
+    """
+
+    def __init__(self, data: GenerationPayload):
+        super().__init__(data)
+        self.relax_domains = True
+        # (family, entity) -> assumption literal, in creation order
+        self.assumptions: Dict[Tuple[str, str], cp_model.IntVar] = {}
+
+    def _assumption(self, family: str, entity: str) -> cp_model.IntVar:
+        key = (family, entity)
+        if key not in self.assumptions:
+            self.assumptions[key] = self.model.NewBoolVar(f"assume_{family}_{entity}")
+        return self.assumptions[key]
+
+    def _guarded(self, constraint: cp_model.Constraint, family: str, entity: str) -> cp_model.Constraint:
+        return constraint.OnlyEnforceIf(self._assumption(family, entity))
+
+    def _apply_start_guards(self):
+        """
+        A start time or room kept only because domains are relaxed is forbidden by each rule it breaks.
+        """
+        guarded_vars: Dict[Tuple[str, str], List[cp_model.IntVar]] = {}
+        for v_idx, (w_idx, p_idx, d_idx, s) in enumerate(self.var_index):
+            # Rooms in a pool are named by the same FORCE_ROOM rules, so any one of them stands for the pool
+            room_keys = self.room_guards.get((w_idx, self.room_pools[p_idx][0]), ())
+            for key in (*self.start_guards.get((w_idx, d_idx, s), ()), *room_keys):
+                guarded_vars.setdefault(key, []).append(self.variables[v_idx])
+        for (family, entity), variables in guarded_vars.items():
+            self.model.AddBoolAnd([v.Not() for v in variables]).OnlyEnforceIf(self._assumption(family, entity))
+
+    def _unplaceable_workloads(self) -> List[Dict[str, Any]]:
+        """
+        Workloads that cannot run even with every rule relaxed (no tag-compatible room, or no
+        start time clear of lunch and the end of the day).
+        """
+        rows = []
+        for w_idx, (f_idx, w) in enumerate(self.workloads):
+            if not self.valid_rooms[w_idx]:
+                reason = f"no room has all of the tags {w.required_tags}"
+            elif not self.workload_vars[w_idx]:
+                reason = f"no {max(1, w.consecutive_hours)}-hour block fits between lunch and the end of the day"
+            else:
+                continue
+            rows.append({"faculty_id": self.data.faculty[f_idx].id, "workload_id": w.id, "reason": reason})
+        return rows
+
+    def _describe(self, family: str, entity: str) -> str:
+        if family in ("shift", "blocked_slot", "faculty_clash"):
+            f = self.faculty_map[entity]
+            if family == "shift":
+                return f"{f.name} ({f.id}) only works hours {f.shift}"
+            if family == "blocked_slot":
+                slots = ", ".join(f"{b.day} {b.time}" for b in f.blocked_slots[:BLOCKED_SLOTS_SHOWN])
+                more = f" and {len(f.blocked_slots) - BLOCKED_SLOTS_SHOWN} more" if len(f.blocked_slots) > BLOCKED_SLOTS_SHOWN else ""
+                return f"{f.name} ({f.id}) is unavailable at {slots}{more}"
+            return f"{f.name} ({f.id}) cannot teach two sessions at once"
+        if family == "custom_rule":
+            rule = self.rules.rules[entity]
+            return (f"Rule {rule.id}: if {rule.condition_field} {rule.condition_operator} '{rule.condition_value}' "
+                    f"then {rule.action_type} {rule.action_value}")
+        if family == "group_clash":
+            return f"Group '{entity}' cannot attend two sessions at once"
+        if family == "parent_child":
+            return f"Theory for '{entity}' cannot overlap labs/tutorials of its sub-groups"
+        return f"Room pool {entity} hosts one session per room per hour"
+
+    def _solve_under(self, literals: List[cp_model.IntVar], time_limit: float) -> Tuple[int, cp_model.CpSolver]:
+        self.model.ClearAssumptions()
+        self.model.AddAssumptions(literals)
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = max(time_limit, 0.01)
+        return solver.Solve(self.model), solver
+
+    def explain(self, time_limit: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Returns {"status", "core", "minimal", "unplaceable_workloads", "elapsed_s"}. `status` is
+        "infeasible" with a core of conflicting rules, "feasible" when the payload turns out to be
+        solvable (the original search ran out of time), or "unknown" when the budget ran out.
+        `time_limit` defaults to `max_time_in_seconds`; a job passes what is left of its budget.
+        """
+        started = time.monotonic()
+        budget = time_limit if time_limit is not None else self.data.solver_options.max_time_in_seconds
+        remaining = lambda: budget - (time.monotonic() - started)
+        if remaining() <= 0:
+            return {"status": "unknown", "core": [], "minimal": False, "unplaceable_workloads": [], "elapsed_s": 0.0}
+        with self.diagnostics.phase("create_variables"):
+            self._create_variables()
+        self._apply_hard_constraints()
+        with self.diagnostics.phase("constraints.assumptions", self.model):
+            self._apply_start_guards()
+
+        keys = list(self.assumptions)
+        literal_index = {self.assumptions[key].Index(): key for key in keys}
+        report = {"status": "unknown", "core": [], "minimal": False, "unplaceable_workloads": self._unplaceable_workloads()}
+
+        if remaining() <= 0:
+            report["elapsed_s"] = round(time.monotonic() - started, 3)
+            return report
+        status, solver = self._solve_under([self.assumptions[key] for key in keys], remaining() * (1 - MINIMISE_SHARE))
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            report["status"] = "feasible"
+        elif status == cp_model.INFEASIBLE:
+            core = [literal_index[i] for i in solver.SufficientAssumptionsForInfeasibility() if i in literal_index]
+            report["status"] = "infeasible"
+            report["minimal"] = True
+            # Deletion filter: an assumption stays only if the rest of the core is feasible without it
+            for key in list(core):
+                time_left = remaining()
+                if time_left <= 0:
+                    report["minimal"] = False
+                    break
+                trial = [k for k in core if k != key]
+                trial_status, _ = self._solve_under([self.assumptions[k] for k in trial], time_left)
+                if trial_status == cp_model.INFEASIBLE:
+                    core = trial
+                elif trial_status != cp_model.OPTIMAL and trial_status != cp_model.FEASIBLE:
+                    report["minimal"] = False
+            report["core"] = [{"family": family, "entity": entity, "description": self._describe(family, entity)}
+                              for family, entity in core]
+
+        report["elapsed_s"] = round(time.monotonic() - started, 3)
+        return report
@@ -0,0 +1,84 @@
+import os
+import re
+import time
+from contextlib import contextmanager
+from ortools.sat.python import cp_model
+from typing import Dict, Any, List, Optional
+
+_SEARCH_START = re.compile(r"^Starting search at ([0-9.]+)s")
+# Debug only: turns on the CP-SAT search log (formatted and passed to Python line by line) to
+# time presolve. Off, `presolve_s` is None and the solve pays nothing for diagnostics.
+SOLVER_LOG_TIMINGS = os.environ.get("SATIS_SOLVER_LOG_TIMINGS", "0") == "1"
+
+
+class EngineDiagnostics:
+    """
+    Per-generation timings and model statistics.
+
+    Every `phase()` block records its wall time and, when given the model, how many constraints
+    it posted. `record_solver()` keeps the response statistics (wall, user and deterministic
+    time, search counters). With SATIS_SOLVER_LOG_TIMINGS=1, `watch_solver()` also reads the
+    presolve time off the CP-SAT log (only the one line that announces the search is parsed).
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.model_size: Dict[str, int] = {}
+        self.solver_stats: Dict[str, Any] = {}
+        # {"name", "source"} of the solver profile the search ran with
+        self.profile: Dict[str, str] = {}
+        self.presolve_s: Optional[float] = None
+        # Payload problems the engine tolerated (e.g. custom rules naming unknown rooms)
+        self.warnings: List[str] = []
+
+    @contextmanager
+    def phase(self, name: str, model: Optional[cp_model.CpModel] = None):
+        constraints_before = len(model.Proto().constraints) if model is not None else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.phases.setdefault(name, {"seconds": 0.0})
+            entry["seconds"] += time.perf_counter() - start
+            if model is not None:
+                entry["constraints"] = entry.get("constraints", 0) + len(model.Proto().constraints) - constraints_before
+
+    def record_model(self, model: cp_model.CpModel):
+        proto = model.Proto()
+        self.model_size = {"variables": len(proto.variables), "constraints": len(proto.constraints)}
+
+    def watch_solver(self, solver: cp_model.CpSolver):
+        if not SOLVER_LOG_TIMINGS:
+            return
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.log_callback = self._read_log_line
+
+    def _read_log_line(self, line: str):
+        if self.presolve_s is None:
+            match = _SEARCH_START.match(line)
+            if match:
+                self.presolve_s = float(match.group(1))
+
+    def record_solver(self, solver: cp_model.CpSolver, status: int):
+        response = solver.response_proto
+        self.solver_stats = {
+            "status": solver.StatusName(status),
+            "wall_time_s": response.wall_time,
+            "user_time_s": response.user_time,
+            "deterministic_time": response.deterministic_time,
+            "presolve_s": self.presolve_s,
+            "conflicts": response.num_conflicts,
+            "branches": response.num_branches,
+            "booleans": response.num_booleans,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "phases": {name: {k: round(v, 6) if isinstance(v, float) else v for k, v in entry.items()}
+                       for name, entry in self.phases.items()},
+            "model": self.model_size,
+            "solver": self.solver_stats,
+            "profile": self.profile,
+            "warnings": self.warnings,
+        }
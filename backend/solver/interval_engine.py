@@ -0,0 +1,209 @@
+from ortools.sat.python import cp_model
+from schemas.api_models import GenerationPayload
+from solver.engine import TimetableEngine
+from typing import Dict, List, Tuple
+from collections import defaultdict
+
+class IntervalTimetableEngine(TimetableEngine):
+    """
+    Interval formulation of the same timetable model.
+
+    Every required session is one interval on a week-long time axis whose start is restricted to
+    the pre-filtered (day, start_slot) domain. Room choice is a set of optional intervals (one per
+    tag-compatible room) and every clash family is a single AddNoOverlap, so model size grows with
+    sessions x rooms instead of sessions x rooms x days x slots.
+    """
+
+    # Sessions are intervals, not per-hour literals, so there are no occupancy buckets to penalise
+    SOFT_OBJECTIVES = False
+
+    def __init__(self, data: GenerationPayload):
+        super().__init__(data)
+        # Week axis: day d, hour h -> d * day_length + (h - first_hour). The extra hour in
+        # day_length keeps a session from ever touching the next day.
+        self.first_hour = min(self.slots) if self.slots else 0
+        self.day_length = (max(self.slots) - self.first_hour + 2) if self.slots else 1
+
+        # sessions[i] = (workload_idx, start_var, interval, {room_idx: presence_literal})
+        self.sessions: List[Tuple[int, cp_model.IntVar, cp_model.IntervalVar, Dict[int, cp_model.IntVar]]] = []
+        self.workload_sessions: List[List[int]] = [[] for _ in self.workloads]
+
+    def _to_axis(self, d_idx: int, hour: int) -> int:
+        return d_idx * self.day_length + (hour - self.first_hour)
+
+    def _from_axis(self, t: int) -> Tuple[int, int]:
+        d_idx, offset = divmod(t, self.day_length)
+        return d_idx, offset + self.first_hour
+
+    def _create_variables(self):
+        """
+        Creates one start variable and interval per session, plus an optional interval per
+        candidate room. Exactly one room interval is present for each session.
+        """
+        self._compute_start_domains()
+
+        for w_idx, (f_idx, w) in enumerate(self.workloads):
+            valid_rooms = self.valid_rooms[w_idx]
+            if not valid_rooms:
+                continue
+
+            span = max(1, w.consecutive_hours)
+            events_needed = w.hours // w.consecutive_hours if w.consecutive_hours > 0 else w.hours
+            starts = sorted(self._to_axis(d_idx, s) for d_idx, s in self.start_domains[w_idx])
+            if not starts:
+                # Whole domain pruned: the workload can never be fulfilled
+                self.model.AddBoolOr([])
+                continue
+
+            domain = cp_model.Domain.FromValues(starts)
+            previous_start = None
+            for e in range(events_needed):
+                tag = f"F-{self.data.faculty[f_idx].id}_W-{w.id}_E-{e}"
+                start = self.model.NewIntVarFromDomain(domain, f"start_{tag}")
+                interval = self.model.NewFixedSizeIntervalVar(start, span, f"iv_{tag}")
+
+                presence = {}
+                for r_idx in valid_rooms:
+                    lit = self.model.NewBoolVar(f"in_{tag}_R-{self.room_ids[r_idx]}")
+                    presence[r_idx] = lit
+                self.model.AddExactlyOne(presence.values())
+
+                # Sessions of one workload are interchangeable: fix their order
+                if previous_start is not None:
+                    self.model.Add(start > previous_start)
+                previous_start = start
+
+                self.workload_sessions[w_idx].append(len(self.sessions))
+                self.sessions.append((w_idx, start, interval, presence))
+
+    def _apply_hard_constraints(self):
+        """
+        Posts the clash families as NoOverlap constraints over session intervals.
+        Shift, lunch, blocked-slot and RESTRICT_TIME limits already live in the start domains.
+        """
+        room_intervals: Dict[int, List[cp_model.IntervalVar]] = defaultdict(list)
+        faculty_intervals: Dict[int, List[cp_model.IntervalVar]] = defaultdict(list)
+        group_intervals: Dict[str, List[cp_model.IntervalVar]] = defaultdict(list)
+        group_theory: Dict[str, List[cp_model.IntervalVar]] = defaultdict(list)
+        # Practical/Tutorial sessions anywhere below a group in the hierarchy
+        subtree_sessions: Dict[str, List[cp_model.IntervalVar]] = defaultdict(list)
+
+        # Optional room intervals are interval constraints themselves, so they are timed as one
+        with self.diagnostics.phase("constraints.room_intervals", self.model):
+            for w_idx, start, interval, presence in self.sessions:
+                f_idx, w = self.workloads[w_idx]
+                span = max(1, w.consecutive_hours)
+                for r_idx, lit in presence.items():
+                    room_intervals[r_idx].append(self.model.NewOptionalFixedSizeIntervalVar(
+                        start, span, lit, f"{interval.Name()}_R-{self.room_ids[r_idx]}"))
+
+                faculty_intervals[f_idx].append(interval)
+                for g in w.target_groups:
+                    group_intervals[g].append(interval)
+                    if w.type == "Theory":
+                        group_theory[g].append(interval)
+                for a in self.session_ancestors[w_idx]:
+                    subtree_sessions[a].append(interval)
+
+            # A blocked room hour is a fixed interval the room's sessions cannot overlap
+            for r_idx, intervals in room_intervals.items():
+                for d_idx, hour in sorted(self.pool_blocked[self.room_pool_of[r_idx]]):
+                    if hour in self.slot_set:
+                        intervals.append(self.model.NewFixedSizeIntervalVar(
+                            self._to_axis(d_idx, hour), 1, f"blocked_R-{self.room_ids[r_idx]}_{d_idx}_{hour}"))
+
+        # 4. Clash Prevention: Room Overlap
+        with self.diagnostics.phase("constraints.room_overlap", self.model):
+            for intervals in room_intervals.values():
+                if len(intervals) > 1:
+                    self.model.AddNoOverlap(intervals)
+
+        # 5. Clash Prevention: Faculty Double Booking
+        with self.diagnostics.phase("constraints.faculty_overlap", self.model):
+            for intervals in faculty_intervals.values():
+                if len(intervals) > 1:
+                    self.model.AddNoOverlap(intervals)
+
+        # 6. Clash Prevention: Batch/Division Overlap
+        with self.diagnostics.phase("constraints.group_overlap", self.model):
+            for intervals in group_intervals.values():
+                if len(intervals) > 1:
+                    self.model.AddNoOverlap(intervals)
+
+        # 6.5. Clash Prevention: Parent-Child Subgroup Conflict
+        # One constraint per subtree: sibling batches may run sessions side by side (up to
+        # `width` at once) while a parent theory session needs the whole subtree to itself
+        with self.diagnostics.phase("constraints.parent_child", self.model):
+            for parent_t, sessions in subtree_sessions.items():
+                parent_theory = group_theory.get(parent_t)
+                if not parent_theory:
+                    continue
+                width = min(len(sessions), len(self.group_hierarchy.descendants[parent_t]))
+                if width == 1:
+                    self.model.AddNoOverlap(parent_theory + sessions)
+                else:
+                    self.model.AddCumulative(parent_theory + sessions,
+                                             [width] * len(parent_theory) + [1] * len(sessions), width)
+
+        # 7. Custom Rules Engine Translation
+        # FORCE_PIN: exactly one session of each matched workload sits in the pinned room and covers the slot
+        with self.diagnostics.phase("constraints.custom_rules", self.model):
+            for rule_id, matched, r_target, d_target, s_target in self.rules.pins:
+                if d_target not in self.days:
+                    continue
+                r_idx = self.room_index[r_target]
+                pinned_at = self._to_axis(self.days.index(d_target), s_target)
+
+                for w_idx in matched:
+                    span = max(1, self.workloads[w_idx][1].consecutive_hours)
+                    pin_lits = []
+                    for i in self.workload_sessions[w_idx]:
+                        _, start, _, presence = self.sessions[i]
+                        if r_idx not in presence:
+                            continue
+                        pinned = self.model.NewBoolVar(f"pin_{rule_id}_{i}")
+                        self.model.AddImplication(pinned, presence[r_idx])
+                        self.model.Add(start <= pinned_at).OnlyEnforceIf(pinned)
+                        self.model.Add(start > pinned_at - span).OnlyEnforceIf(pinned)
+                        pin_lits.append(pinned)
+                    if pin_lits:
+                        self.model.Add(sum(pin_lits) == 1)
+
+    def _decision_strategy(self) -> Tuple[List[cp_model.IntVar], int, int]:
+        """
+        Session starts of the most constrained workloads first, each tried at its earliest hour.
+        """
+        order = sorted(range(len(self.workloads)), key=lambda w_idx: len(self.start_domains[w_idx]))
+        variables = [self.sessions[i][1] for w_idx in order for i in self.workload_sessions[w_idx]]
+        return variables, cp_model.CHOOSE_FIRST, cp_model.SELECT_MIN_VALUE
+
+    def _apply_solution_hint(self):
+        """
+        Warm start: hints each workload's session starts (in order) and rooms from a previous timetable.
+        """
+        workload_lookup = {(self.data.faculty[f_idx].id, w.id): w_idx for w_idx, (f_idx, w) in enumerate(self.workloads)}
+        room_lookup = {room_id: r_idx for r_idx, room_id in enumerate(self.room_ids)}
+        day_lookup = {d: d_idx for d_idx, d in enumerate(self.days)}
+
+        hinted: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        for session in self.solution_hint:
+            w_idx = workload_lookup.get((session["faculty_id"], session["workload_id"]))
+            r_idx = room_lookup.get(session["room"])
+            d_idx = day_lookup.get(session["day"])
+            if w_idx is not None and r_idx is not None and d_idx is not None:
+                hinted[w_idx].append((self._to_axis(d_idx, session["start"]), r_idx))
+
+        for w_idx, placements in hinted.items():
+            # Sessions of a workload are ordered by start, so hint them in the same order
+            for i, (t, r_idx) in zip(self.workload_sessions[w_idx], sorted(placements)):
+                _, start, _, presence = self.sessions[i]
+                self.model.AddHint(start, t)
+                for room, lit in presence.items():
+                    self.model.AddHint(lit, 1 if room == r_idx else 0)
+
+    def _extract_schedule(self, solver: cp_model.CpSolver):
+        values = self._solution_values(solver)
+        for w_idx, start, _, presence in self.sessions:
+            d_idx, s = self._from_axis(int(values[start.Index()]))
+            r_idx = next(r for r, lit in presence.items() if values[lit.Index()])
+            self._append_session(w_idx, r_idx, d_idx, s)
@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+from ortools.sat.python import cp_model
+from typing import Dict, Any, List, Optional, Tuple
+
+AUTO_PROFILE = "auto"
+# Used by `auto` when no tuned profile table exists or none of its entries fits
+DEFAULT_PROFILE = "balanced"
+
+# Named CP-SAT configurations selectable through `solver_options.profile`. `parameters` are
+# SatParameters fields (enum fields by member name); with `decision_strategy` the engine's
+# _decision_strategy() order is added to the model as a search hint.
+SOLVER_PROFILES: Dict[str, Dict[str, Any]] = {
+    "fast-first-feasible": {
+        "parameters": {
+            "search_branching": "PORTFOLIO_WITH_QUICK_RESTART_SEARCH",
+            "linearization_level": 0,
+            "max_presolve_iterations": 1,
+            "symmetry_level": 1,
+            "random_seed": 0,
+        },
+        "decision_strategy": True,
+    },
+    "balanced": {
+        "parameters": {},
+        "decision_strategy": False,
+    },
+    "thorough": {
+        "parameters": {
+            "linearization_level": 2,
+            "symmetry_level": 4,
+            "max_presolve_iterations": 6,
+        },
+        "decision_strategy": False,
+    },
+}
+
+# Upper bounds of the instance-size buckets the tuner reports on, in model variables (None: unbounded)
+SIZE_BUCKETS: Tuple[Optional[int], ...] = (2_000, 20_000, 100_000, None)
+
+
+def size_bucket(num_variables: int) -> Optional[int]:
+    return next(bound for bound in SIZE_BUCKETS if bound is None or num_variables <= bound)
+
+
+def profile_definition(name: str) -> Dict[str, Any]:
+    """
+    {"parameters", "decision_strategy"} of a named profile or of a profile the tuned table defines.
+    """
+    return SOLVER_PROFILES.get(name) or tuned_profiles.profiles()[name]
+
+
+def apply_profile(solver: cp_model.CpSolver, name: str):
+    """
+    Sets the profile's SatParameters on `solver`. An explicit `num_workers` already on the
+    solver (e.g. a decomposition component's share of the cores) is left alone.
+    """
+    set_parameters(solver, profile_definition(name)["parameters"])
+
+
+def set_parameters(solver: cp_model.CpSolver, parameters: Dict[str, Any]):
+    """
+    Sets SatParameters fields on `solver`; enum fields may be given by member name.
+    """
+    params = solver.parameters
+    for key, value in parameters.items():
+        if isinstance(value, str):
+            value = getattr(type(getattr(params, key)), value)
+        setattr(params, key, value)
+
+
+class TunedProfiles:
+    """
+    The profile table written by `python -m benchmarks.tune_profiles` on the deployment's own
+    hardware: the SatParameters combinations that won on the corpus, as named profiles, and for
+    each size bucket, core count and objective mode (first feasible vs `optimize`) it was measured
+    on, the name of the winner. Read on first use; `auto` requests pick the entry of their model's
+    size bucket and objective mode with the most cores not above the cores available to the solve.
+    No table is shipped, so until one is written `auto` means `balanced`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Optional[List[Dict[str, Any]]] = None
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _read(self):
+        if self._entries is not None:
+            return
+        try:
+            with open(self.path) as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            table = {}
+        self._profiles = {name: {"parameters": dict(profile.get("parameters", {})),
+                                 "decision_strategy": bool(profile.get("decision_strategy", False))}
+                          for name, profile in table.get("profiles", {}).items()}
+        known = set(SOLVER_PROFILES) | set(self._profiles)
+        self._entries = [e for e in table.get("entries", []) if e.get("profile") in known]
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._read()
+            return self._entries
+
+    def profiles(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._read()
+            return self._profiles
+
+    def select(self, num_variables: int, cores: int, optimize: bool = False) -> Tuple[str, str]:
+        """
+        (profile name, "tuned" or "default") for a model of `num_variables` solved on `cores` workers.
+        """
+        bucket = size_bucket(num_variables)
+        candidates = [e for e in self.entries() if e["max_variables"] == bucket and e.get("optimize", False) == optimize]
+        fitting = [e for e in candidates if e["cores"] <= cores]
+        if fitting:
+            return max(fitting, key=lambda e: e["cores"])["profile"], "tuned"
+        if candidates:
+            return min(candidates, key=lambda e: e["cores"])["profile"], "tuned"
+        return DEFAULT_PROFILE, "default"
+
+    def reload(self):
+        with self._lock:
+            self._entries = None
+            self._profiles = {}
+
+
+tuned_profiles = TunedProfiles(
+    os.environ.get("SATIS_TUNED_PROFILES", os.path.join(os.path.dirname(__file__), "tuned_profiles.json"))
+)
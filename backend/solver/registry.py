@@ -0,0 +1,10 @@
+from solver.engine import TimetableEngine
+from solver.interval_engine import IntervalTimetableEngine
+from solver.two_phase_engine import TwoPhaseTimetableEngine
+
+# Model formulations selectable through `solver_options.engine_mode`
+ENGINE_MODES = {
+    "boolean": TimetableEngine,
+    "interval": IntervalTimetableEngine,
+    "two_phase": TwoPhaseTimetableEngine,
+}
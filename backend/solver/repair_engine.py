@@ -0,0 +1,282 @@
+import time
+from ortools.sat.python import cp_model
+from schemas.api_models import GenerationPayload, ChangeSet
+from solver.engine import TimetableEngine
+from solver.two_phase_engine import TwoPhaseTimetableEngine, RoomAssignmentError
+from typing import Dict, Any, List, Optional, Set, Tuple
+from collections import defaultdict
+
+# (room_idx, day_idx, start_slot) of one session
+Placement = Tuple[int, int, int]
+
+
+class NeighbourhoodEngine(TimetableEngine):
+    """
+    One repair step: workloads outside `free` keep exactly their previous sessions, workloads in
+    `free` may move but are steered back to their previous sessions by the objective.
+
+    Room pools work as in TimetableEngine. When rooms are handed out, kept sessions go back to
+    their previous room first and the free sessions fill the rooms that are left.
+    """
+
+    # The keep-previous-sessions objective takes the place of the soft objectives
+    SOFT_OBJECTIVES = False
+
+    def __init__(self, data: GenerationPayload, placements: List[Set[Placement]], free: Set[int]):
+        self.placements = placements
+        self.free = free
+        # (w_idx, room_idx, day_idx, start_slot) of every session in the repaired timetable
+        self.placed: List[Tuple[int, int, int, int]] = []
+        # time.monotonic() by which the step, exact room matching included, must be done
+        self._deadline = time.monotonic() + data.solver_options.max_time_in_seconds
+        super().__init__(data)
+
+    def _compute_start_domains(self):
+        """
+        Collapses the domain of every fixed workload to its previous rooms and start times.
+        """
+        super()._compute_start_domains()
+        for w_idx, placements in enumerate(self.placements):
+            if w_idx in self.free:
+                continue
+            starts = {(d_idx, s) for _, d_idx, s in placements}
+            rooms = {r_idx for r_idx, _, _ in placements}
+            self.start_domains[w_idx] = [ds for ds in self.start_domains[w_idx] if ds in starts]
+            self.valid_rooms[w_idx] = [r_idx for r_idx in self.valid_rooms[w_idx] if r_idx in rooms]
+
+    def _apply_hard_constraints(self):
+        super()._apply_hard_constraints()
+
+        # 8. Repair: fixed workloads keep their sessions, free ones prefer to
+        with self.diagnostics.phase("constraints.repair", self.model):
+            kept = []
+            for w_idx, placements in enumerate(self.placements):
+                previous = {(self.room_pool_of[r_idx], d_idx, s) for r_idx, d_idx, s in placements}
+                for v_idx in self.workload_vars[w_idx]:
+                    _, p_idx, d_idx, s = self.var_index[v_idx]
+                    unchanged = (p_idx, d_idx, s) in previous
+                    if w_idx not in self.free:
+                        if not unchanged:
+                            # Cross combination of two previous sessions (room of one, time of another)
+                            self.model.Add(self.variables[v_idx] == 0)
+                    elif unchanged:
+                        kept.append(self.variables[v_idx])
+                        self.model.AddHint(self.variables[v_idx], 1)
+            if kept:
+                self.model.Maximize(sum(kept))
+
+    def _extract_schedule(self, solver: cp_model.CpSolver):
+        """
+        Fixed sessions return to their previous room; free sessions take their previous room if
+        it is still free, otherwise any free room of the pool.
+        """
+        pooled: Dict[Tuple[int, int], List[Tuple[int, int]]] = defaultdict(list)
+        for v_idx in self._active_variables(solver):
+            w_idx, p_idx, d_idx, s = self.var_index[v_idx]
+            pooled[(p_idx, d_idx)].append((s, w_idx))
+
+        self.placed = []
+        for (p_idx, d_idx), sessions in pooled.items():
+            pool = self.room_pools[p_idx]
+            busy: Dict[int, Set[int]] = {r_idx: set() for r_idx in pool}
+            assigned: Dict[Tuple[int, int], int] = {}
+            # Fixed sessions first, then free ones by start hour
+            for s, w_idx in sorted(sessions, key=lambda session: (session[1] in self.free, session[0])):
+                hours = set(range(s, s + max(1, self.workloads[w_idx][1].consecutive_hours)))
+                previous = [r for r, d, start in self.placements[w_idx] if d == d_idx and start == s and r in busy]
+                r_idx = next((r for r in previous + pool if not busy[r] & hours), None)
+                if r_idx is None:
+                    assigned = self._match_rooms(p_idx, d_idx, sessions, self._deadline - time.monotonic())
+                    break
+                busy[r_idx] |= hours
+                assigned[(s, w_idx)] = r_idx
+
+            for (s, w_idx), r_idx in assigned.items():
+                self.placed.append((w_idx, r_idx, d_idx, s))
+                self._append_session(w_idx, r_idx, d_idx, s)
+
+    def _match_rooms(self, p_idx: int, d_idx: int, sessions: List[Tuple[int, int]],
+                     time_limit: float) -> Dict[Tuple[int, int], int]:
+        """
+        Exact room matching for one pool and day when the greedy pass gets stuck on the rooms
+        kept sessions are pinned to. `time_limit` is what is left of the step's budget.
+        """
+        model = cp_model.CpModel()
+        choices: Dict[Tuple[int, int], Dict[int, cp_model.IntVar]] = {}
+        room_hours: Dict[Tuple[int, int], List[cp_model.IntVar]] = defaultdict(list)
+        for s, w_idx in sessions:
+            previous = {r for r, d, start in self.placements[w_idx] if d == d_idx and start == s}
+            rooms = previous & set(self.room_pools[p_idx]) if w_idx not in self.free else self.room_pools[p_idx]
+            lits = {r_idx: model.NewBoolVar(f"R_{w_idx}_{s}_{r_idx}") for r_idx in rooms}
+            model.AddExactlyOne(lits.values())
+            for r_idx, lit in lits.items():
+                for offset in range(max(1, self.workloads[w_idx][1].consecutive_hours)):
+                    room_hours[(r_idx, s + offset)].append(lit)
+            choices[(s, w_idx)] = lits
+        for lits in room_hours.values():
+            if len(lits) > 1:
+                model.AddAtMostOne(lits)
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = max(time_limit, TwoPhaseTimetableEngine.PHASE2_MIN_TIME_S)
+        if solver.Solve(model) not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            raise RoomAssignmentError(f"Kept sessions leave no room matching on {self.days[d_idx]}")
+        return {key: next(r for r, lit in lits.items() if solver.BooleanValue(lit)) for key, lits in choices.items()}
+
+
+class RepairTimetableEngine:
+    """
+    Incremental re-solve of an existing timetable after a small change.
+
+    Every session of the previous timetable stays where it was except those of the workloads the
+    change touches: workloads of the changed faculty, workloads targeting changed groups, sessions
+    in changed rooms, and any session the updated payload no longer allows. If that neighbourhood
+    cannot be repaired it is widened step by step (workloads sharing a faculty, a group or a room
+    on the same day with a freed one) until, as a last resort, the whole timetable is re-opened.
+    Within each step the solver moves as few sessions as possible.
+
+    Repairs always use the boolean formulation, whatever `engine_mode` the payload names.
+    """
+
+    REPAIR_STEP_TIME_S = 1.0
+
+    def __init__(self, data: GenerationPayload, previous_sessions: List[Dict[str, Any]], changes: Optional[ChangeSet] = None):
+        self.data = data
+        self.previous_sessions = previous_sessions
+        self.changes = changes or ChangeSet()
+        # Same optional hooks as TimetableEngine, so the job manager can drive either
+        self.solution_listener = None
+        self.solution_hint = None
+        self._step: Optional[NeighbourhoodEngine] = None
+        self._stopped = False
+
+    def _previous_placements(self, base: TimetableEngine) -> Tuple[List[Set[Placement]], Set[int], int]:
+        """
+        Maps the previous sessions onto this payload's workloads. Returns the placements per
+        workload, the workloads whose previous sessions are no longer valid and how many previous
+        sessions belong to workloads that still exist.
+        """
+        workload_lookup = {(self.data.faculty[f_idx].id, w.id): w_idx for w_idx, (f_idx, w) in enumerate(base.workloads)}
+        room_lookup = {room_id: r_idx for r_idx, room_id in enumerate(base.room_ids)}
+        day_lookup = {d: d_idx for d_idx, d in enumerate(base.days)}
+
+        placements: List[Set[Placement]] = [set() for _ in base.workloads]
+        invalid: Set[int] = set()
+        previous_total = 0
+        for session in self.previous_sessions:
+            w_idx = workload_lookup.get((session["faculty_id"], session["workload_id"]))
+            if w_idx is None:
+                continue
+            previous_total += 1
+            r_idx = room_lookup.get(session["room"])
+            d_idx = day_lookup.get(session["day"])
+            if r_idx is None or d_idx is None:
+                invalid.add(w_idx)
+                continue
+            placements[w_idx].add((r_idx, d_idx, session["start"]))
+
+        for w_idx, (_, w) in enumerate(base.workloads):
+            events_needed = w.hours // w.consecutive_hours if w.consecutive_hours > 0 else w.hours
+            domain = set(base.start_domains[w_idx])
+            rooms = set(base.valid_rooms[w_idx])
+            if len(placements[w_idx]) != events_needed or any(
+                    r_idx not in rooms or (d_idx, s) not in domain
+                    or not base._pool_free(base.room_pool_of[r_idx], d_idx, s, w.consecutive_hours)
+                    for r_idx, d_idx, s in placements[w_idx]):
+                invalid.add(w_idx)
+        return placements, invalid, previous_total
+
+    def _seed_neighbourhood(self, base: TimetableEngine, placements: List[Set[Placement]], invalid: Set[int]) -> Set[int]:
+        faculty_ids = set(self.changes.faculty_ids)
+        groups = set(self.changes.target_groups)
+        rooms = {base.room_ids.index(r) for r in self.changes.room_ids if r in base.rooms_map}
+
+        free = set(invalid)
+        for w_idx, (f_idx, w) in enumerate(base.workloads):
+            if (self.data.faculty[f_idx].id in faculty_ids
+                    or groups.intersection(w.target_groups)
+                    or any(r_idx in rooms for r_idx, _, _ in placements[w_idx])):
+                free.add(w_idx)
+        return free
+
+    def _widen(self, base: TimetableEngine, placements: List[Set[Placement]], free: Set[int]) -> Set[int]:
+        """
+        Adds every workload that shares a faculty, a group or a (room, day) with a freed workload.
+        """
+        faculty = {base.workloads[w_idx][0] for w_idx in free}
+        groups = {g for w_idx in free for g in base.workloads[w_idx][1].target_groups}
+        room_days = {(r_idx, d_idx) for w_idx in free for r_idx, d_idx, _ in placements[w_idx]}
+
+        widened = set(free)
+        for w_idx, (f_idx, w) in enumerate(base.workloads):
+            if (f_idx in faculty or groups.intersection(w.target_groups)
+                    or any((r_idx, d_idx) in room_days for r_idx, d_idx, _ in placements[w_idx])):
+                widened.add(w_idx)
+        return widened
+
+    def _step_payload(self, time_limit: float) -> GenerationPayload:
+        options = self.data.solver_options.model_copy(update={"max_time_in_seconds": max(time_limit, 0.01)})
+        return self.data.model_copy(update={"solver_options": options})
+
+    def stop_search(self):
+        self._stopped = True
+        if self._step is not None:
+            self._step.stop_search()
+
+    def search_progress(self) -> Dict[str, Any]:
+        if self._step is None:
+            return {"phase": "building_model", "elapsed_s": 0.0, "solutions": 0, "best_bound": None}
+        return self._step.search_progress()
+
+    def generate(self) -> Dict[str, Any]:
+        deadline = time.monotonic() + self.data.solver_options.max_time_in_seconds
+
+        base = TimetableEngine(data=self.data)
+        base._compute_start_domains()
+        placements, invalid, previous_total = self._previous_placements(base)
+        free = self._seed_neighbourhood(base, placements, invalid)
+        all_workloads = set(range(len(base.workloads)))
+
+        steps = []
+        while True:
+            remaining = deadline - time.monotonic()
+            final = free == all_workloads
+            time_limit = remaining if final else min(self.REPAIR_STEP_TIME_S, remaining)
+
+            self._step = NeighbourhoodEngine(self._step_payload(time_limit), placements, free)
+            self._step.solution_listener = self.solution_listener
+            started = time.monotonic()
+            try:
+                result = self._step.generate()
+            except RoomAssignmentError as e:
+                result = {"status": "infeasible", "message": str(e), "schedule": []}
+            steps.append({
+                "freed_workloads": len(free),
+                "status": result["status"],
+                "elapsed_s": round(time.monotonic() - started, 3),
+            })
+
+            if result["status"] == "success" or final or self._stopped or deadline - time.monotonic() <= 0:
+                break
+            widened = self._widen(base, placements, free)
+            # A neighbourhood that stops growing jumps straight to the full timetable
+            free = widened if widened != free else all_workloads
+
+        if result["status"] != "success":
+            result["repair"] = {"steps": steps}
+            return result
+
+        new_placements: List[Set[Placement]] = [set() for _ in base.workloads]
+        for w_idx, r_idx, d_idx, s in self._step.placed:
+            new_placements[w_idx].add((r_idx, d_idx, s))
+        kept = sum(len(placements[w_idx] & new_placements[w_idx]) for w_idx in all_workloads)
+
+        result["message"] = "Timetable repaired around the change."
+        result["repair"] = {
+            "sessions_moved": previous_total - kept,
+            "sessions_kept": kept,
+            "freed_workloads": len(free),
+            "total_workloads": len(all_workloads),
+            "steps": steps,
+        }
+        return result
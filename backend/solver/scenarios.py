@@ -0,0 +1,261 @@
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from ortools.sat.python import cp_model
+from schemas.api_models import GenerationPayload, ScenarioVariation
+from services.solution_cache import sessions_from_schedule
+from solver.engine import TimetableEngine
+from solver.profiles import apply_profile
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+BASE_SCENARIO = "base"
+
+
+class ScenarioError(ValueError):
+    """Raised when a variation names a room, faculty member or day the base payload does not have."""
+
+
+def check_variations(data: GenerationPayload, variations: List[ScenarioVariation]):
+    """
+    Rejects variations that reuse a scenario name or name rooms, faculty or days `data` does not have.
+    """
+    room_ids = {r.id for r in data.rooms_config.rooms}
+    faculty_ids = {f.id for f in data.faculty}
+    days = set(data.college_settings.days_active)
+    names = {BASE_SCENARIO}
+    for v in variations:
+        if v.name in names:
+            raise ScenarioError(f"Validation Failed: Scenario name '{v.name}' is used twice (or is reserved).")
+        names.add(v.name)
+        unknown_rooms = sorted(set(v.close_rooms) - room_ids)
+        if unknown_rooms:
+            raise ScenarioError(f"Validation Failed: Scenario '{v.name}' closes unknown rooms {unknown_rooms}.")
+        unknown_faculty = sorted((set(v.faculty_shifts) | set(v.faculty_blocked_slots)) - faculty_ids)
+        if unknown_faculty:
+            raise ScenarioError(f"Validation Failed: Scenario '{v.name}' changes unknown faculty {unknown_faculty}.")
+        unknown_days = sorted({b.day for slots in v.faculty_blocked_slots.values() for b in slots} - days)
+        if unknown_days:
+            raise ScenarioError(f"Validation Failed: Scenario '{v.name}' blocks hours on inactive days {unknown_days}.")
+
+
+class Scenario:
+    """
+    The base institution or one variation of it, resolved against the sweep's superset model.
+    """
+
+    def __init__(self, name: str, slots: Set[int], shifts: Dict[str, Set[int]],
+                 extra_blocked: Dict[str, Set[Tuple[str, int]]], closed_rooms: Set[str]):
+        self.name = name
+        self.slots = slots
+        self.shifts = shifts
+        self.extra_blocked = extra_blocked
+        self.closed_rooms = closed_rooms
+        # Indexes into engine.variables fixed to 0 in this scenario's copy of the model
+        self.forbidden: Set[int] = set()
+        self.warm_start = False
+
+
+class ScenarioSweepEngine(TimetableEngine):
+    """
+    What-if sweep over one boolean model instead of one generation per variation.
+
+    The model is built once for a superset institution: every hour any variation adds, every
+    faculty shift widened to cover all its variations, and every room a variation closes kept
+    in a pool of its own. Each scenario (the base first) is then that model with the start-time
+    literals it rules out fixed to 0 in a copy of the proto, read straight from the occupancy
+    buckets:
+
+        removed / missing hours     every literal covering the hour
+        faculty_shifts              the faculty member's literals outside the new shift
+        faculty_blocked_slots       the faculty member's literals covering the blocked hours
+        close_rooms                 every literal of the closed room's pool
+
+    The base is solved first; the variations are then solved in parallel threads (CP-SAT
+    releases the GIL), warm-started from the base solution. Formulation is always boolean and
+    the soft objectives are off: the sweep compares feasibility, not quality.
+    """
+
+    SOFT_OBJECTIVES = False
+
+    def __init__(self, data: GenerationPayload, variations: List[ScenarioVariation], include_schedules: bool = False):
+        self.base_data = data
+        self.variations = variations
+        self.include_schedules = include_schedules
+        check_variations(data, variations)
+        super().__init__(self._superset_payload())
+        self._solvers: List[cp_model.CpSolver] = []
+        self._lock = threading.Lock()
+
+    def _superset_payload(self) -> GenerationPayload:
+        data = self.base_data.model_copy(deep=True)
+        settings = data.college_settings
+        settings.time_slots = sorted(set(settings.time_slots).union(*(v.add_time_slots for v in self.variations)))
+        for f in data.faculty:
+            f.shift = sorted(set(f.shift).union(*(v.faculty_shifts.get(f.id, ()) for v in self.variations)))
+        data.solver_options.optimize = False
+        data.solver_options.engine_mode = "boolean"
+        return data
+
+    def _isolated_rooms(self) -> Set[str]:
+        return {room_id for v in self.variations for room_id in v.close_rooms}
+
+    def _scenarios(self) -> List[Scenario]:
+        base_slots = set(self.base_data.college_settings.time_slots)
+        base_shifts = {f.id: set(f.shift) for f in self.base_data.faculty}
+        scenarios = [Scenario(BASE_SCENARIO, base_slots, base_shifts, {}, set())]
+        for v in self.variations:
+            shifts = {**base_shifts, **{f_id: set(shift) for f_id, shift in v.faculty_shifts.items()}}
+            blocked = {f_id: {(b.day, b.time) for b in slots} for f_id, slots in v.faculty_blocked_slots.items()}
+            slots = (base_slots - set(v.remove_time_slots)) | set(v.add_time_slots)
+            scenarios.append(Scenario(v.name, slots, shifts, blocked, set(v.close_rooms)))
+        return scenarios
+
+    def _forbid(self, scenario: Scenario):
+        """
+        Collects the literals `scenario` rules out from the faculty and room occupancy buckets.
+        """
+        missing_hours = self.slot_set - scenario.slots
+        # faculty_idx -> (day_idx, hour) cells the faculty member cannot teach in this scenario
+        faculty_cells: Dict[int, Set[Tuple[int, int]]] = {}
+        day_lookup = {d: d_idx for d_idx, d in enumerate(self.days)}
+        for f_idx, f in enumerate(self.data.faculty):
+            off_shift = self.slot_set - scenario.shifts[f.id]
+            blocked = scenario.extra_blocked.get(f.id, ())
+            if off_shift or blocked:
+                faculty_cells[f_idx] = {(d_idx, t) for d_idx in range(len(self.days)) for t in off_shift}
+                faculty_cells[f_idx].update((day_lookup[d], t) for d, t in blocked)
+
+        for (f_idx, d_idx, t), bucket in self.faculty_occupancy.items():
+            if t in missing_hours or (d_idx, t) in faculty_cells.get(f_idx, ()):
+                scenario.forbidden.update(bucket)
+
+        closed_pools = {self.room_pool_of[self.room_index[room_id]] for room_id in scenario.closed_rooms}
+        for (p_idx, _, _), bucket in self.room_occupancy.items():
+            if p_idx in closed_pools:
+                scenario.forbidden.update(bucket)
+
+    def _scenario_model(self, scenario: Scenario, hint: Optional[List[int]]) -> cp_model.CpModel:
+        model = self.model.Clone()
+        proto = model.Proto()
+        # Proto indexes are shared between the model and its clone
+        for v_idx in scenario.forbidden:
+            proto.variables[self._proto_index[v_idx]].domain[1] = 0
+        # Only touched when there is a hint: reading solution_hint creates an (empty) hint,
+        # which alone slows the search down several times
+        if hint is not None:
+            scenario.warm_start = True
+            proto.solution_hint.vars.extend(self._proto_index.tolist())
+            proto.solution_hint.values.extend(hint)
+        return model
+
+    def _solve(self, scenario: Scenario, model: cp_model.CpModel, solver: cp_model.CpSolver,
+               num_workers: int, base_sessions: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        row: Dict[str, Any] = {"scenario": scenario.name, "warm_start": scenario.warm_start}
+        solver.parameters.max_time_in_seconds = self.data.solver_options.max_time_in_seconds
+        if num_workers:
+            solver.parameters.num_workers = num_workers
+        started = time.perf_counter()
+        status = cp_model.UNKNOWN if self.search_interrupted else solver.Solve(model)
+        row["solve_s"] = round(time.perf_counter() - started, 3)
+        row["solver_status"] = solver.StatusName(status)
+        row["feasible"] = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        row["schedule"] = []
+        if row["feasible"]:
+            # _extract_schedule() fills self.schedule, so scenarios take turns
+            with self._lock:
+                self.schedule = []
+                self._extract_schedule(solver)
+                row["schedule"] = self.schedule
+        row["total_classes"] = len(row["schedule"])
+        row["room_utilization"] = round(len(row["schedule"]) / max(1, self._open_room_hours(scenario)), 4)
+        row["sessions_moved"], row["room_changes"] = self._compare(base_sessions, row["schedule"]) if row["feasible"] else (None, None)
+        return row
+
+    def _open_room_hours(self, scenario: Scenario) -> int:
+        lunch = self.data.college_settings.lunch_slot
+        teaching_hours = [t for t in scenario.slots if t != lunch]
+        total = 0
+        for room in self.data.rooms_config.rooms:
+            if room.id in scenario.closed_rooms:
+                continue
+            blocked = {(b.day, b.time) for b in room.blocked_slots}
+            total += sum(1 for d in self.days for t in teaching_hours if (d, t) not in blocked)
+        return total
+
+    def _compare(self, base_sessions: Optional[List[Dict[str, Any]]], schedule: List[Dict[str, Any]]) -> Tuple[Optional[int], Optional[int]]:
+        """
+        (sessions at another day or hour than in the base timetable, sessions only moved to another room).
+        """
+        if base_sessions is None:
+            return None, None
+        sessions = sessions_from_schedule(self.data, schedule)
+        timing = lambda s: (s["faculty_id"], s["workload_id"], s["day"], s["start"])
+        moved = sum((Counter(map(timing, base_sessions)) - Counter(map(timing, sessions))).values())
+        placement = lambda s: (*timing(s), s["room"])
+        changed = sum((Counter(map(placement, base_sessions)) - Counter(map(placement, sessions))).values())
+        return moved, changed - moved
+
+    def stop_search(self):
+        self.search_interrupted = True
+        self.solver.StopSearch()
+        with self._lock:
+            for solver in self._solvers:
+                solver.StopSearch()
+
+    def generate(self) -> Dict[str, Any]:
+        """
+        Builds the superset model once, then solves the base and every variation on a copy of it.
+        """
+        diagnostics = self.diagnostics
+        with diagnostics.phase("create_variables"):
+            self._create_variables()
+        self._apply_hard_constraints()
+        diagnostics.record_model(self.model)
+        # Before cloning, so the profile's decision strategy reaches every scenario
+        profile = self._apply_profile(self.solver)
+        # Proto index of every literal, built once before the scenario threads share it
+        self._variable_proto_index()
+
+        scenarios = self._scenarios()
+        with diagnostics.phase("scenario_bounds"):
+            for scenario in scenarios:
+                self._forbid(scenario)
+            models = [self._scenario_model(scenarios[0], None)]
+
+        self.search_started_at = time.monotonic()
+        with diagnostics.phase("solve_base"):
+            base = self._solve(scenarios[0], models[0], self.solver, 0, None)
+        base_sessions = sessions_from_schedule(self.data, base["schedule"]) if base["feasible"] else None
+        base["sessions_moved"], base["room_changes"] = (0, 0) if base["feasible"] else (None, None)
+        diagnostics.record_solver(self.solver, getattr(cp_model, base["solver_status"]))
+
+        hint = None
+        if base["feasible"]:
+            values = self._solution_values(self.solver)
+            hint = values[self._proto_index].tolist()
+        variations = scenarios[1:]
+        cores = os.cpu_count() or 1
+        threads = max(1, min(len(variations), cores))
+        with diagnostics.phase("solve_variations"):
+            jobs = []
+            for scenario in variations:
+                solver = cp_model.CpSolver()
+                apply_profile(solver, profile)
+                with self._lock:
+                    self._solvers.append(solver)
+                jobs.append((scenario, self._scenario_model(scenario, hint), solver))
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                rows = list(pool.map(lambda job: self._solve(*job, max(1, cores // threads), base_sessions), jobs))
+
+        rows.insert(0, base)
+        result = {
+            "status": "success",
+            "message": f"Compared {len(variations)} variation(s) against the base timetable.",
+            "scenarios": [{k: v for k, v in row.items() if k != "schedule"} for row in rows],
+            "diagnostics": diagnostics.to_dict(),
+        }
+        if self.include_schedules:
+            result["schedules"] = {row["scenario"]: row["schedule"] for row in rows}
+        return result
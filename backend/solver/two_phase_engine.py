@@ -0,0 +1,185 @@
+import time
+from ortools.sat.python import cp_model
+from schemas.api_models import GenerationPayload
+from solver.engine import RoomAssignmentError, TimetableEngine
+from typing import Dict, Any, List, Optional, Tuple, FrozenSet
+from collections import defaultdict
+
+
+class TwoPhaseTimetableEngine(TimetableEngine):
+    """
+    Time-first decomposition of the timetable model.
+
+    Phase 1 solves (workload, day, start_slot) placements without rooms. Workloads are grouped
+    into room classes (identical sets of tag-compatible rooms) and, for every hour, the sessions
+    whose class fits inside a class S may use at most |S| rooms. Phase 2 then assigns concrete
+    rooms with one small subproblem per day. If any day cannot be matched the request is re-run
+    on the full TimetableEngine model in the time left.
+
+    With pool_equivalent_rooms on (the default) and disjoint tag sets, every workload can use
+    exactly one room pool, so phase 1 has as many variables and constraints as the boolean
+    model (902 / 1006 at 10 faculty in benchmarks/scaling_thresholds.json). Phase 1 is smaller
+    only without pooling (100 faculty: 9023 instead of 61314 variables) or when workloads fit
+    several pools.
+
+    Both phases and the fallback share the request's `max_time_in_seconds`.
+    """
+
+    PHASE2_TIME_LIMIT_S = 5.0
+    # A day's room matching still gets this long once phase 1 has used up the budget
+    PHASE2_MIN_TIME_S = 0.1
+
+    def __init__(self, data: GenerationPayload):
+        super().__init__(data)
+        # room_classes[c] = frozenset of room indexes; workload_class[w_idx] = c
+        self.room_classes: List[FrozenSet[int]] = []
+        self.workload_class: List[int] = []
+        self.class_occupancy: Dict[Tuple[int, int, int], List[int]] = defaultdict(list)
+        self.fallback_to_full_model = False
+        self._full_model: Optional[TimetableEngine] = None
+        # time.time() by which phase 1, phase 2 and any fallback must be done
+        self._deadline = time.time() + data.solver_options.max_time_in_seconds
+
+    def _remaining(self) -> float:
+        return self._deadline - time.time()
+
+    def _create_variables(self):
+        """
+        Instantiates the room-less matrix V[Workload_ID][Day][TimeSlot] over the pre-filtered domains.
+        """
+        self._compute_start_domains()
+
+        class_ids: Dict[FrozenSet[int], int] = {}
+        for w_idx, (f_idx, w) in enumerate(self.workloads):
+            room_class = frozenset(self.valid_rooms[w_idx])
+            if room_class not in class_ids:
+                class_ids[room_class] = len(self.room_classes)
+                self.room_classes.append(room_class)
+            c_idx = class_ids[room_class]
+            self.workload_class.append(c_idx)
+            if not room_class:
+                continue
+
+            f = self.data.faculty[f_idx]
+            for d_idx, s in self.start_domains[w_idx]:
+                name = f"T_F-{f.id}_W-{w.id}_D-{self.days[d_idx]}_S-{s}"
+                v_idx = len(self.variables)
+                self.variables.append(self.model.NewBoolVar(name))
+                self.var_index.append((w_idx, -1, d_idx, s))
+                self.workload_vars[w_idx].append(v_idx)
+                self._index_occupancy(v_idx, w_idx, d_idx, s)
+
+                for offset in range(max(1, w.consecutive_hours)):
+                    if s + offset in self.slot_set:
+                        self.class_occupancy[(c_idx, d_idx, s + offset)].append(v_idx)
+
+    def _hint_room_key(self, r_idx: int) -> int:
+        # Phase 1 variables carry no room
+        return -1
+
+    def _apply_hard_constraints(self):
+        """
+        Posts the shared time constraints, then replaces per-room overlap with per-class room-count capacity.
+        """
+        super()._apply_hard_constraints()
+
+        # 4b. Room Capacity by class: sessions whose compatible rooms all lie in S can use at most |S| rooms.
+        # Exact for nested tag sets (e.g. every room vs. labs only); phase 2 catches anything else.
+        with self.diagnostics.phase("constraints.room_class_capacity", self.model):
+            nested = {
+                c_idx: [sub for sub, sub_rooms in enumerate(self.room_classes) if sub_rooms and sub_rooms <= rooms]
+                for c_idx, rooms in enumerate(self.room_classes) if rooms
+            }
+            for c_idx, subclasses in nested.items():
+                rooms = self.room_classes[c_idx]
+                for d_idx in range(len(self.days)):
+                    for s in self.slots:
+                        active = [v for sub in subclasses for v in self.class_occupancy.get((sub, d_idx, s), [])]
+                        # Rooms blocked in this hour do not count
+                        capacity = sum(1 for r_idx in rooms if self._pool_free(self.room_pool_of[r_idx], d_idx, s, 1))
+                        if len(active) > capacity:
+                            self.model.Add(sum(self.variables[i] for i in active) <= capacity)
+
+    def _extract_schedule(self, solver: cp_model.CpSolver):
+        """
+        Phase 2: assigns a concrete room to every placed session, one subproblem per day.
+        """
+        placed_by_day: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        for v_idx in self._active_variables(solver):
+            w_idx, _, d_idx, s = self.var_index[v_idx]
+            placed_by_day[d_idx].append((w_idx, s))
+
+        for d_idx, placed in placed_by_day.items():
+            for (w_idx, s), r_idx in zip(placed, self._assign_rooms(d_idx, placed)):
+                self._append_session(w_idx, r_idx, d_idx, s)
+
+    def _assign_rooms(self, d_idx: int, placed: List[Tuple[int, int]]) -> List[int]:
+        """
+        Picks one compatible room per session so no room hosts two sessions in the same hour.
+        A session keeps its room for all of its consecutive hours.
+        """
+        model = cp_model.CpModel()
+        choices: List[Dict[int, cp_model.IntVar]] = []
+        room_hours: Dict[Tuple[int, int], List[cp_model.IntVar]] = defaultdict(list)
+
+        for i, (w_idx, s) in enumerate(placed):
+            w = self.workloads[w_idx][1]
+            lits = {}
+            for r_idx in self.valid_rooms[w_idx]:
+                if not self._pool_free(self.room_pool_of[r_idx], d_idx, s, w.consecutive_hours):
+                    continue
+                lit = model.NewBoolVar(f"R_{i}_{r_idx}")
+                lits[r_idx] = lit
+                for offset in range(max(1, w.consecutive_hours)):
+                    room_hours[(r_idx, s + offset)].append(lit)
+            model.AddExactlyOne(lits.values())
+            choices.append(lits)
+
+        for lits in room_hours.values():
+            if len(lits) > 1:
+                model.AddAtMostOne(lits)
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = max(min(self.PHASE2_TIME_LIMIT_S, self._remaining()), self.PHASE2_MIN_TIME_S)
+        status = solver.Solve(model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            raise RoomAssignmentError(f"No room matching exists for {self.days[d_idx]}")
+
+        return [next(r for r, lit in lits.items() if solver.BooleanValue(lit)) for lits in choices]
+
+    def generate(self) -> Dict[str, Any]:
+        """
+        Runs both phases. FORCE_PIN rules tie a session to a room at a time, so payloads that
+        use them, and any day phase 2 cannot match, fall back to the full model.
+        """
+        self._deadline = time.time() + self.data.solver_options.max_time_in_seconds
+        if self.rules.pins:
+            return self._generate_full_model()
+
+        try:
+            result = super().generate()
+        except RoomAssignmentError:
+            return self._generate_full_model()
+        result["fallback_to_full_model"] = False
+        return result
+
+    def stop_search(self):
+        super().stop_search()
+        if self._full_model is not None:
+            self._full_model.stop_search()
+
+    def search_progress(self) -> Dict[str, Any]:
+        if self._full_model is not None:
+            return self._full_model.search_progress()
+        return super().search_progress()
+
+    def _generate_full_model(self) -> Dict[str, Any]:
+        self.fallback_to_full_model = True
+        options = self.data.solver_options.model_copy(update={"max_time_in_seconds": max(self._remaining(), 0.1)})
+        self._full_model = TimetableEngine(data=self.data.model_copy(update={"solver_options": options}))
+        self._full_model.solver.parameters.num_workers = self.solver.parameters.num_workers
+        self._full_model.solution_listener = self.solution_listener
+        self._full_model.solution_hint = self.solution_hint
+        result = self._full_model.generate()
+        result["fallback_to_full_model"] = True
+        return result
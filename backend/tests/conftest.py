@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# The service singletons read their configuration at import time: keep the solution cache and
+# the timetable store out of the working tree, ignore any locally tuned profile table, and keep
+# the solver pool small
+_STATE_DIR = tempfile.mkdtemp(prefix="satis-tests-")
+os.environ.setdefault("SATIS_CACHE_DIR", os.path.join(_STATE_DIR, "cache"))
+os.environ.setdefault("SATIS_TIMETABLE_DB", os.path.join(_STATE_DIR, "timetables.sqlite3"))
+os.environ.setdefault("SATIS_TUNED_PROFILES", os.path.join(_STATE_DIR, "tuned_profiles.json"))
+os.environ.setdefault("SATIS_SOLVER_WORKERS", "2")
+
+from benchmarks.generator import generate_institution
+from schemas.api_models import CustomRule
+
+
+@pytest.fixture
+def institution():
+    """
+    Factory for synthetic institutions: `institution(10, seed=1, engine_mode="interval")`.
+    Tests that go through the API use their own seeds so the shared solution cache never
+    answers for them.
+    """
+    def build(num_faculty: int = 10, seed: int = 1, room_slack: float = 1.5, **solver_options):
+        solver_options.setdefault("max_time_in_seconds", 30)
+        return generate_institution(num_faculty, seed=seed, room_slack=room_slack, **solver_options)
+    return build
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def infeasible_institution(institution):
+    """
+    An institution that passes validation but has no timetable: the theory of two faculty of
+    the same division (F0 and F2) may only be taught at 09:00, which fits five sessions a week, not six.
+    """
+    def build(seed: int = 1, **solver_options):
+        payload = institution(10, seed=seed, **solver_options)
+        payload.college_settings.custom_rules = [
+            CustomRule(id=f"nine-{subject}", condition_field="subject", condition_operator="EQUALS",
+                       condition_value=subject, action_type="RESTRICT_TIME", action_value=["09:00"])
+            for subject in ("SUB0", "SUB2")
+        ]
+        return payload
+    return build
+
+
+@pytest.fixture
+def slow_institution(institution):
+    """
+    An institution whose optimizing search runs until its time budget, for cancel and stop tests.
+    """
+    def build(**solver_options):
+        solver_options = {"max_time_in_seconds": 20, "optimize": True, "decompose": False, **solver_options}
+        return institution(15, room_slack=1.0, **solver_options)
+    return build
+
+
+@pytest.fixture
+def wait_for_job(client):
+    """
+    Polls GET /jobs/{job_id} until the job has finished (completed, failed or cancelled).
+    """
+    def wait(job_id: str, timeout: float = 60) -> dict:
+        deadline = time.time() + timeout
+        while True:
+            status = client.get(f"/api/v1/jobs/{job_id}").json()
+            if status["state"] in ("completed", "failed", "cancelled") or time.time() > deadline:
+                return status
+            time.sleep(0.05)
+    return wait
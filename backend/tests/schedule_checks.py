@@ -0,0 +1,76 @@
+"""
+Hard-constraint checks for a generated schedule, independent of any engine's model.
+"""
+from collections import Counter, defaultdict
+from typing import Any, Dict, List
+
+from schemas.api_models import GenerationPayload
+from solver.group_hierarchy import GroupHierarchy
+
+
+def schedule_violations(payload: GenerationPayload, schedule: List[Dict[str, Any]]) -> List[tuple]:
+    """
+    Every broken hard constraint of `schedule` as a (kind, detail) tuple; empty for a valid timetable.
+    """
+    settings = payload.college_settings
+    faculty = {f.id: f for f in payload.faculty}
+    workloads = {(f.id, w.id): w for f in payload.faculty for w in f.workload}
+    rooms = {r.id: r for r in payload.rooms_config.rooms}
+    hierarchy = GroupHierarchy.from_payload(payload)
+
+    violations = []
+    room_use, faculty_use, group_use, hours = Counter(), Counter(), Counter(), Counter()
+    theory_groups, session_groups = defaultdict(set), defaultdict(set)
+    taught = defaultdict(list)
+    for row in schedule:
+        f = faculty[row["faculty_id"]]
+        w = workloads[(f.id, row["workload_id"])]
+        room = rooms[row["room"]]
+        cell = (row["day"], row["time_slot"])
+
+        if row["time_slot"] not in settings.time_slots or row["time_slot"] == settings.lunch_slot:
+            violations.append(("slot", row))
+        if row["time_slot"] not in f.shift or any((b.day, b.time) == cell for b in f.blocked_slots):
+            violations.append(("faculty_unavailable", row))
+        if not set(w.required_tags) <= set(room.tags) or any((b.day, b.time) == cell for b in room.blocked_slots):
+            violations.append(("room_unsuitable", row))
+
+        room_use[(room.id, *cell)] += 1
+        faculty_use[(f.id, *cell)] += 1
+        for group in w.target_groups:
+            group_use[(group, *cell)] += 1
+            (theory_groups if w.type == "Theory" else session_groups)[cell].add(group)
+        hours[(f.id, w.id)] += 1
+        taught[(f.id, w.id, row["day"])].append(row["time_slot"])
+
+    violations += [("room_clash", key) for key, n in room_use.items() if n > 1]
+    violations += [("faculty_clash", key) for key, n in faculty_use.items() if n > 1]
+    violations += [("group_clash", key) for key, n in group_use.items() if n > 1]
+    for key, w in workloads.items():
+        expected = w.hours // w.consecutive_hours * w.consecutive_hours
+        if hours[key] != expected:
+            violations.append(("hours", key, hours[key], expected))
+
+    # Multi-hour sessions must be taught as unbroken blocks
+    for (f_id, w_id, day), slots in taught.items():
+        block = workloads[(f_id, w_id)].consecutive_hours
+        slots.sort()
+        run_start = 0
+        for i in range(1, len(slots) + 1):
+            if i == len(slots) or slots[i] != slots[i - 1] + 1:
+                if (i - run_start) % block:
+                    violations.append(("broken_block", f_id, w_id, day))
+                run_start = i
+
+    # A group's Theory may not overlap a lab or tutorial of any group below it
+    for cell, parents in theory_groups.items():
+        for parent in parents:
+            for child in session_groups.get(cell, set()) & hierarchy.descendants.get(parent, frozenset()):
+                violations.append(("parent_child", cell, parent, child))
+    return violations
+
+
+def assert_valid(payload: GenerationPayload, result: Dict[str, Any]):
+    assert result["status"] == "success", result.get("message")
+    violations = schedule_violations(payload, result["schedule"])
+    assert not violations, violations[:10]
@@ -0,0 +1,110 @@
+import io
+import json
+import pickle
+
+import pytest
+
+from benchmarks.ingestion import export_tables, to_arrow, to_csv
+from schedule_checks import assert_valid
+from schemas.api_models import GenerationPayload, WorkloadItem
+from services.bulk_ingest import BulkIngest
+from services.solution_cache import payload_key
+
+
+def _ingest(payload, files):
+    ingest = BulkIngest(payload.college_settings, payload.solver_options)
+    ingest.read_all({table: (io.BytesIO(data), name) for table, (name, data) in files.items()})
+    return ingest
+
+
+def _csv_files(tables):
+    return {table: (f"{table}.csv", to_csv(rows)) for table, rows in tables.items()}
+
+
+@pytest.mark.parametrize("encode,ext", [(to_csv, ".csv"), (to_arrow, ".arrow")])
+def test_tables_round_trip_to_the_same_payload(institution, encode, ext):
+    if ext == ".arrow":
+        pytest.importorskip("pyarrow")
+    payload = institution(20)
+
+    ingest = _ingest(payload, {table: (table + ext, encode(rows)) for table, rows in export_tables(payload).items()})
+
+    assert ingest.report()["error_count"] == 0
+    assert payload_key(ingest.payload()) == payload_key(payload)
+
+
+def test_ingested_payload_reaches_the_worker_without_revalidation(institution, monkeypatch):
+    payload = institution(10)
+    ingested = _ingest(payload, _csv_files(export_tables(payload))).payload()
+
+    def validated(*args, **kwargs):
+        raise AssertionError("validated again")
+    # Jobs hand the payload to their worker process pickled
+    monkeypatch.setattr(GenerationPayload, "__init__", validated)
+    monkeypatch.setattr(WorkloadItem, "__init__", validated)
+    restored = pickle.loads(pickle.dumps(ingested))
+
+    assert restored == ingested
+
+def test_bad_rows_are_reported_by_row_and_column(institution):
+    payload = institution(10)
+    tables = export_tables(payload)
+    tables["workloads"] = [dict(row) for row in tables["workloads"]]
+    tables["workloads"][0]["weekly_hours"] = "two"
+    tables["workloads"][1]["faculty_id"] = "NOPE"
+    tables["workloads"][2]["event_type"] = "Seminar"
+    tables["faculty"] = tables["faculty"] + [dict(tables["faculty"][0])]
+
+    report = _ingest(payload, _csv_files(tables)).report()
+
+    errors = {(e["table"], e["row"], e["column"]) for e in report["errors"]}
+    assert errors == {
+        ("workloads", 1, "weekly_hours"),
+        ("workloads", 2, "faculty_id"),
+        ("workloads", 3, "event_type"),
+        ("faculty", len(tables["faculty"]), "faculty_id"),
+    }
+
+
+def test_missing_required_column(institution):
+    payload = institution(5)
+    tables = export_tables(payload)
+    files = _csv_files(tables)
+    files["rooms"] = ("rooms.csv", b"room_id,type\nR1,Classroom\n")
+
+    report = _ingest(payload, files).report()
+
+    assert ("rooms", None, "capacity") in {(e["table"], e["row"], e["column"]) for e in report["errors"]}
+
+
+def _post(client, payload, files, **params):
+    settings = json.dumps({"college_settings": payload.college_settings.model_dump(),
+                           "solver_options": payload.solver_options.model_dump()})
+    return client.post("/api/v1/ingest", params=params, data={"settings": settings}, files=files)
+
+
+def test_ingest_endpoint_queues_the_job(client, institution, wait_for_job):
+    payload = institution(20, seed=1901)
+
+    response = _post(client, payload, _csv_files(export_tables(payload)))
+
+    assert response.status_code == 202
+    assert response.json()["ingest"]["rows"]["faculty"] == 20
+    job_id = response.json()["job"]["job_id"]
+    assert wait_for_job(job_id)["state"] == "completed"
+    assert_valid(payload, client.get(f"/api/v1/jobs/{job_id}/result").json())
+
+
+def test_ingest_endpoint_rejects_bad_uploads(client, institution):
+    payload = institution(5, seed=1902)
+    tables = export_tables(payload)
+    tables["rooms"] = [{**row, "capacity": "-1"} if i == 0 else row for i, row in enumerate(tables["rooms"])]
+
+    response = _post(client, payload, _csv_files(tables), submit=False)
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"][0]["column"] == "capacity"
+
+    invalid_settings = client.post("/api/v1/ingest", data={"settings": "{}"},
+                                   files={t: (f"{t}.csv", b"") for t in ("rooms", "faculty", "workloads")})
+    assert invalid_settings.status_code == 422
@@ -0,0 +1,71 @@
+import pytest
+
+from schedule_checks import assert_valid
+from schemas.api_models import CustomRule
+from services.validator import validate_input_payload
+from solver.custom_rules import CompiledRules
+from solver.registry import ENGINE_MODES
+
+
+def _rule(rule_id, field, value, action, action_value, operator="EQUALS"):
+    return CustomRule(id=rule_id, condition_field=field, condition_operator=operator, condition_value=value,
+                      action_type=action, action_value=action_value)
+
+
+@pytest.mark.parametrize("mode", ["boolean", "two_phase", "interval"])
+def test_rules_are_respected(institution, mode):
+    payload = institution(10, engine_mode=mode)
+    classrooms = [r.id for r in payload.rooms_config.rooms if "Theory_Room" in r.tags]
+    payload.college_settings.custom_rules = [
+        _rule("mornings", "subject", "SUB1", "RESTRICT_TIME", ["08:00", "09:00", "10:00"]),
+        _rule("room", "workload_id", "F3-T", "FORCE_ROOM", [classrooms[0]]),
+        _rule("pin", "workload_id", "F4-T", "FORCE_PIN", f"{classrooms[-1]}|Wednesday|14"),
+    ]
+
+    result = ENGINE_MODES[mode](data=payload).generate()
+
+    assert_valid(payload, result)
+    rows = result["schedule"]
+    assert {r["time_slot"] for r in rows if r["subject"] == "SUB1"} <= {8, 9, 10}
+    assert {r["room"] for r in rows if r["faculty_id"] == "F3" and r["type"] == "Theory"} == {classrooms[0]}
+    assert any((r["workload_id"], r["room"], r["day"], r["time_slot"]) == ("F4-T", classrooms[-1], "Wednesday", 14)
+               for r in rows)
+
+
+def test_contains_matches_substrings(institution):
+    payload = institution(10)
+    payload.college_settings.custom_rules = [_rule("labs", "subject", "_LAB", "RESTRICT_TIME", [8], operator="CONTAINS")]
+
+    rules = CompiledRules(payload)
+
+    labs = [w_idx for w_idx, w in enumerate(w for f in payload.faculty for w in f.workload) if w.subject.endswith("_LAB")]
+    assert labs and sorted(rules.start_limits) == labs
+
+
+def test_broken_rules_are_reported(institution):
+    payload = institution(5)
+    payload.college_settings.custom_rules = [
+        _rule("field", "colour", "red", "RESTRICT_TIME", [8]),
+        _rule("pin", "workload_id", "F0-T", "FORCE_PIN", "C0-Monday-8"),
+    ]
+
+    rules = CompiledRules(payload)
+
+    assert len(rules.errors) == 2
+    assert validate_input_payload(payload)[0] is False
+
+
+def test_unknown_rooms_are_tolerated_with_warnings(institution):
+    payload = institution(10)
+    payload.college_settings.custom_rules = [
+        _rule("partly", "workload_id", "F3-T", "FORCE_ROOM", ["C0", "GONE"]),
+        _rule("entirely", "workload_id", "F4-T", "FORCE_ROOM", ["GONE"]),
+        _rule("pin", "workload_id", "F0-T", "FORCE_PIN", "GONE|Monday|8"),
+    ]
+
+    result = ENGINE_MODES["boolean"](data=payload).generate()
+
+    assert_valid(payload, result)
+    warnings = result["diagnostics"]["warnings"]
+    assert len(warnings) == 3 and all("GONE" in w for w in warnings)
+    assert {r["room"] for r in result["schedule"] if r["faculty_id"] == "F3" and r["type"] == "Theory"} == {"C0"}
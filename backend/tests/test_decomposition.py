@@ -0,0 +1,105 @@
+import pytest
+
+from benchmarks.generator import generate_institution
+from schedule_checks import assert_valid
+from schemas.api_models import CustomRule, GenerationPayload
+from solver.decomposition import DecomposedTimetableEngine, plan_components
+from solver.engine import TimetableEngine
+
+
+def _with_department(base: GenerationPayload, department: GenerationPayload, prefix: str = "X") -> GenerationPayload:
+    """
+    Adds `department` to `base` as an independent department: its faculty, groups, rooms and
+    room tags are renamed so it shares nothing with the rest of the institution.
+    """
+    data = base.model_dump()
+    extra = department.model_dump()
+    for f in extra["faculty"]:
+        f["id"] = prefix + f["id"]
+        for w in f["workload"]:
+            w["id"] = prefix + w["id"]
+            w["target_groups"] = [prefix + g for g in w["target_groups"]]
+            w["required_tags"] = [f"{t}_{prefix}" for t in w["required_tags"]]
+    for room in extra["rooms_config"]["rooms"]:
+        room["id"] = prefix + room["id"]
+        room["tags"] = [f"{t}_{prefix}" for t in room["tags"]]
+    data["faculty"] += extra["faculty"]
+    data["rooms_config"]["rooms"] += extra["rooms_config"]["rooms"]
+    return GenerationPayload(**data)
+
+
+def _assembly(payload: GenerationPayload) -> GenerationPayload:
+    """
+    Gives faculty F0 a one-hour Theory for every division at once, which ties all the
+    generated divisions into one component.
+    """
+    data = payload.model_dump()
+    divisions = sorted({g for f in data["faculty"] if not f["id"].startswith("X") for w in f["workload"]
+                        if w["type"] == "Theory" for g in w["target_groups"]})
+    data["faculty"][0]["workload"].append({
+        "id": "ASSEMBLY", "type": "Theory", "subject": "ASM", "target_groups": divisions,
+        "hours": 1, "consecutive_hours": 1, "required_tags": ["Theory_Room"],
+    })
+    data["faculty"][0]["max_load_hrs"] += 1
+    return GenerationPayload(**data)
+
+
+def test_plan_separates_independent_departments():
+    payload = _with_department(generate_institution(10, seed=1), generate_institution(5, seed=2))
+
+    components = plan_components(payload)
+
+    # Two divisions in the base institution plus one in the added department
+    assert len(components) == 3
+    assert sorted(len(c.faculty) for c in components) == [5, 5, 5]
+    assert sum(c.hours for c in components) == sum(w.hours for f in payload.faculty for w in f.workload)
+
+
+def test_shared_group_joins_components():
+    assert len(plan_components(_assembly(generate_institution(10, seed=1)))) == 1
+
+
+@pytest.mark.parametrize("cores", [1, 2])
+def test_generates_valid_timetable(cores):
+    payload = _with_department(generate_institution(60, seed=4, max_time_in_seconds=30), generate_institution(10, seed=5))
+    engine = DecomposedTimetableEngine(payload)
+    engine.cores = cores
+
+    result = engine.generate()
+
+    assert_valid(payload, result)
+    assert result["decomposition"]["components"] > 1
+    assert result["decomposition"]["parallel"] is (cores > 1)
+    assert result["decomposition"]["fallback"] is False
+
+
+@pytest.mark.parametrize("cores", [1, 2])
+def test_large_component_with_small_department(cores):
+    # Regression: solved in turn, the large component used to get a fixed 5% of the budget,
+    # ran out of time and the institution was reported infeasible, although the single model
+    # solves it in about a second with the fast-first-feasible profile
+    base = generate_institution(100, seed=3, room_slack=1.3, max_time_in_seconds=4, profile="fast-first-feasible")
+    payload = _with_department(_assembly(base), generate_institution(5, seed=1))
+    assert TimetableEngine(data=payload).generate()["status"] == "success"
+    engine = DecomposedTimetableEngine(payload)
+    engine.cores = cores
+
+    result = engine.generate()
+
+    assert_valid(payload, result)
+    assert result["decomposition"]["components"] == 2
+
+
+def test_proven_infeasible_department_is_reported_without_fallback():
+    payload = _with_department(generate_institution(10, seed=1, max_time_in_seconds=10), generate_institution(5, seed=1))
+    # Two theories of the added department's only division, both only at 09:00
+    payload.college_settings.custom_rules = [
+        CustomRule(id=f"nine-{workload_id}", condition_field="workload_id", condition_operator="EQUALS",
+                   condition_value=workload_id, action_type="RESTRICT_TIME", action_value=["09:00"])
+        for workload_id in ("XF0-T", "XF2-T")
+    ]
+
+    result = DecomposedTimetableEngine(payload).generate()
+
+    assert result["status"] == "infeasible"
+    assert result["decomposition"]["fallback"] is False
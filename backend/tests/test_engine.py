@@ -0,0 +1,73 @@
+from schedule_checks import assert_valid, schedule_violations
+from schemas.api_models import BlockedSlot, GenerationPayload
+from solver.engine import TimetableEngine
+
+
+def test_generates_valid_timetable(institution):
+    payload = institution(10)
+    assert_valid(payload, TimetableEngine(data=payload).generate())
+
+
+def test_respects_room_blocked_slots(institution):
+    payload = institution(5)
+    for room in payload.rooms_config.rooms:
+        room.blocked_slots = [BlockedSlot(day="Monday", time=t) for t in (8, 9, 10)]
+
+    result = TimetableEngine(data=payload).generate()
+
+    assert_valid(payload, result)
+    assert not any(row["day"] == "Monday" and row["time_slot"] < 11 for row in result["schedule"])
+
+
+def test_reports_infeasible_workload(institution):
+    payload = institution(5)
+    # More theory hours than the division has free hours in the week
+    payload.faculty[0].workload[0].hours = 60
+    payload.faculty[0].max_load_hrs = 80
+
+    result = TimetableEngine(data=payload).generate()
+
+    assert result["status"] == "infeasible"
+    assert result["schedule"] == []
+
+
+def test_checker_catches_clashes(institution):
+    payload = institution(5)
+    result = TimetableEngine(data=payload).generate()
+    schedule = result["schedule"] + [dict(result["schedule"][0])]
+
+    kinds = {violation[0] for violation in schedule_violations(payload, schedule)}
+
+    assert {"room_clash", "faculty_clash", "group_clash", "hours"} <= kinds
+
+
+def test_invalid_starts_are_pruned_not_zeroed():
+    payload = GenerationPayload(**{
+        "college_settings": {
+            "days_active": ["Monday", "Tuesday"], "time_slots": [8, 9, 10, 11, 12, 13], "lunch_slot": 12,
+            "custom_rules": [{"id": "ten", "condition_field": "subject", "condition_operator": "EQUALS",
+                              "condition_value": "SUB0", "action_type": "RESTRICT_TIME", "action_value": ["10:00"]}],
+        },
+        "rooms_config": {"rooms": [
+            {"id": "C0", "type": "Classroom", "capacity": 60, "tags": ["Theory_Room"]},
+            {"id": "C1", "type": "Classroom", "capacity": 60, "tags": ["Theory_Room", "Projector"]},
+        ]},
+        "faculty": [{
+            "id": "F0", "name": "Faculty 0", "shift": [8, 9, 10, 11], "max_load_hrs": 2,
+            "blocked_slots": [{"day": "Monday", "time": 9}],
+            "workload": [{"id": "F0-T", "type": "Theory", "subject": "SUB0", "target_groups": ["DIV0"],
+                          "hours": 2, "required_tags": ["Theory_Room"]}],
+        }],
+    })
+    engine = TimetableEngine(data=payload)
+
+    result = engine.generate()
+
+    assert_valid(payload, result)
+    # Per day and room: 12 is lunch, 13 is off shift, and 8, 9 and 11 break the rule, except
+    # Monday 9, which the blocked slot removes first
+    assert result["pruned_candidates"] == {"lunch": 4, "shift": 4, "blocked_slot": 2, "past_last_slot": 0, "custom_rule": 10,
+                                           "room_blocked": 0}
+    proto = engine.model.Proto()
+    assert len(proto.variables) == 4
+    assert not [c for c in proto.constraints if len(c.linear.vars) == 1]
@@ -0,0 +1,98 @@
+import pytest
+
+from schedule_checks import assert_valid
+from schemas.api_models import GenerationPayload
+from solver.group_hierarchy import GroupHierarchy, GroupHierarchyError
+from solver.registry import ENGINE_MODES
+
+GROUPS = ["SY-A", "SY-AB", "SY-A-B1", "SY-AB-B1"]
+
+
+def test_derived_tree_splits_on_delimiters():
+    hierarchy = GroupHierarchy.derived(GROUPS, "-_/")
+
+    assert hierarchy.parents == {"SY-A": None, "SY-AB": None, "SY-A-B1": "SY-A", "SY-AB-B1": "SY-AB"}
+    # 'SY-A' is a prefix of 'SY-AB-B1' but not one of its levels
+    assert hierarchy.descendants["SY-A"] == {"SY-A-B1"}
+    assert hierarchy.ancestors["SY-AB-B1"] == {"SY-AB"}
+
+
+def test_nested_levels():
+    hierarchy = GroupHierarchy.derived(["SY", "SY-A", "SY-A-B1"], "-")
+    assert hierarchy.descendants["SY"] == {"SY-A", "SY-A-B1"}
+    assert hierarchy.ancestors["SY-A-B1"] == {"SY", "SY-A"}
+
+
+def test_declared_parents_override_the_names():
+    hierarchy = GroupHierarchy.declared(GROUPS, {"SY-A-B1": "SY-AB", "SY-AB-B1": "SY-AB"})
+
+    assert hierarchy.ancestors["SY-A-B1"] == {"SY-AB"}
+    assert hierarchy.descendants["SY-A"] == frozenset()
+    assert hierarchy.descendants["SY-AB"] == {"SY-A-B1", "SY-AB-B1"}
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(GroupHierarchyError):
+        GroupHierarchy.declared(GROUPS, {"SY-A": "SY-A-B1", "SY-A-B1": "SY-A"})
+    with pytest.raises(GroupHierarchyError):
+        GroupHierarchy.declared(GROUPS, {"SY-A": "SY-A"})
+
+
+def _payload() -> GenerationPayload:
+    """
+    Four hours on one day. The division theories are pinned by RESTRICT_TIME to 8-9 (SY-A) and
+    10-11 (SY-AB), so each sub-batch lab only fits beside its own division's theory, overlapping
+    the other division's.
+    """
+    def faculty(n, kind, subject, group, tag):
+        return {
+            "id": f"F{n}", "name": f"Faculty {n}", "shift": [8, 9, 10, 11], "max_load_hrs": 2,
+            "workload": [{"id": f"F{n}-W", "type": kind, "subject": subject, "target_groups": [group],
+                          "hours": 2, "consecutive_hours": 2 if kind == "Practical" else 1, "required_tags": [tag]}],
+        }
+
+    def restrict(subject, hours):
+        return {"id": subject, "condition_field": "subject", "condition_operator": "EQUALS",
+                "condition_value": subject, "action_type": "RESTRICT_TIME", "action_value": hours}
+
+    return GenerationPayload(**{
+        "college_settings": {
+            "days_active": ["Monday"], "time_slots": [8, 9, 10, 11], "lunch_slot": 13,
+            "custom_rules": [restrict("TH-A", ["08:00", "09:00"]), restrict("TH-AB", ["10:00", "11:00"])],
+        },
+        "rooms_config": {"rooms": [
+            {"id": f"{prefix}{n}", "type": kind, "capacity": 60, "tags": [tag]}
+            for prefix, kind, tag in (("C", "Classroom", "Theory_Room"), ("L", "Laboratory", "Lab")) for n in range(2)
+        ]},
+        "faculty": [
+            faculty(0, "Theory", "TH-A", "SY-A", "Theory_Room"),
+            faculty(1, "Theory", "TH-AB", "SY-AB", "Theory_Room"),
+            faculty(2, "Practical", "LAB-A", "SY-A-B1", "Lab"),
+            faculty(3, "Practical", "LAB-AB", "SY-AB-B1", "Lab"),
+        ],
+    })
+
+
+@pytest.mark.parametrize("mode", ["boolean", "interval"])
+def test_labs_avoid_only_their_own_division_theory(mode):
+    payload = _payload()
+    payload.solver_options.engine_mode = mode
+
+    result = ENGINE_MODES[mode](data=payload).generate()
+
+    assert_valid(payload, result)
+    lab_hours = {row["targets"][0]: set() for row in result["schedule"] if row["type"] == "Practical"}
+    for row in result["schedule"]:
+        if row["type"] == "Practical":
+            lab_hours[row["targets"][0]].add(row["time_slot"])
+    assert lab_hours == {"SY-A-B1": {10, 11}, "SY-AB-B1": {8, 9}}
+
+
+def test_cyclic_group_parents_are_a_validation_error(client, institution):
+    payload = institution(5, seed=1401)
+    payload.college_settings.group_parents = {"Y1-DIV000": "Y1-DIV000-B1", "Y1-DIV000-B1": "Y1-DIV000"}
+
+    response = client.post("/api/v1/generate", json=payload.model_dump())
+
+    assert response.status_code == 400
+    assert any("cycle" in error for error in response.json()["detail"]["validation_errors"])
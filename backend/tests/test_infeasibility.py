@@ -0,0 +1,47 @@
+import threading
+import time
+
+from services.job_manager import _run_generation
+from solver.infeasibility import InfeasibilityExplainer
+
+
+def test_core_names_the_conflicting_rules(infeasible_institution):
+    report = InfeasibilityExplainer(infeasible_institution()).explain()
+
+    assert report["status"] == "infeasible"
+    assert report["minimal"] is True
+    core = {(entry["family"], entry["entity"]) for entry in report["core"]}
+    assert core == {("custom_rule", "nine-SUB0"), ("custom_rule", "nine-SUB2"), ("group_clash", "Y1-DIV000")}
+
+
+def test_feasible_payload(institution):
+    assert InfeasibilityExplainer(institution(5)).explain()["status"] == "feasible"
+
+
+def test_no_time_left(infeasible_institution):
+    report = InfeasibilityExplainer(infeasible_institution()).explain(time_limit=0)
+
+    assert report["status"] == "unknown"
+    assert report["core"] == []
+
+
+def test_generate_returns_explanation(client, infeasible_institution):
+    payload = infeasible_institution(seed=1601, explain_infeasibility=True)
+
+    response = client.post("/api/v1/generate", json=payload.model_dump())
+
+    assert response.status_code == 422
+    explanation = response.json()["detail"]["explanation"]
+    assert explanation["status"] == "infeasible"
+    assert {"nine-SUB0", "nine-SUB2"} <= {entry["entity"] for entry in explanation["core"]}
+
+
+def test_explanation_shares_the_job_budget(infeasible_institution):
+    payload = infeasible_institution(max_time_in_seconds=1, explain_infeasibility=True)
+
+    start = time.monotonic()
+    result = _run_generation(payload, threading.Event())
+
+    assert result["status"] == "infeasible"
+    assert result["explanation"]["status"] in ("infeasible", "unknown")
+    assert time.monotonic() - start < 1 + 1
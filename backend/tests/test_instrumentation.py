@@ -0,0 +1,68 @@
+import re
+import time
+
+import pytest
+
+from solver import instrumentation
+from solver.registry import ENGINE_MODES
+
+
+@pytest.mark.parametrize("mode", ["boolean", "two_phase", "interval"])
+def test_diagnostics_block(institution, mode):
+    payload = institution(8, engine_mode=mode)
+
+    diagnostics = ENGINE_MODES[mode](data=payload).generate()["diagnostics"]
+
+    assert diagnostics["phases"] and all(entry["seconds"] >= 0 for entry in diagnostics["phases"].values())
+    assert diagnostics["model"]["variables"] > 0
+    assert diagnostics["solver"]["status"] in ("OPTIMAL", "FEASIBLE")
+    assert diagnostics["warnings"] == []
+
+
+def test_solver_log_is_off_by_default(institution):
+    engine = ENGINE_MODES["boolean"](data=institution(5))
+
+    diagnostics = engine.generate()["diagnostics"]
+
+    assert not engine.solver.parameters.log_search_progress
+    assert diagnostics["solver"]["presolve_s"] is None
+
+
+def test_presolve_timing_when_enabled(institution, monkeypatch):
+    monkeypatch.setattr(instrumentation, "SOLVER_LOG_TIMINGS", True)
+
+    diagnostics = ENGINE_MODES["boolean"](data=institution(5)).generate()["diagnostics"]
+
+    assert diagnostics["solver"]["presolve_s"] >= 0
+
+
+def _sample(text, name, **labels):
+    pattern = re.escape(name) + r"\{([^}]*)\} ([0-9.e+-]+)"
+    total = 0.0
+    for label_text, value in re.findall(pattern, text):
+        if all(f'{k}="{v}"' in label_text for k, v in labels.items()):
+            total += float(value)
+    return total
+
+
+def test_metrics_endpoint(client, institution, wait_for_job):
+    before = client.get("/metrics").text
+    job_id = client.post("/api/v1/jobs", json=institution(8, seed=1201, engine_mode="interval").model_dump()).json()["job_id"]
+    wait_for_job(job_id)
+    expected = _sample(before, "satis_generations_total", engine_mode="interval", status="success") + 1
+
+    # The job is observed by a done-callback that may run just after its state turns completed
+    deadline = time.time() + 5
+    while True:
+        response = client.get("/metrics")
+        text = response.text
+        generations = _sample(text, "satis_generations_total", engine_mode="interval", status="success")
+        if generations >= expected or time.time() > deadline:
+            break
+        time.sleep(0.05)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert generations == expected
+    assert _sample(text, "satis_generation_phase_seconds_count", engine_mode="interval") > 0
+    assert _sample(text, "satis_http_request_duration_seconds_count", route="/api/v1/jobs", method="POST") >= 1
@@ -0,0 +1,42 @@
+from schedule_checks import assert_valid
+from schemas.api_models import CustomRule
+from services.solution_cache import sessions_from_schedule
+from solver.interval_engine import IntervalTimetableEngine
+from solver.registry import ENGINE_MODES
+
+
+def test_registered_as_engine_mode():
+    assert ENGINE_MODES["interval"] is IntervalTimetableEngine
+
+
+def test_generates_valid_timetable(institution):
+    payload = institution(10, engine_mode="interval")
+    assert_valid(payload, IntervalTimetableEngine(data=payload).generate())
+
+
+def test_without_room_pooling(institution):
+    payload = institution(8, engine_mode="interval", pool_equivalent_rooms=False)
+    assert_valid(payload, IntervalTimetableEngine(data=payload).generate())
+
+
+def test_pinned_session(institution):
+    payload = institution(5, engine_mode="interval")
+    payload.college_settings.custom_rules = [CustomRule(
+        id="pin", condition_field="workload_id", condition_operator="EQUALS", condition_value="F0-T",
+        action_type="FORCE_PIN", action_value="C0|Tuesday|10",
+    )]
+
+    result = IntervalTimetableEngine(data=payload).generate()
+
+    assert_valid(payload, result)
+    assert any(row["workload_id"] == "F0-T" and (row["room"], row["day"], row["time_slot"]) == ("C0", "Tuesday", 10)
+               for row in result["schedule"])
+
+
+def test_warm_start_from_previous_schedule(institution):
+    payload = institution(8, engine_mode="interval")
+    first = IntervalTimetableEngine(data=payload).generate()
+
+    engine = IntervalTimetableEngine(data=payload)
+    engine.solution_hint = sessions_from_schedule(payload, first["schedule"])
+    assert_valid(payload, engine.generate())
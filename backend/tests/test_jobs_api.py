@@ -0,0 +1,95 @@
+import threading
+import time
+
+from api.routes import INFEASIBLE_DETAIL
+from schedule_checks import assert_valid
+from services.job_manager import job_manager
+
+
+def test_generate_returns_valid_timetable(client, institution):
+    payload = institution(10, seed=601)
+
+    response = client.post("/api/v1/generate", json=payload.model_dump())
+
+    assert response.status_code == 200
+    assert_valid(payload, response.json())
+    assert "diagnostics" not in response.json()
+
+
+def test_generate_rejects_unknown_engine_mode(client, institution):
+    response = client.post("/api/v1/generate", json=institution(5, seed=602, engine_mode="quantum").model_dump())
+    assert response.status_code == 400
+
+
+def test_generate_reports_infeasible(client, infeasible_institution):
+    response = client.post("/api/v1/generate", json=infeasible_institution(seed=603).model_dump())
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == INFEASIBLE_DETAIL
+
+
+def test_job_lifecycle(client, institution, wait_for_job):
+    payload = institution(10, seed=604)
+
+    submitted = client.post("/api/v1/jobs", json=payload.model_dump())
+    assert submitted.status_code == 202
+    job_id = submitted.json()["job_id"]
+
+    assert wait_for_job(job_id)["state"] == "completed"
+    result = client.get(f"/api/v1/jobs/{job_id}/result", params={"diagnostics": True}).json()
+    assert_valid(payload, result)
+    assert "phases" in result["diagnostics"]
+
+
+def test_unknown_job(client):
+    assert client.get("/api/v1/jobs/missing").status_code == 404
+    assert client.get("/api/v1/jobs/missing/result").status_code == 404
+    assert client.delete("/api/v1/jobs/missing").status_code == 404
+
+
+def test_cancel_running_job(client, slow_institution, wait_for_job):
+    job_id = client.post("/api/v1/jobs", json=slow_institution().model_dump()).json()["job_id"]
+    assert client.get(f"/api/v1/jobs/{job_id}/result").status_code == 409
+
+    start = time.time()
+    assert client.delete(f"/api/v1/jobs/{job_id}").json()["state"] in ("cancelling", "cancelled")
+
+    assert wait_for_job(job_id)["state"] == "cancelled"
+    assert time.time() - start < 15
+    assert client.get(f"/api/v1/jobs/{job_id}/result").status_code == 409
+
+
+
+def test_stop_keeps_best_timetable(client, slow_institution, wait_for_job):
+    payload = slow_institution()
+    job_id = client.post("/api/v1/jobs", json=payload.model_dump()).json()["job_id"]
+    while client.get(f"/api/v1/jobs/{job_id}").json()["state"] == "queued":
+        time.sleep(0.05)
+    time.sleep(3)
+
+    assert client.post(f"/api/v1/jobs/{job_id}/stop").json()["state"] == "stopping"
+
+    # Unlike a cancel, the job completes with the best timetable the search had found
+    assert wait_for_job(job_id)["state"] == "completed"
+    result = client.get(f"/api/v1/jobs/{job_id}/result").json()
+    assert_valid(payload, result)
+    assert result["objective"]["stopped_by"] == "stopped"
+    assert client.post("/api/v1/jobs/missing/stop").status_code == 404
+
+
+def test_cancelled_generate_answers_409(client, slow_institution):
+    before = set(job_manager._jobs)
+    responses = []
+    request = threading.Thread(target=lambda: responses.append(
+        client.post("/api/v1/generate", json=slow_institution().model_dump())))
+    request.start()
+    deadline = time.time() + 10
+    while not set(job_manager._jobs) - before and time.time() < deadline:
+        time.sleep(0.05)
+    job_id = (set(job_manager._jobs) - before).pop()
+
+    client.delete(f"/api/v1/jobs/{job_id}")
+    request.join(30)
+
+    assert responses[0].status_code == 409
+    assert responses[0].json()["detail"]["state"] == "cancelled"
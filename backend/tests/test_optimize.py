@@ -0,0 +1,73 @@
+import time
+
+from schedule_checks import assert_valid
+from schemas.api_models import GenerationPayload
+from solver.engine import TimetableEngine
+
+
+def _check_report(objective):
+    weights = {"continuous_overrun": 3, "idle_gap": 2, "day_spread": 1}
+    assert objective["value"] == sum(weights[name] * count for name, count in objective["terms"].items())
+    assert objective["bound"] <= objective["value"]
+    assert objective["gap"] == round((objective["value"] - objective["bound"]) / max(1.0, objective["value"]), 6)
+
+
+def test_small_institution_is_solved_to_optimality(institution):
+    payload = institution(3, optimize=True, decompose=False)
+
+    result = TimetableEngine(data=payload).generate()
+
+    assert_valid(payload, result)
+    objective = result["objective"]
+    _check_report(objective)
+    assert objective["stopped_by"] == "optimal"
+    assert objective["value"] == objective["bound"]
+    # At the optimum every day literal is on exactly when the faculty member teaches that day
+    assert objective["terms"]["day_spread"] == len({(row["faculty_id"], row["day"]) for row in result["schedule"]})
+
+
+def test_day_bound_counts_only_placed_hours():
+    # 5 hours in blocks of 2 place 4 hours, which fit the one 4-hour day F0 can teach on
+    payload = GenerationPayload(**{
+        "college_settings": {"days_active": ["Monday", "Tuesday"], "time_slots": [8, 9, 10, 11, 12], "lunch_slot": 12},
+        "rooms_config": {"rooms": [{"id": "C0", "type": "Classroom", "capacity": 60, "tags": ["Theory_Room"]}]},
+        "faculty": [{
+            "id": "F0", "name": "Faculty 0", "shift": [8, 9, 10, 11, 12], "max_load_hrs": 5,
+            "blocked_slots": [{"day": "Tuesday", "time": t} for t in (8, 9, 10, 11)],
+            "workload": [{"id": "F0-T", "type": "Theory", "subject": "SUB0", "target_groups": ["DIV0"],
+                          "hours": 5, "consecutive_hours": 2, "required_tags": ["Theory_Room"]}],
+        }],
+        "solver_options": {"optimize": True, "decompose": False},
+    })
+
+    result = TimetableEngine(data=payload).generate()
+
+    assert_valid(payload, result)
+    assert result["objective"]["stopped_by"] == "optimal"
+    assert result["objective"]["terms"]["day_spread"] == 1
+
+def test_gap_limit_ends_the_search(institution):
+    payload = institution(10, optimize=True, decompose=False, relative_gap_limit=0.9, max_time_in_seconds=30)
+
+    start = time.monotonic()
+    result = TimetableEngine(data=payload).generate()
+
+    assert_valid(payload, result)
+    _check_report(result["objective"])
+    assert result["objective"]["stopped_by"] == "gap_limit"
+    assert result["objective"]["gap"] <= 0.9
+    assert time.monotonic() - start < 30
+
+
+def test_time_limit(institution):
+    payload = institution(10, optimize=True, decompose=False, max_time_in_seconds=2)
+
+    result = TimetableEngine(data=payload).generate()
+
+    assert_valid(payload, result)
+    _check_report(result["objective"])
+    assert result["objective"]["stopped_by"] == "time_limit"
+
+
+def test_feasibility_mode_has_no_objective(institution):
+    assert "objective" not in TimetableEngine(data=institution(5)).generate()
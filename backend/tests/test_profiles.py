@@ -0,0 +1,103 @@
+import json
+import pytest
+from ortools.sat.python import cp_model
+
+from schedule_checks import assert_valid
+from solver import engine, profiles
+from solver.profiles import TunedProfiles, apply_profile
+from solver.registry import ENGINE_MODES
+
+
+def _entry(max_variables, cores, profile, optimize=False):
+    return {"max_variables": max_variables, "cores": cores, "optimize": optimize, "profile": profile}
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = tmp_path / "tuned_profiles.json"
+    path.write_text(json.dumps({"profiles": {"tuned-lin0": {"parameters": {"linearization_level": 0}}}, "entries": [
+        _entry(2_000, 1, "fast-first-feasible"),
+        _entry(2_000, 8, "thorough"),
+        _entry(20_000, 4, "thorough"),
+        _entry(20_000, 2, "fast-first-feasible", optimize=True),
+        _entry(100_000, 1, "tuned-lin0"),
+        _entry(None, 1, "no-such-profile"),
+    ]}))
+    return TunedProfiles(str(path))
+
+
+def test_select_takes_the_most_cores_that_fit(table):
+    assert table.select(500, 1) == ("fast-first-feasible", "tuned")
+    assert table.select(500, 4) == ("fast-first-feasible", "tuned")
+    assert table.select(2_000, 16) == ("thorough", "tuned")
+
+
+def test_select_falls_back_to_fewest_cores_then_default(table):
+    # Measured only with more cores than available: the smallest entry of the bucket
+    assert table.select(10_000, 1) == ("thorough", "tuned")
+    # The objective mode is part of the key
+    assert table.select(10_000, 4, optimize=True) == ("fast-first-feasible", "tuned")
+    assert table.select(500, 4, optimize=True) == ("balanced", "default")
+    # Entries naming unknown profiles are ignored
+    assert table.select(500_000, 1) == ("balanced", "default")
+
+
+def test_select_without_a_table(tmp_path):
+    assert TunedProfiles(str(tmp_path / "missing.json")).select(500, 1) == ("balanced", "default")
+
+
+def test_apply_profile_keeps_explicit_workers():
+    solver = cp_model.CpSolver()
+    solver.parameters.num_workers = 3
+
+    apply_profile(solver, "fast-first-feasible")
+
+    params = solver.parameters
+    assert params.num_workers == 3
+    assert params.linearization_level == 0
+    assert params.search_branching == type(params.search_branching).PORTFOLIO_WITH_QUICK_RESTART_SEARCH
+
+
+def test_table_profiles_are_applied(table, monkeypatch):
+    monkeypatch.setattr(profiles, "tuned_profiles", table)
+    solver = cp_model.CpSolver()
+
+    assert table.select(50_000, 4) == ("tuned-lin0", "tuned")
+    apply_profile(solver, "tuned-lin0")
+
+    assert solver.parameters.linearization_level == 0
+
+
+def test_auto_uses_the_tuned_table(institution, table, monkeypatch):
+    monkeypatch.setattr(profiles, "tuned_profiles", table)
+    monkeypatch.setattr(engine, "tuned_profiles", table)
+    payload = institution(10)
+    timetable_engine = ENGINE_MODES["boolean"](data=payload)
+    timetable_engine.solver.parameters.num_workers = 1
+
+    result = timetable_engine.generate()
+
+    assert_valid(payload, result)
+    assert result["diagnostics"]["profile"] == {"name": "fast-first-feasible", "source": "tuned"}
+
+
+def test_auto_without_a_table_is_balanced(institution):
+    result = ENGINE_MODES["boolean"](data=institution(10)).generate()
+
+    assert result["diagnostics"]["profile"] == {"name": "balanced", "source": "default"}
+
+@pytest.mark.parametrize("mode", ["boolean", "interval"])
+def test_requested_profile_is_reported(institution, mode):
+    payload = institution(10, engine_mode=mode, profile="fast-first-feasible")
+
+    result = ENGINE_MODES[mode](data=payload).generate()
+
+    assert_valid(payload, result)
+    assert result["diagnostics"]["profile"] == {"name": "fast-first-feasible", "source": "requested"}
+
+
+def test_unknown_profile_is_rejected(client, institution):
+    response = client.post("/api/v1/generate", json=institution(5, seed=2301, profile="fastest").model_dump())
+
+    assert response.status_code == 400
+    assert "fastest" in response.json()["detail"]
@@ -0,0 +1,96 @@
+import time
+
+from ortools.sat.python import cp_model
+
+from schedule_checks import assert_valid
+from schemas.api_models import BlockedSlot, ChangeSet
+from services.solution_cache import sessions_from_schedule
+from solver.engine import TimetableEngine
+from solver.repair_engine import NeighbourhoodEngine, RepairTimetableEngine
+
+
+def _block_first_session(payload, schedule):
+    """
+    Blocks the hour of the first scheduled row for its faculty; returns that faculty's id.
+    """
+    row = schedule[0]
+    faculty = next(f for f in payload.faculty if f.id == row["faculty_id"])
+    faculty.blocked_slots.append(BlockedSlot(day=row["day"], time=row["time_slot"]))
+    return faculty.id
+
+
+def test_unchanged_timetable_is_kept(institution):
+    payload = institution(20)
+    previous = TimetableEngine(data=payload).generate()
+
+    result = RepairTimetableEngine(payload, sessions_from_schedule(payload, previous["schedule"])).generate()
+
+    assert_valid(payload, result)
+    assert result["repair"]["sessions_moved"] == 0
+
+
+def test_blocked_slot_moves_few_sessions(institution):
+    payload = institution(20)
+    previous = TimetableEngine(data=payload).generate()
+    sessions = sessions_from_schedule(payload, previous["schedule"])
+    faculty_id = _block_first_session(payload, previous["schedule"])
+
+    result = RepairTimetableEngine(payload, sessions, ChangeSet(faculty_ids=[faculty_id])).generate()
+
+    assert_valid(payload, result)
+    assert 1 <= result["repair"]["sessions_moved"] < len(sessions) // 4
+
+
+def test_closed_room(institution):
+    payload = institution(20)
+    previous = TimetableEngine(data=payload).generate()
+    sessions = sessions_from_schedule(payload, previous["schedule"])
+    theory_rooms = [r.id for r in payload.rooms_config.rooms if "Theory_Room" in r.tags]
+    closed = next(row["room"] for row in previous["schedule"] if row["room"] in theory_rooms)
+    payload.rooms_config.rooms = [r for r in payload.rooms_config.rooms if r.id != closed]
+
+    result = RepairTimetableEngine(payload, sessions, ChangeSet(room_ids=[closed])).generate()
+
+    assert_valid(payload, result)
+    assert closed not in {row["room"] for row in result["schedule"]}
+
+
+def test_exact_room_matching_keeps_to_the_step_budget(institution, monkeypatch):
+    payload = institution(20, max_time_in_seconds=0.5)
+    previous = TimetableEngine(data=payload).generate()
+    repair = RepairTimetableEngine(payload, sessions_from_schedule(payload, previous["schedule"]))
+    base = TimetableEngine(data=payload)
+    base._compute_start_domains()
+    placements, _, _ = repair._previous_placements(base)
+    step = NeighbourhoodEngine(payload, placements, set())
+    p_idx = step.room_pool_of[next(iter(placements[0]))[0]]
+    sessions = [(s, w_idx) for w_idx, kept in enumerate(placements) for r_idx, d_idx, s in kept
+                if d_idx == 0 and step.room_pool_of[r_idx] == p_idx]
+
+    limits = []
+
+    class RecordingSolver(cp_model.CpSolver):
+        def Solve(self, model, *args):
+            limits.append(self.parameters.max_time_in_seconds)
+            return super().Solve(model, *args)
+    monkeypatch.setattr(cp_model, "CpSolver", RecordingSolver)
+
+    assigned = step._match_rooms(p_idx, 0, sessions, step._deadline - time.monotonic())
+
+    assert limits and limits[0] <= 0.5
+    assert all((r_idx, 0, s) in placements[w_idx] for (s, w_idx), r_idx in assigned.items())
+
+def test_repair_endpoint(client, institution):
+    payload = institution(20, seed=901)
+    previous = client.post("/api/v1/generate", json=payload.model_dump()).json()
+    faculty_id = _block_first_session(payload, previous["schedule"])
+
+    response = client.post("/api/v1/repair", json={
+        "payload": payload.model_dump(),
+        "previous_schedule": previous["schedule"],
+        "changes": {"faculty_ids": [faculty_id]},
+    })
+
+    assert response.status_code == 200
+    assert_valid(payload, response.json())
+    assert response.json()["repair"]["sessions_moved"] >= 1
@@ -0,0 +1,51 @@
+import orjson
+
+from services.response_format import compact_result
+from solver.engine import TimetableEngine
+
+
+def _rows(compact):
+    """
+    The default schedule rows, rebuilt from the compact tables and columns.
+    """
+    tables, columns = compact["tables"], compact["schedule"]
+    rows = []
+    for w_pos, r_pos, d_pos, time_slot in zip(columns["workload"], columns["room"], columns["day"], columns["time_slot"]):
+        workload = tables["workloads"][w_pos]
+        rows.append({
+            "workload_id": workload["id"],
+            "faculty_id": tables["faculty_ids"][workload["faculty"]],
+            "faculty_name": tables["faculty_names"][workload["faculty"]],
+            "subject": workload["subject"],
+            "targets": [tables["groups"][g] for g in workload["targets"]],
+            "type": workload["type"],
+            "room": tables["rooms"][r_pos],
+            "day": tables["days"][d_pos],
+            "time_slot": time_slot,
+        })
+    return rows
+
+
+def test_compact_round_trips(institution):
+    result = TimetableEngine(data=institution(10)).generate()
+
+    compact = compact_result(result)
+
+    assert compact["format"] == "compact"
+    assert _rows(compact) == result["schedule"]
+    assert {k: v for k, v in compact.items() if k not in ("format", "tables", "schedule")} == \
+        {k: v for k, v in result.items() if k != "schedule"}
+    assert len(compact["tables"]["workloads"]) == len({(row["faculty_id"], row["workload_id"]) for row in result["schedule"]})
+
+
+def test_generate_compact(client, institution):
+    payload = institution(10, seed=1301)
+    default = client.post("/api/v1/generate", json=payload.model_dump()).json()
+
+    response = client.post("/api/v1/generate", params={"format": "compact"}, json=payload.model_dump())
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    # The repeat is answered from the solution cache
+    assert response.content == orjson.dumps(compact_result({**default, "cache": "hit"}))
+    assert client.post("/api/v1/generate", params={"format": "xml"}, json=payload.model_dump()).status_code == 422
@@ -0,0 +1,41 @@
+import pytest
+
+from schedule_checks import assert_valid
+from schemas.api_models import BlockedSlot, CustomRule
+from solver.registry import ENGINE_MODES
+
+
+@pytest.mark.parametrize("mode", ["boolean", "two_phase", "interval"])
+@pytest.mark.parametrize("pooled", [True, False])
+def test_valid_with_and_without_pooling(institution, mode, pooled):
+    payload = institution(8, engine_mode=mode, pool_equivalent_rooms=pooled)
+    assert_valid(payload, ENGINE_MODES[mode](data=payload).generate())
+
+
+def test_pooling_shrinks_the_model(institution):
+    pooled = ENGINE_MODES["boolean"](data=institution(20, pool_equivalent_rooms=True))
+    unpooled = ENGINE_MODES["boolean"](data=institution(20, pool_equivalent_rooms=False))
+
+    assert len(pooled.room_pools) < len(unpooled.room_pools) == len(unpooled.room_ids)
+    assert_valid(pooled.data, pooled.generate())
+    unpooled.generate()
+    assert len(pooled.model.Proto().variables) < len(unpooled.model.Proto().variables)
+
+
+def test_rooms_that_differ_are_not_pooled(institution):
+    payload = institution(20)
+    classrooms = [room for room in payload.rooms_config.rooms if "Theory_Room" in room.tags]
+    assert len(classrooms) >= 3
+    classrooms[0].blocked_slots = [BlockedSlot(day="Monday", time=8)]
+    payload.college_settings.custom_rules = [CustomRule(
+        id="pin", condition_field="workload_id", condition_operator="EQUALS", condition_value="F0-T",
+        action_type="FORCE_PIN", action_value=f"{classrooms[1].id}|Tuesday|10",
+    )]
+
+    engine = ENGINE_MODES["boolean"](data=payload)
+    pool_of = {room_id: engine.room_pool_of[r_idx] for r_idx, room_id in enumerate(engine.room_ids)}
+
+    assert len(engine.room_pools[pool_of[classrooms[0].id]]) == 1
+    assert len(engine.room_pools[pool_of[classrooms[1].id]]) == 1
+    assert pool_of[classrooms[2].id] not in (pool_of[classrooms[0].id], pool_of[classrooms[1].id])
+    assert_valid(payload, engine.generate())
@@ -0,0 +1,67 @@
+import pytest
+
+from schedule_checks import assert_valid
+from schemas.api_models import BlockedSlot, GenerationPayload, ScenarioVariation
+from solver.scenarios import ScenarioError, ScenarioSweepEngine, check_variations
+
+
+def _apply(payload: GenerationPayload, variation: ScenarioVariation) -> GenerationPayload:
+    """
+    The institution a variation describes, built the slow way for checking the sweep's schedules.
+    """
+    varied = payload.model_copy(deep=True)
+    settings = varied.college_settings
+    settings.time_slots = sorted((set(settings.time_slots) - set(variation.remove_time_slots)) | set(variation.add_time_slots))
+    for f in varied.faculty:
+        f.shift = variation.faculty_shifts.get(f.id, f.shift)
+        f.blocked_slots = f.blocked_slots + variation.faculty_blocked_slots.get(f.id, [])
+    varied.rooms_config.rooms = [r for r in varied.rooms_config.rooms if r.id not in variation.close_rooms]
+    return varied
+
+
+def test_every_scenario_is_valid_for_its_own_institution(institution):
+    payload = institution(20)
+    f3 = payload.faculty[3]
+    variations = [
+        ScenarioVariation(name="close_C0", close_rooms=["C0"]),
+        ScenarioVariation(name="late", add_time_slots=[17], faculty_shifts={f.id: f.shift + [17] for f in payload.faculty[:10]}),
+        ScenarioVariation(name="part_time", faculty_shifts={f3.id: [h for h in f3.shift if h < 12]}),
+        ScenarioVariation(name="monday_off", faculty_blocked_slots={
+            payload.faculty[0].id: [BlockedSlot(day="Monday", time=t) for t in range(8, 12)]}),
+        ScenarioVariation(name="no_labs", close_rooms=[r.id for r in payload.rooms_config.rooms if r.type == "Laboratory"]),
+    ]
+
+    result = ScenarioSweepEngine(payload, variations, include_schedules=True).generate()
+
+    rows = {row["scenario"]: row for row in result["scenarios"]}
+    assert list(rows) == ["base"] + [v.name for v in variations]
+    assert rows["base"]["sessions_moved"] == 0
+    assert rows["no_labs"]["feasible"] is False
+    assert_valid(payload, {"status": "success", "schedule": result["schedules"]["base"]})
+    for variation in variations[:-1]:
+        assert rows[variation.name]["feasible"], variation.name
+        assert rows[variation.name]["sessions_moved"] is not None
+        assert_valid(_apply(payload, variation), {"status": "success", "schedule": result["schedules"][variation.name]})
+
+
+def test_bad_variations_are_rejected(institution):
+    payload = institution(5)
+    with pytest.raises(ScenarioError):
+        check_variations(payload, [ScenarioVariation(name="a", close_rooms=["NOPE"])])
+    with pytest.raises(ScenarioError):
+        check_variations(payload, [ScenarioVariation(name="base")])
+    with pytest.raises(ScenarioError):
+        check_variations(payload, [ScenarioVariation(name="a", faculty_shifts={"NOPE": [8]})])
+
+
+def test_scenarios_endpoint(client, institution):
+    payload = institution(10, seed=2201).model_dump()
+    body = {"base": payload, "variations": [{"name": "close_C0", "close_rooms": ["C0"]}]}
+
+    response = client.post("/api/v1/scenarios", json=body)
+
+    assert response.status_code == 200
+    assert [row["scenario"] for row in response.json()["scenarios"]] == ["base", "close_C0"]
+    assert "schedules" not in response.json()
+    assert client.post("/api/v1/scenarios", json={**body, "variations": [{"name": "x", "close_rooms": ["NOPE"]}]}).status_code == 400
+    assert client.post("/api/v1/scenarios", json={**body, "variations": []}).status_code == 422
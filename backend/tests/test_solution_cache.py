@@ -0,0 +1,103 @@
+import os
+
+from schedule_checks import assert_valid
+from schemas.api_models import BlockedSlot, GenerationPayload
+from services.solution_cache import SolutionCache, payload_key, sessions_from_schedule
+from solver.engine import TimetableEngine
+
+
+def _shuffled(payload: GenerationPayload) -> GenerationPayload:
+    data = payload.model_dump()
+    data["faculty"].reverse()
+    for f in data["faculty"]:
+        f["workload"].reverse()
+        f["blocked_slots"].reverse()
+    data["rooms_config"]["rooms"].reverse()
+    for room in data["rooms_config"]["rooms"]:
+        room["blocked_slots"].reverse()
+    data["college_settings"]["days_active"].reverse()
+    data["solver_options"]["engine_mode"] = "interval"
+    return GenerationPayload(**data)
+
+
+def test_key_ignores_order_and_solver_options(institution):
+    payload = institution(10)
+    payload.rooms_config.rooms[0].blocked_slots = [BlockedSlot(day="Monday", time=8), BlockedSlot(day="Friday", time=15)]
+
+    assert payload_key(_shuffled(payload)) == payload_key(payload)
+
+    changed = payload.model_copy(deep=True)
+    changed.faculty[0].workload[0].hours = 2
+    assert payload_key(changed) != payload_key(payload)
+
+
+def test_hit_after_put_survives_restart(tmp_path, institution):
+    payload = institution(10)
+    result = TimetableEngine(data=payload).generate()
+    cache = SolutionCache(str(tmp_path))
+
+    assert cache.get(payload) is None
+    cache.put(payload, result)
+
+    assert cache.get(_shuffled(payload))["schedule"] == result["schedule"]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+    assert SolutionCache(str(tmp_path)).get(payload)["schedule"] == result["schedule"]
+
+
+def test_infeasible_results_are_not_cached(tmp_path, infeasible_institution):
+    payload = infeasible_institution()
+    cache = SolutionCache(str(tmp_path))
+
+    cache.put(payload, TimetableEngine(data=payload).generate())
+
+    assert cache.get(payload) is None
+
+
+def test_stale_temporary_files_are_removed(tmp_path):
+    (tmp_path / "abc.123.tmp").write_text("{")
+    SolutionCache(str(tmp_path))
+    assert not (tmp_path / "abc.123.tmp").exists()
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path, institution):
+    payloads = [institution(5, seed=seed) for seed in range(3)]
+    results = [TimetableEngine(data=p).generate() for p in payloads]
+    cache = SolutionCache(str(tmp_path), memory_entries=1)
+    cache.put(payloads[0], results[0])
+    oldest = tmp_path / f"{payload_key(payloads[0])}.json"
+    os.utime(oldest, (0, 0))
+    size = os.path.getsize(oldest)
+    cache.disk_max_bytes = int(size * 2.5)
+
+    cache.put(payloads[1], results[1])
+    cache.put(payloads[2], results[2])
+
+    assert cache.get(payloads[0]) is None
+    assert cache.get(payloads[2]) is not None
+
+
+def test_closest_timetable_warm_starts_a_near_miss(tmp_path, institution):
+    payload = institution(10)
+    result = TimetableEngine(data=payload).generate()
+    cache = SolutionCache(str(tmp_path))
+    cache.put(payload, result)
+
+    edited = payload.model_copy(deep=True)
+    edited.faculty[0].blocked_slots.append(BlockedSlot(day="Monday", time=8))
+    hint = cache.closest_sessions(edited)
+
+    assert hint == sessions_from_schedule(payload, result["schedule"])
+    engine = TimetableEngine(data=edited)
+    engine.solution_hint = hint
+    assert_valid(edited, engine.generate())
+
+
+def test_generate_serves_repeats_from_cache(client, institution):
+    payload = institution(10, seed=801)
+
+    first = client.post("/api/v1/generate", json=payload.model_dump()).json()
+    second = client.post("/api/v1/generate", json=_shuffled(payload).model_dump()).json()
+
+    assert first["cache"] in ("miss", "warm_start")
+    assert second["cache"] == "hit"
+    assert second["schedule"] == first["schedule"]
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from schedule_checks import schedule_violations
+from solver.engine import TimetableEngine
+
+
+def _events(client, job_id):
+    events = []
+    with client.stream("GET", f"/api/v1/jobs/{job_id}/events") as response:
+        assert response.status_code == 200
+        for line in response.iter_lines():
+            if line.startswith("data:"):
+                events.append(json.loads(line[len("data:"):]))
+    return events
+
+
+def test_listener_sees_every_solution(institution):
+    payload = institution(10, optimize=True, max_time_in_seconds=5)
+    solutions = []
+    engine = TimetableEngine(data=payload)
+    engine.solution_listener = solutions.append
+
+    result = engine.generate()
+
+    assert result["status"] == "success"
+    assert len(solutions) == engine.solutions_found >= 1
+    assert [s["solution_index"] for s in solutions] == list(range(1, len(solutions) + 1))
+    for solution in solutions:
+        assert not schedule_violations(payload, solution["schedule"])
+
+
+def test_listener_errors_reach_the_caller(institution):
+    engine = TimetableEngine(data=institution(5))
+
+    def broken(solution):
+        raise RuntimeError("listener failed")
+    engine.solution_listener = broken
+
+    with pytest.raises(RuntimeError, match="listener failed"):
+        engine.generate()
+
+
+def test_job_events(client, institution, wait_for_job):
+    payload = institution(10, seed=701, optimize=True, max_time_in_seconds=3)
+    job_id = client.post("/api/v1/jobs", params={"stream": True}, json=payload.model_dump()).json()["job_id"]
+
+    events = _events(client, job_id)
+
+    types = [event["type"] for event in events]
+    assert "solution" in types
+    assert types[-1] == "done"
+    for event in events:
+        if event["type"] == "solution":
+            assert not schedule_violations(payload, event["schedule"])
+    assert wait_for_job(job_id)["state"] == "completed"
+
+
+def test_events_need_stream_flag(client, institution):
+    job_id = client.post("/api/v1/jobs", json=institution(5, seed=702).model_dump()).json()["job_id"]
+    assert client.get(f"/api/v1/jobs/{job_id}/events").status_code == 409
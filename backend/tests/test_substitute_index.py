@@ -0,0 +1,95 @@
+import pytest
+
+from benchmarks.generator import generate_institution
+from services.substitute_index import SubstituteIndex, SubstitutionError
+from solver.engine import TimetableEngine
+
+
+@pytest.fixture(scope="module")
+def timetable():
+    payload = generate_institution(20, seed=1001, max_time_in_seconds=30)
+    return payload, TimetableEngine(data=payload).generate()["schedule"]
+
+
+def _free_faculty(payload, schedule, day, time_slot):
+    """Brute-force reference: on shift, not blocked, not at lunch and not teaching."""
+    busy = {row["faculty_id"] for row in schedule if (row["day"], row["time_slot"]) == (day, time_slot)}
+    return {
+        f.id for f in payload.faculty
+        if time_slot in f.shift and time_slot != payload.college_settings.lunch_slot and f.id not in busy
+        and not any((b.day, b.time) == (day, time_slot) for b in f.blocked_slots)
+    }
+
+
+def test_search_matches_brute_force(timetable):
+    payload, schedule = timetable
+    index = SubstituteIndex(payload, schedule)
+
+    for day in payload.college_settings.days_active:
+        for time_slot in payload.college_settings.time_slots:
+            found = {s["faculty_id"] for s in index.search(day, time_slot)}
+            assert found == _free_faculty(payload, schedule, day, time_slot)
+
+
+def test_session_search_ranks_subject_fit_then_load(timetable):
+    payload, schedule = timetable
+    index = SubstituteIndex(payload, schedule)
+    row = schedule[0]
+
+    found = index.search_for_session(row["faculty_id"], row["day"], row["time_slot"])
+
+    substitutes = found["available_substitutes"]
+    assert found["session"]["subject"] == row["subject"]
+    assert row["faculty_id"] not in {s["faculty_id"] for s in substitutes}
+    ranks = [(-s["subject_fit"], s["current_load"]) for s in substitutes]
+    assert ranks == sorted(ranks)
+
+
+def test_commit_updates_the_index(timetable):
+    payload, schedule = timetable
+    index = SubstituteIndex(payload, schedule)
+    row = schedule[0]
+    cell = (row["day"], row["time_slot"])
+    substitute = index.search_for_session(row["faculty_id"], *cell)["available_substitutes"][0]["faculty_id"]
+
+    committed = index.commit(row["faculty_id"], substitute, *cell)
+
+    assert committed["faculty_id"] == substitute and committed["substitute_for"] == row["faculty_id"]
+    assert substitute not in {s["faculty_id"] for s in index.search(*cell)}
+    assert row["faculty_id"] not in {s["faculty_id"] for s in index.search(*cell)}
+    with pytest.raises(SubstitutionError):
+        index.commit(row["faculty_id"], substitute, *cell)
+
+
+def test_unknown_slot(timetable):
+    index = SubstituteIndex(*timetable)
+    with pytest.raises(SubstitutionError):
+        index.search("Sunday", 8)
+
+
+def test_substitute_endpoints(client, timetable):
+    payload, schedule = timetable
+    built = client.post("/api/v1/substitute-index", json={"payload": payload.model_dump(), "schedule": schedule})
+    assert built.status_code == 201
+    index_id = built.json()["index_id"]
+    row = schedule[0]
+
+    search = client.post("/api/v1/substitute-search", params={
+        "index_id": index_id, "day": row["day"], "time_index": row["time_slot"], "absent_faculty_id": row["faculty_id"],
+    })
+    assert search.status_code == 200
+    substitute = search.json()["available_substitutes"][0]["faculty_id"]
+
+    batch = client.post("/api/v1/substitute-search/batch", params={"index_id": index_id},
+                        json={"absences": [{"faculty_id": row["faculty_id"], "days": [row["day"]]}], "limit": 2})
+    assert batch.status_code == 200
+    taught = {(r["day"], r["time_slot"]) for r in schedule if r["faculty_id"] == row["faculty_id"] and r["day"] == row["day"]}
+    assert {(s["session"]["day"], s["session"]["time_slot"]) for s in batch.json()["sessions"]} == taught
+
+    commit = {"absent_faculty_id": row["faculty_id"], "substitute_faculty_id": substitute,
+              "day": row["day"], "time_slot": row["time_slot"]}
+    assert client.post("/api/v1/substitute-commit", params={"index_id": index_id}, json=commit).status_code == 200
+    assert client.post("/api/v1/substitute-commit", params={"index_id": index_id}, json=commit).status_code == 409
+
+    assert client.post("/api/v1/substitute-search", params={"index_id": "missing", "day": "Monday", "time_index": 8}).status_code == 404
+    assert client.post("/api/v1/substitute-search", params={"index_id": index_id, "day": "Sunday", "time_index": 8}).status_code == 400
@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from benchmarks.generator import generate_institution
+from schedule_checks import assert_valid
+from schemas.api_models import GenerationPayload
+from services.job_manager import GenerationJob
+from services.tenant_scheduler import TenantQuotaError, TenantScheduler
+
+
+class FakePool:
+    """
+    Stands in for the job manager: records what the scheduler starts and leaves finishing it to the test.
+    """
+
+    def __init__(self):
+        self.started = []
+        self._lock = threading.Lock()
+
+    def start(self, payload: GenerationPayload, cores: int) -> GenerationJob:
+        future = Future()
+        future.set_running_or_notify_cancel()
+        job = GenerationJob(f"job-{len(self.started)}", "standard", payload.solver_options.max_time_in_seconds, future, threading.Event())
+        with self._lock:
+            self.started.append((payload.faculty[0].name, job))
+        return job
+
+    def wait_for(self, count: int, timeout: float = 5.0):
+        deadline = time.time() + timeout
+        while len(self.started) < count:
+            assert time.time() < deadline, f"only {len(self.started)} of {count} generations started"
+            time.sleep(0.01)
+
+    def finish(self, index: int):
+        self.started[index][1].future.set_result({"status": "success", "schedule": []})
+
+
+def _payload(name: str, num_faculty: int, budget: float = 5) -> GenerationPayload:
+    payload = generate_institution(num_faculty, max_time_in_seconds=budget)
+    payload.faculty[0].name = name
+    return payload
+
+
+@pytest.fixture
+def scheduler():
+    made = []
+
+    def build(**kwargs):
+        options = {"capacity": 1, "cores": 2, "max_concurrent_per_tenant": 1, "solver_seconds_per_window": 100, "window_s": 60}
+        made.append(TenantScheduler(**{**options, **kwargs}))
+        return made[-1]
+
+    yield build
+    for s in made:
+        s.shutdown()
+
+
+def test_least_served_tenant_goes_next_and_small_generations_first(scheduler):
+    pool = FakePool()
+    tenants = scheduler()
+    batch_id = tenants.submit_batch([
+        ("big", _payload("big-large", 12)),
+        ("big", _payload("big-small", 2)),
+        ("other", _payload("other", 6)),
+    ], pool.start)
+
+    for n in range(3):
+        pool.wait_for(n + 1)
+        time.sleep(0.05)
+        # Capacity 1: nothing else starts until the running generation finishes
+        assert len(pool.started) == n + 1
+        pool.finish(n)
+
+    assert [name for name, _ in pool.started] == ["big-small", "other", "big-large"]
+    status = tenants.batch_status(batch_id)
+    assert status["summary"] == {"completed": 3}
+    assert tenants.stats()["tenants"]["big"]["outcomes"] == {"success": 2}
+
+
+def test_per_tenant_concurrency_cap(scheduler):
+    pool = FakePool()
+    tenants = scheduler(capacity=3)
+    tenants.submit_batch([("a", _payload("a1", 2)), ("a", _payload("a2", 3)), ("b", _payload("b1", 4))], pool.start)
+
+    pool.wait_for(2)
+    time.sleep(0.1)
+    assert sorted(name for name, _ in pool.started) == ["a1", "b1"]
+    a = tenants.stats()["tenants"]["a"]
+    assert (a["running"], a["waiting"]) == (1, 1)
+
+    pool.finish(0)
+    pool.wait_for(3)
+    assert pool.started[2][0] == "a2"
+
+
+def test_quota_holds_a_tenant_until_its_charges_expire(scheduler):
+    pool = FakePool()
+    tenants = scheduler(capacity=2, max_concurrent_per_tenant=2, solver_seconds_per_window=10, window_s=0.5)
+    tenants.submit_batch([("a", _payload("a1", 2, budget=6)), ("a", _payload("a2", 3, budget=6))], pool.start)
+
+    pool.wait_for(1)
+    time.sleep(0.2)
+    # The first generation's reserved 6s leaves no room for another 6s in the 10s quota
+    assert len(pool.started) == 1
+    assert tenants.stats()["tenants"]["a"]["solver_seconds_used"] == 6
+    pool.wait_for(2)
+
+
+def test_generation_larger_than_the_quota_is_refused(scheduler):
+    tenants = scheduler(solver_seconds_per_window=3)
+    with pytest.raises(TenantQuotaError):
+        tenants.submit_batch([("a", _payload("a1", 2, budget=5))], FakePool().start)
+
+
+def test_batch_endpoints(client):
+    payloads = [generate_institution(6 + n, seed=2401 + n, max_time_in_seconds=10) for n in range(3)]
+    items = [{"institution_id": tenant, "payload": p.model_dump()} for tenant, p in zip(["t1", "t1", "t2"], payloads)]
+
+    response = client.post("/api/v1/batches", json={"items": items})
+
+    assert response.status_code == 202
+    batch_id = response.json()["batch_id"]
+    deadline = time.time() + 120
+    while True:
+        batch = client.get(f"/api/v1/batches/{batch_id}").json()
+        if all(item["state"] in ("completed", "failed", "cancelled") for item in batch["items"]):
+            break
+        assert time.time() < deadline
+        time.sleep(0.1)
+    for item in batch["items"]:
+        assert item["state"] == "completed"
+        assert_valid(payloads[item["item"]], client.get(f"/api/v1/jobs/{item['job_id']}/result").json())
+
+    stats = client.get("/api/v1/scheduler").json()
+    assert {"t1", "t2"} <= set(stats["tenants"])
+    assert stats["tenants"]["t1"]["outcomes"]["success"] >= 2
+    assert client.get("/api/v1/batches/nope").status_code == 404
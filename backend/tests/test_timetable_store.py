@@ -0,0 +1,95 @@
+import pytest
+
+from benchmarks.generator import generate_institution
+from services.timetable_store import TimetableStore, UnknownTimetableError
+from solver.engine import TimetableEngine
+
+
+@pytest.fixture(scope="module")
+def timetable():
+    payload = generate_institution(20, seed=2001, max_time_in_seconds=30)
+    return payload, TimetableEngine(data=payload).generate()["schedule"]
+
+
+def _grid_rows(view):
+    return [row for cells in view["grid"].values() for rows in cells.values() for row in rows]
+
+
+def _key(row):
+    return row["faculty_id"], row["workload_id"], row["day"], row["time_slot"]
+
+
+def test_views_match_the_schedule(tmp_path, timetable):
+    payload, schedule = timetable
+    store = TimetableStore(str(tmp_path / "timetables.sqlite3"))
+    meta = store.save(schedule, payload.college_settings.days_active, payload.college_settings.time_slots)
+    row = schedule[0]
+
+    faculty = store.faculty_grid(meta["timetable_id"], row["faculty_id"])
+    room = store.room_grid(meta["timetable_id"], row["room"], row["day"])
+    group = store.group_grid(meta["timetable_id"], row["targets"][0])
+
+    assert sorted(map(_key, _grid_rows(faculty))) == sorted(_key(r) for r in schedule if r["faculty_id"] == row["faculty_id"])
+    assert sorted(map(_key, _grid_rows(room))) == sorted(
+        _key(r) for r in schedule if r["room"] == row["room"] and r["day"] == row["day"])
+    assert sorted(map(_key, _grid_rows(group))) == sorted(_key(r) for r in schedule if row["targets"][0] in r["targets"])
+    assert list(faculty["grid"]) == payload.college_settings.days_active
+    assert list(room["grid"]) == [row["day"]]
+
+
+def test_reopened_store_serves_the_same_etag(tmp_path, timetable):
+    payload, schedule = timetable
+    database = str(tmp_path / "timetables.sqlite3")
+    store = TimetableStore(database)
+    timetable_id = store.save(schedule, payload.college_settings.days_active, payload.college_settings.time_slots)["timetable_id"]
+    etag = store.etag(timetable_id, "faculty", "F0")
+
+    reopened = TimetableStore(database)
+
+    assert reopened.etag(timetable_id, "faculty", "F0") == etag
+    assert reopened.etag(timetable_id, "faculty", "F1") != etag
+    with pytest.raises(UnknownTimetableError):
+        reopened.etag("missing", "meta")
+
+
+def test_metadata_memory_is_bounded(tmp_path, timetable):
+    payload, schedule = timetable
+    store = TimetableStore(str(tmp_path / "timetables.sqlite3"), meta_entries=2)
+    days, time_slots = payload.college_settings.days_active, payload.college_settings.time_slots
+    first, second, third = (store.save(schedule, days, time_slots)["timetable_id"] for _ in range(3))
+
+    assert list(store._meta) == [second, third]
+    # Evicted metadata is read back from the database and becomes the most recent entry
+    assert store.metadata(first)["rows"] == len(schedule)
+    assert list(store._meta) == [third, first]
+
+def test_timetable_endpoints_revalidate_with_etags(client, timetable):
+    payload, schedule = timetable
+    stored = client.post("/api/v1/timetables", json={
+        "schedule": schedule, "days_active": payload.college_settings.days_active,
+        "time_slots": payload.college_settings.time_slots, "institution_id": "inst-1",
+    })
+    assert stored.status_code == 201
+    timetable_id = stored.json()["timetable_id"]
+    row = schedule[0]
+
+    for path in (f"/api/v1/timetables/{timetable_id}",
+                 f"/api/v1/timetables/{timetable_id}/faculty/{row['faculty_id']}",
+                 f"/api/v1/timetables/{timetable_id}/rooms/{row['room']}?day={row['day']}",
+                 f"/api/v1/timetables/{timetable_id}/groups/{row['targets'][0]}"):
+        first = client.get(path)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+
+        revalidated = client.get(path, headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == etag
+        assert revalidated.content == b""
+        assert client.get(path, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    faculty = client.get(f"/api/v1/timetables/{timetable_id}/faculty/{row['faculty_id']}").json()
+    assert faculty["sessions"] == sum(1 for r in schedule if r["faculty_id"] == row["faculty_id"])
+    assert client.get(f"/api/v1/timetables/{timetable_id}").json()["institution_id"] == "inst-1"
+    assert client.get("/api/v1/timetables/missing/faculty/F0").status_code == 404
+    assert client.post("/api/v1/timetables", json={"schedule": [{"day": "Monday"}], "days_active": [],
+                                                    "time_slots": []}).status_code == 400
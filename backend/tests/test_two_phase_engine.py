@@ -0,0 +1,48 @@
+import time
+
+from schedule_checks import assert_valid
+from schemas.api_models import CustomRule
+from solver.two_phase_engine import RoomAssignmentError, TwoPhaseTimetableEngine
+
+
+def test_generates_valid_timetable(institution):
+    payload = institution(10, engine_mode="two_phase")
+
+    result = TwoPhaseTimetableEngine(data=payload).generate()
+
+    assert_valid(payload, result)
+    assert result["fallback_to_full_model"] is False
+
+
+def test_pinned_sessions_use_full_model(institution):
+    payload = institution(5, engine_mode="two_phase")
+    payload.college_settings.custom_rules = [CustomRule(
+        id="pin", condition_field="workload_id", condition_operator="EQUALS", condition_value="F0-T",
+        action_type="FORCE_PIN", action_value="C0|Tuesday|10",
+    )]
+
+    result = TwoPhaseTimetableEngine(data=payload).generate()
+
+    assert_valid(payload, result)
+    assert result["fallback_to_full_model"] is True
+    assert any(row["workload_id"] == "F0-T" and (row["room"], row["day"], row["time_slot"]) == ("C0", "Tuesday", 10)
+               for row in result["schedule"])
+
+
+def test_room_matching_failure_falls_back_within_budget(institution, monkeypatch):
+    payload = institution(10, engine_mode="two_phase", max_time_in_seconds=5)
+
+    def unmatched(self, d_idx, placed):
+        time.sleep(2)
+        raise RoomAssignmentError("no matching")
+    monkeypatch.setattr(TwoPhaseTimetableEngine, "_assign_rooms", unmatched)
+
+    engine = TwoPhaseTimetableEngine(data=payload)
+    start = time.time()
+    result = engine.generate()
+
+    assert_valid(payload, result)
+    assert result["fallback_to_full_model"] is True
+    # The full model only gets what phase 1 and the failed matching left of the 5s budget
+    assert engine._full_model.solver.parameters.max_time_in_seconds <= 3
+    assert time.time() - start < 5 + 1
@@ -0,0 +1,99 @@
+from schedule_checks import assert_valid
+from schemas.api_models import GenerationPayload
+from services.validator import validate_input_payload
+from solver.engine import TimetableEngine
+
+# Two days of 8-11 and 13-14 around a 12:00 lunch: twelve teaching hours, in runs of 4 and 2
+DAYS = ["Monday", "Tuesday"]
+SLOTS = [8, 9, 10, 11, 12, 13, 14]
+
+
+def _faculty(n, sessions, shift=SLOTS):
+    """
+    `sessions` is a list of (type, group, hours, consecutive_hours, tag).
+    """
+    workload = [{"id": f"F{n}-{i}", "type": kind, "subject": f"SUB{n}", "target_groups": [group],
+                 "hours": hours, "consecutive_hours": block, "required_tags": [tag]}
+                for i, (kind, group, hours, block, tag) in enumerate(sessions)]
+    return {"id": f"F{n}", "name": f"Faculty {n}", "shift": shift,
+            "max_load_hrs": sum(s[2] for s in sessions), "workload": workload}
+
+
+def _payload(faculty, classrooms=2, labs=1) -> GenerationPayload:
+    rooms = [{"id": f"C{n}", "type": "Classroom", "capacity": 60, "tags": ["Theory_Room"]} for n in range(classrooms)]
+    rooms += [{"id": f"L{n}", "type": "Laboratory", "capacity": 30, "tags": ["Lab"]} for n in range(labs)]
+    return GenerationPayload(**{
+        "college_settings": {"days_active": DAYS, "time_slots": SLOTS, "lunch_slot": 12},
+        "rooms_config": {"rooms": rooms},
+        "faculty": faculty,
+    })
+
+
+def _errors(payload):
+    is_valid, errors = validate_input_payload(payload)
+    assert is_valid == (not errors)
+    return errors
+
+
+def test_lab_hours_beyond_the_labs():
+    # 16 lab hours against 12 lab-hours a week; all rooms together still hold 36
+    payload = _payload([_faculty(n, [("Practical", f"G{n}", 8, 2, "Lab")]) for n in range(2)])
+
+    errors = _errors(payload)
+
+    assert len(errors) == 1
+    assert "tagged Lab (2-hour blocks) require 16 room-hours" in errors[0]
+
+
+def test_lunch_splits_long_blocks():
+    # Three 3-hour labs: 9 of the faculty's 12 free hours, but only one run a day is 3 hours long
+    payload = _payload([_faculty(0, [("Practical", "G0", 9, 3, "Lab")])], labs=2)
+
+    errors = _errors(payload)
+
+    assert "3 sessions of 3 or more consecutive hours" in errors[0]
+    assert "only holds 2 such blocks" in errors[0]
+    # The group's hours fail for the same reason: only 8 of them lie in runs a 3-hour block fits
+    assert errors[1:] and all("Group 'G0'" in error for error in errors[1:])
+
+
+def test_group_hours_beyond_what_its_faculty_can_cover():
+    # Each faculty fits their 3 hours into 8-9 on two days, but the group needs 6 of those 4 hours
+    payload = _payload([_faculty(n, [("Theory", "G", 3, 1, "Theory_Room")], shift=[8, 9]) for n in range(2)])
+
+    errors = _errors(payload)
+
+    assert len(errors) == 1
+    assert errors[0].startswith("Validation Failed: Group 'G' needs 6 hours per week from F0, F1")
+    assert "cover 4 distinct hours" in errors[0]
+
+
+def test_parent_theory_and_sub_group_sessions_share_the_hours():
+    payload = _payload([
+        _faculty(0, [("Theory", "SY-A", 3, 1, "Theory_Room")], shift=[8, 9]),
+        _faculty(1, [("Tutorial", "SY-A-B1", 2, 1, "Theory_Room")], shift=[8, 9]),
+    ])
+
+    errors = _errors(payload)
+
+    assert len(errors) == 1
+    assert "Theory for 'SY-A' and labs/tutorials of its sub-group 'SY-A-B1'" in errors[0]
+
+
+def test_tight_payload_passes_and_solves():
+    payload = _payload([
+        # Six 2-hour labs fill the only lab exactly
+        _faculty(0, [("Practical", "G0", 6, 2, "Lab")]),
+        _faculty(1, [("Practical", "G1", 6, 2, "Lab")]),
+        # The division's two faculty cover exactly its 4 hours
+        _faculty(2, [("Theory", "SY-A", 2, 1, "Theory_Room")], shift=[8, 9]),
+        _faculty(3, [("Tutorial", "SY-A-B1", 2, 1, "Theory_Room")], shift=[8, 9]),
+    ])
+
+    assert _errors(payload) == []
+    assert_valid(payload, TimetableEngine(data=payload).generate())
+
+
+def test_generated_institutions_pass(institution):
+    for seed in range(3):
+        assert _errors(institution(20, seed=seed, room_slack=1.0)) == []
@@ -100,3 +100,52 @@ CREATE POLICY "Allow full access to auth users" ON faculty_settings FOR ALL TO a
 CREATE POLICY "Allow full access to auth users" ON rooms FOR ALL TO authenticated USING (true);
 CREATE POLICY "Allow full access to auth users" ON workloads FOR ALL TO authenticated USING (true);
 CREATE POLICY "Allow full access to auth users" ON generated_timetables FOR ALL TO authenticated USING (true);
+
+-- ==========================================
+-- NORMALIZED TIMETABLE STORE (mirrors backend/services/timetable_store.py)
+-- ==========================================
+
+-- One row per scheduled hour, so per-faculty / per-room / per-group views read an index range
+-- instead of scanning generated_timetables.matrix_data
+CREATE TABLE timetables (
+    id TEXT PRIMARY KEY,
+    institution_id TEXT,
+    days TEXT NOT NULL,
+    time_slots TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE timetable_sessions (
+    timetable_id TEXT NOT NULL,
+    row_no INTEGER NOT NULL,
+    faculty_id TEXT NOT NULL,
+    faculty_name TEXT NOT NULL,
+    workload_id TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    type TEXT NOT NULL,
+    targets TEXT NOT NULL,
+    room TEXT NOT NULL,
+    day TEXT NOT NULL,
+    time_slot INTEGER NOT NULL,
+    PRIMARY KEY (timetable_id, row_no)
+);
+
+CREATE TABLE timetable_session_groups (
+    timetable_id TEXT NOT NULL,
+    target_group TEXT NOT NULL,
+    day TEXT NOT NULL,
+    row_no INTEGER NOT NULL
+);
+
+CREATE INDEX idx_sessions_faculty ON timetable_sessions (timetable_id, faculty_id);
+CREATE INDEX idx_sessions_room_day ON timetable_sessions (timetable_id, room, day);
+CREATE INDEX idx_session_groups_day ON timetable_session_groups (timetable_id, target_group, day);
+
+ALTER TABLE timetables ENABLE ROW LEVEL SECURITY;
+ALTER TABLE timetable_sessions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE timetable_session_groups ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow full access to auth users" ON timetables FOR ALL TO authenticated USING (true);
+CREATE POLICY "Allow full access to auth users" ON timetable_sessions FOR ALL TO authenticated USING (true);
+CREATE POLICY "Allow full access to auth users" ON timetable_session_groups FOR ALL TO authenticated USING (true);